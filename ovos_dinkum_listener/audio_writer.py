@@ -0,0 +1,398 @@
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+import json
+import os
+import time
+import wave
+from dataclasses import dataclass
+from pathlib import Path
+from queue import Empty, Full, Queue
+from threading import Thread
+from typing import TYPE_CHECKING, Callable, Dict, List, Optional
+
+from ovos_utils.log import LOG
+
+if TYPE_CHECKING:
+    from ovos_dinkum_listener.dataset import DatasetWriter
+
+
+@dataclass
+class SaveJob:
+    """
+    Audio and metadata to be written as `{filename}.{audio_format}` and
+    `{filename}.json` in `directory`. If `filename` is None it is built from
+    the metadata by `filename_fn` on the writer thread.
+    """
+    directory: Path
+    filename: Optional[str]
+    audio: bytes
+    meta: dict
+    sample_rate: int = 16000
+    sample_width: int = 2
+    sample_channels: int = 1
+    audio_format: str = "wav"
+    filename_fn: Optional[Callable[[dict], str]] = None
+
+    def resolve(self) -> str:
+        """
+        Build the file name if it was deferred to the writer thread
+        @return: file name without extension
+        """
+        if self.filename is None:
+            self.filename = self.filename_fn(self.meta)
+        return self.filename
+
+    @property
+    def audio_path(self) -> Path:
+        return self.directory / f"{self.filename}.{self.audio_format}"
+
+    @property
+    def meta_path(self) -> Path:
+        return self.directory / f"{self.filename}.json"
+
+    @property
+    def uri(self) -> str:
+        if self.audio_format == "dataset":
+            dataset = (self.directory / "dataset").absolute()
+            return f"file://{dataset}#{self.filename}"
+        return f"file://{self.audio_path.absolute()}"
+
+
+class RetentionIndex:
+    """
+    SQLite index of written files, so retention can be enforced without
+    listing the save directories. Must only be used from one thread.
+    """
+
+    def __init__(self, path: Path):
+        import sqlite3
+
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self._db = sqlite3.connect(str(path))
+        self._db.execute("CREATE TABLE IF NOT EXISTS files ("
+                         "audio_path TEXT PRIMARY KEY, meta_path TEXT, "
+                         "size INTEGER, created REAL)")
+        self._db.execute("CREATE INDEX IF NOT EXISTS files_created "
+                         "ON files (created)")
+        self.total_bytes = self._db.execute(
+            "SELECT COALESCE(SUM(size), 0) FROM files").fetchone()[0]
+
+    def add(self, audio_path: Path, meta_path: Path, size: int,
+            created: float):
+        old = self._db.execute("SELECT size FROM files WHERE audio_path = ?",
+                               (str(audio_path),)).fetchone()
+        if old:
+            self.total_bytes -= old[0]
+        self._db.execute("INSERT OR REPLACE INTO files VALUES (?, ?, ?, ?)",
+                         (str(audio_path), str(meta_path), size, created))
+        self._db.commit()
+        self.total_bytes += size
+
+    def enforce(self, max_bytes: int = 0, max_age: float = 0) -> int:
+        """
+        Delete the oldest files until the limits are met
+        @param max_bytes: max total size of indexed files, 0 for no limit
+        @param max_age: max age of indexed files in seconds, 0 for no limit
+        @return: number of deleted files
+        """
+        expired = []
+        if max_age:
+            expired += self._db.execute(
+                "SELECT audio_path, meta_path, size FROM files "
+                "WHERE created < ? ORDER BY created",
+                (time.time() - max_age,)).fetchall()
+        total = self.total_bytes - sum(row[2] for row in expired)
+        if max_bytes and total > max_bytes:
+            for row in self._db.execute(
+                    "SELECT audio_path, meta_path, size FROM files "
+                    "ORDER BY created"):
+                if total <= max_bytes:
+                    break
+                if row not in expired:
+                    expired.append(row)
+                    total -= row[2]
+        for audio_path, meta_path, size in expired:
+            for path in (audio_path, meta_path):
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+                except OSError as e:
+                    LOG.warning(f"Failed to remove {path}: {e}")
+            self._db.execute("DELETE FROM files WHERE audio_path = ?",
+                             (audio_path,))
+            self.total_bytes -= size
+        if expired:
+            self._db.commit()
+            LOG.debug(f"Removed {len(expired)} saved audio files")
+        return len(expired)
+
+    def close(self):
+        self._db.close()
+
+
+class AudioWriter:
+    """
+    Write saved wake words, utterances and recordings from a background
+    thread, so saving audio adds no latency to the voice loop.
+
+    Jobs are written in batches of up to `batch_size`. When `queue_size` jobs
+    are pending new jobs are dropped and counted in `dropped`.
+
+    fsync policy:
+    * "never": leave flushing to the OS
+    * "batch": sync once after every batch
+    * "always": fsync every file before closing it
+
+    Audio is written as "wav" or losslessly compressed "flac". If
+    `max_bytes` or `max_age_days` are set, written files are tracked in an
+    index at `index_path` and the oldest ones are deleted after every batch.
+
+    With format "dataset" audio and metadata are appended to a sharded
+    dataset in `{directory}/dataset` instead, see `DatasetWriter`. Retention
+    then applies to sealed shards, which are deleted with their index.
+    """
+
+    def __init__(self, config: Optional[dict] = None,
+                 index_path: Optional[Path] = None):
+        writer_config = (config or {}).get("listener",
+                                           {}).get("audio_writer") or {}
+        self.queue_size = max(1, writer_config.get("queue_size", 32))
+        self.batch_size = max(1, writer_config.get("batch_size", 8))
+        self.fsync = writer_config.get("fsync", "never")
+        if self.fsync not in ("never", "batch", "always"):
+            LOG.warning(f"Invalid audio_writer fsync policy: {self.fsync}")
+            self.fsync = "never"
+        self.audio_format = writer_config.get("format", "wav")
+        if self.audio_format == "flac":
+            try:
+                from speech_recognition import get_flac_converter
+                get_flac_converter()
+            except OSError as e:
+                LOG.warning(f"FLAC not available, saving WAV: {e}")
+                self.audio_format = "wav"
+        elif self.audio_format not in ("wav", "dataset"):
+            LOG.warning(f"Invalid audio_writer format: {self.audio_format}")
+            self.audio_format = "wav"
+        self.max_bytes = writer_config.get("max_bytes", 0)
+        self.max_age = writer_config.get("max_age_days", 0) * 86400
+        self.index_path = index_path
+        self._index: Optional[RetentionIndex] = None
+        self.shard_size = writer_config.get("shard_size_mb", 64) * 1024 * 1024
+        self._datasets: Dict[Path, "DatasetWriter"] = {}
+        self.written = 0
+        self.bytes_written = 0
+        self.dropped = 0
+        self._queue: Queue = Queue(maxsize=self.queue_size)
+        self._thread: Optional[Thread] = None
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    @property
+    def metrics(self) -> dict:
+        return {"pending": self._queue.qsize(),
+                "written": self.written,
+                "bytes": self.bytes_written,
+                "dropped": self.dropped}
+
+    def start(self):
+        """
+        Start the writer thread
+        """
+        if self.running:
+            return
+        self._thread = Thread(target=self._run, daemon=True,
+                              name="audio_writer")
+        self._thread.start()
+
+    def submit(self, job: SaveJob) -> bool:
+        """
+        Queue a job to be written
+        @param job: audio and metadata to write
+        @return: False if the queue is full and the job was dropped
+        """
+        if not self.running:
+            self.start()
+        try:
+            self._queue.put_nowait(job)
+        except Full:
+            self.dropped += 1
+            LOG.warning(f"Audio writer queue full, dropped "
+                        f"{job.filename or job.directory} "
+                        f"({self.dropped} dropped)")
+            return False
+        return True
+
+    def flush(self):
+        """
+        Block until all queued jobs have been written
+        """
+        if self.running:
+            self._queue.join()
+
+    def _run(self):
+        while True:
+            batch = [self._queue.get()]
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except Empty:
+                    break
+            jobs = [job for job in batch if job is not None]
+            try:
+                self._write_batch(jobs)
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+            if len(jobs) != len(batch):
+                break
+        if self._index is not None:
+            self._index.close()
+            self._index = None
+        for dataset in self._datasets.values():
+            dataset.close()
+        self._datasets = {}
+
+    @property
+    def retention(self) -> bool:
+        return bool(self.index_path and (self.max_bytes or self.max_age))
+
+    def _write_batch(self, jobs: List[SaveJob]):
+        for job in jobs:
+            try:
+                job.resolve()
+            except Exception as e:
+                LOG.error(f"Failed to build file name in {job.directory}: {e}")
+                continue
+            try:
+                size = self._write(job)
+                self.written += 1
+                self.bytes_written += size
+                LOG.debug(f"Wrote {job.audio_path}")
+            except Exception as e:
+                LOG.error(f"Failed to write {job.audio_path}: {e}")
+                continue
+            if self.retention and job.audio_format != "dataset":
+                # dataset shards are indexed once sealed
+                self._get_index().add(job.audio_path, job.meta_path, size,
+                                      time.time())
+        if jobs and self.fsync == "batch" and hasattr(os, "sync"):
+            os.sync()
+        if jobs and self.retention:
+            try:
+                self._get_index().enforce(self.max_bytes, self.max_age)
+            except Exception as e:
+                LOG.error(f"Failed to enforce audio retention: {e}")
+
+    def _get_index(self) -> RetentionIndex:
+        if self._index is None:
+            self._index = RetentionIndex(self.index_path)
+        return self._index
+
+    def _write(self, job: SaveJob) -> int:
+        """
+        Write a job's audio and metadata files
+        @return: total bytes written
+        """
+        if job.audio_format == "dataset":
+            return self._append(job)
+        job.directory.mkdir(parents=True, exist_ok=True)
+        with open(job.audio_path, "wb") as audio_io:
+            if job.audio_format == "flac":
+                from speech_recognition import AudioData
+                audio = AudioData(job.audio, job.sample_rate,
+                                  job.sample_width)
+                audio_io.write(audio.get_flac_data())
+            else:
+                with wave.open(audio_io, "wb") as wav_file:
+                    wav_file.setframerate(job.sample_rate)
+                    wav_file.setsampwidth(job.sample_width)
+                    wav_file.setnchannels(job.sample_channels)
+                    wav_file.writeframes(job.audio)
+            self._sync(audio_io)
+            size = audio_io.tell()
+        with open(job.meta_path, "w") as f:
+            json.dump(job.meta, f)
+            self._sync(f)
+            size += f.tell()
+        return size
+
+    def _append(self, job: SaveJob) -> int:
+        dataset = self._datasets.get(job.directory)
+        if dataset is None:
+            from ovos_dinkum_listener.dataset import DatasetWriter
+            dataset = DatasetWriter(
+                job.directory / "dataset", shard_size=self.shard_size,
+                on_seal=self._index_shard if self.retention else None)
+            self._datasets[job.directory] = dataset
+        meta = dict(job.meta, filename=job.filename)
+        written = dataset.bytes_written
+        dataset.append(job.audio, meta, job.sample_rate, job.sample_width,
+                       job.sample_channels)
+        if self.fsync == "always":
+            dataset.sync()
+        return dataset.bytes_written - written
+
+    def _index_shard(self, shard: Path, idx: Path):
+        size = shard.stat().st_size + idx.stat().st_size
+        self._get_index().add(shard, idx, size, time.time())
+
+    def _sync(self, f):
+        if self.fsync == "always":
+            f.flush()
+            os.fsync(f.fileno())
+
+    def shutdown(self):
+        """
+        Write all queued jobs and stop the writer thread
+        """
+        if not self.running:
+            return
+        self._queue.put(None)
+        self._thread.join(timeout=10)
+        self._thread = None
+
+
+def export_wav(source: Path, destination: Path) -> int:
+    """
+    Convert saved FLAC audio back to WAV, keeping the directory layout
+    @param source: directory with saved audio
+    @param destination: directory to write WAV files to
+    @return: number of exported files
+    """
+    import speech_recognition as sr
+    exported = 0
+    for flac_path in sorted(source.rglob("*.flac")):
+        wav_path = destination / flac_path.relative_to(source)
+        wav_path = wav_path.with_suffix(".wav")
+        wav_path.parent.mkdir(parents=True, exist_ok=True)
+        with sr.AudioFile(str(flac_path)) as source_file:
+            audio = sr.Recognizer().record(source_file)
+        wav_path.write_bytes(audio.get_wav_data())
+        exported += 1
+    return exported
+
+
+def export_main():
+    """Export saved FLAC audio to WAV"""
+    import argparse
+
+    parser = argparse.ArgumentParser(
+        description="Export audio saved by ovos-dinkum-listener to WAV")
+    parser.add_argument("source", type=Path,
+                        help="directory with saved audio")
+    parser.add_argument("destination", type=Path,
+                        help="directory to write WAV files to")
+    args = parser.parse_args()
+    print(f"Exported {export_wav(args.source, args.destination)} files")
@@ -0,0 +1,254 @@
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""
+Append-only dataset of audio records, stored in rolling shard files.
+
+Every record is a fixed header followed by JSON metadata and raw PCM audio:
+
+    magic (4s) | meta_len (I) | audio_len (I) | sample_rate (I) |
+    sample_width (H) | sample_channels (H) | meta | audio
+
+Once a shard exceeds `shard_size` bytes it is sealed and an offset index
+(`shard-NNNNN.idx`, little endian uint64 offsets) is written next to it.
+Sealed shards are never modified again, retention deletes them whole.
+"""
+import json
+import mmap
+import os
+import struct
+from array import array
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, Iterator, List, Optional
+
+from ovos_utils.log import LOG
+
+MAGIC = b"ODR1"
+HEADER = struct.Struct("<4sIIIHH")
+
+
+@dataclass
+class DatasetRecord:
+    meta: dict
+    audio: memoryview
+    sample_rate: int
+    sample_width: int
+    sample_channels: int
+
+
+def _scan(buffer) -> List[int]:
+    """
+    Find the offsets of all complete records in a shard
+    @param buffer: shard contents
+    @return: list of record offsets
+    """
+    offsets = []
+    offset = 0
+    size = len(buffer)
+    while offset + HEADER.size <= size:
+        magic, meta_len, audio_len, _, _, _ = \
+            HEADER.unpack_from(buffer, offset)
+        end = offset + HEADER.size + meta_len + audio_len
+        if magic != MAGIC or end > size:
+            break
+        offsets.append(offset)
+        offset = end
+    return offsets
+
+
+def _shard_paths(path: Path) -> List[Path]:
+    return sorted(path.glob("shard-*.bin"))
+
+
+class DatasetWriter:
+    """
+    Append records to the newest shard in `path`, rotating shards once they
+    reach `shard_size` bytes. Every record is written with a single call.
+    """
+
+    def __init__(self, path: Path, shard_size: int = 64 * 1024 * 1024,
+                 on_seal: Optional[Callable[[Path, Path], None]] = None):
+        """
+        @param path: dataset directory
+        @param shard_size: bytes after which a shard is sealed
+        @param on_seal: called with the shard and index paths once a shard
+            is sealed
+        """
+        self.path = Path(path)
+        self.shard_size = shard_size
+        self.on_seal = on_seal
+        # header, metadata and audio bytes of all appended records
+        self.bytes_written = 0
+        self._file = None
+        self._shard: Optional[Path] = None
+        self._offsets = array("Q")
+        # shards may be deleted by retention, never reuse their names
+        self._next_shard = 0
+
+    def _open(self):
+        self.path.mkdir(parents=True, exist_ok=True)
+        shards = _shard_paths(self.path)
+        if shards and not shards[-1].with_suffix(".idx").exists():
+            # resume the last shard, dropping a partially written record
+            self._shard = shards[-1]
+            with open(self._shard, "rb") as f:
+                data = f.read()
+            self._offsets = array("Q", _scan(data))
+            end = self._end_of(data)
+            if end != len(data):
+                LOG.warning(f"Truncating incomplete record in {self._shard}")
+        else:
+            idx = int(shards[-1].stem.split("-")[1]) + 1 if shards else 0
+            idx = max(idx, self._next_shard)
+            self._shard = self.path / f"shard-{idx:05d}.bin"
+            self._offsets = array("Q")
+            end = 0
+        self._file = open(self._shard, "r+b" if end else "wb")
+        self._file.truncate(end)
+        self._file.seek(end)
+
+    def _end_of(self, data: bytes) -> int:
+        if not self._offsets:
+            return 0
+        _, meta_len, audio_len, _, _, _ = \
+            HEADER.unpack_from(data, self._offsets[-1])
+        return self._offsets[-1] + HEADER.size + meta_len + audio_len
+
+    def append(self, audio: bytes, meta: dict, sample_rate: int = 16000,
+               sample_width: int = 2, sample_channels: int = 1) -> str:
+        """
+        Append a record
+        @param audio: raw PCM audio
+        @param meta: JSON serializable metadata
+        @return: `{shard}#{offset}` identifying the record
+        """
+        if self._file is None:
+            self._open()
+        meta_bytes = json.dumps(meta).encode("utf-8")
+        offset = self._file.tell()
+        self._file.write(b"".join((
+            HEADER.pack(MAGIC, len(meta_bytes), len(audio), sample_rate,
+                        sample_width, sample_channels),
+            meta_bytes, audio)))
+        self._file.flush()
+        self._offsets.append(offset)
+        self.bytes_written += HEADER.size + len(meta_bytes) + len(audio)
+        record_id = f"{self._shard.name}#{offset}"
+        if self._file.tell() >= self.shard_size:
+            self._seal()
+        return record_id
+
+    def sync(self):
+        """
+        fsync the shard being written
+        """
+        if self._file is not None:
+            os.fsync(self._file.fileno())
+
+    def _seal(self):
+        self._file.close()
+        self._file = None
+        idx = self._shard.with_suffix(".idx")
+        with open(idx, "wb") as f:
+            self._offsets.tofile(f)
+        self.bytes_written += len(self._offsets) * self._offsets.itemsize
+        self._next_shard = int(self._shard.stem.split("-")[1]) + 1
+        LOG.debug(f"Sealed dataset shard {self._shard}")
+        if self.on_seal is not None:
+            self.on_seal(self._shard, idx)
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+class DatasetReader:
+    """
+    Read records from a dataset directory. Shards are memory mapped, so
+    record audio is a view into the shard and is not copied.
+
+    A shard is unmapped as soon as iteration moved past it and none of its
+    record audio is referenced anymore. Holding on to records keeps their
+    shard mapped, copy audio with `bytes()` to keep it without the shard.
+    """
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+
+    def shards(self) -> List[Path]:
+        return _shard_paths(self.path)
+
+    @staticmethod
+    def offsets(shard: Path, buffer=None) -> List[int]:
+        """
+        Get record offsets of a shard from its index, or by scanning it if
+        the shard is still being written
+        """
+        idx = shard.with_suffix(".idx")
+        if idx.exists():
+            offsets = array("Q")
+            offsets.frombytes(idx.read_bytes())
+            return offsets.tolist()
+        if buffer is None:
+            buffer = shard.read_bytes()
+        return _scan(buffer)
+
+    @staticmethod
+    def read_record(buffer, offset: int) -> DatasetRecord:
+        """
+        Decode the record at offset
+        @param buffer: shard contents, eg. an mmap
+        @param offset: record offset
+        @return: decoded record, audio is a view of buffer
+        """
+        magic, meta_len, audio_len, rate, width, channels = \
+            HEADER.unpack_from(buffer, offset)
+        if magic != MAGIC:
+            raise ValueError(f"No record at offset {offset}")
+        start = offset + HEADER.size
+        view = memoryview(buffer)
+        meta = json.loads(bytes(view[start:start + meta_len]))
+        audio = view[start + meta_len:start + meta_len + audio_len]
+        return DatasetRecord(meta, audio, rate, width, channels)
+
+    @staticmethod
+    def _unmap(buffer: mmap.mmap):
+        try:
+            buffer.close()
+        except BufferError:
+            # record audio is still referenced, the shard is unmapped once
+            # it is released
+            pass
+
+    def __iter__(self) -> Iterator[DatasetRecord]:
+        mapped: List[mmap.mmap] = []
+        try:
+            for shard in self.shards():
+                if os.path.getsize(shard) == 0:
+                    continue
+                with open(shard, "rb") as f:
+                    buffer = mmap.mmap(f.fileno(), 0,
+                                       access=mmap.ACCESS_READ)
+                mapped.append(buffer)
+                for offset in self.offsets(shard, buffer):
+                    yield self.read_record(buffer, offset)
+                    # asking for the next record means the caller is done
+                    # with the previous shards
+                    while len(mapped) > 1:
+                        self._unmap(mapped.pop(0))
+        finally:
+            for buffer in mapped:
+                self._unmap(buffer)
+
+    def __len__(self) -> int:
+        return sum(len(self.offsets(shard)) for shard in self.shards())
@@ -0,0 +1,154 @@
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+from collections import deque
+from threading import Condition, Thread
+from typing import Optional
+
+from ovos_bus_client.message import Message
+from ovos_utils.log import LOG
+
+PRIORITY_MESSAGES = frozenset({
+    "recognizer_loop:record_begin",
+    "recognizer_loop:record_end",
+    "recognizer_loop:wakeword",
+    "recognizer_loop:utterance",
+    "recognizer_loop:speech.recognition.unknown"
+})
+
+
+class BusEmitter:
+    """
+    Emit messages from a dedicated sender thread, so the voice loop never
+    waits on the messagebus connection.
+
+    Messages are sent in the order they were emitted. When `queue_size`
+    messages are pending the oldest message that is not in
+    `PRIORITY_MESSAGES` is dropped, so listening events and utterances are
+    still delivered when a slow connection recovers. If only priority
+    messages are pending, a new message that is not a priority message is
+    dropped instead.
+    """
+
+    def __init__(self, bus, queue_size: int = 64):
+        self.bus = bus
+        self.queue_size = max(1, queue_size)
+        self.sent = 0
+        self.dropped = 0
+        self._queue = deque()
+        self._cond = Condition()
+        self._sending = False
+        self._thread: Optional[Thread] = None
+        self._running = False
+        self._stopped = False
+
+    @property
+    def metrics(self) -> dict:
+        return {"pending": len(self._queue),
+                "sent": self.sent,
+                "dropped": self.dropped}
+
+    def start(self):
+        """
+        Start the sender thread
+        """
+        with self._cond:
+            if self._running:
+                return
+            self._running = True
+            self._stopped = False
+        self._thread = Thread(target=self._run, daemon=True,
+                              name="bus_emitter")
+        self._thread.start()
+
+    def emit(self, message: Message):
+        """
+        Queue a message to be sent
+        @param message: message to emit on the bus
+        """
+        if self._stopped:
+            LOG.warning(f"Bus emitter is shut down, not emitting "
+                        f"{message.msg_type}")
+            return
+        if not self._running:
+            self.start()
+        with self._cond:
+            if len(self._queue) >= self.queue_size and \
+                    not self._drop(message):
+                return
+            self._queue.append(message)
+            self._cond.notify_all()
+
+    def _drop(self, message: Message) -> bool:
+        """
+        Make room in a full queue
+        @param message: message being emitted
+        @return: False if `message` itself was dropped
+        """
+        queued = True
+        for idx, pending in enumerate(self._queue):
+            if pending.msg_type not in PRIORITY_MESSAGES:
+                dropped = pending
+                del self._queue[idx]
+                break
+        else:
+            if message.msg_type in PRIORITY_MESSAGES:
+                # only priority messages are pending, keep the queue bounded
+                dropped = self._queue.popleft()
+            else:
+                dropped = message
+                queued = False
+        self.dropped += 1
+        LOG.warning(f"Bus emitter queue full, dropped {dropped.msg_type} "
+                    f"({self.dropped} dropped)")
+        return queued
+
+    def _run(self):
+        while True:
+            with self._cond:
+                self._cond.wait_for(lambda: self._queue or not self._running)
+                if not self._queue:
+                    break
+                message = self._queue.popleft()
+                self._sending = True
+            try:
+                self.bus.emit(message)
+                self.sent += 1
+            except Exception as e:
+                LOG.error(f"Failed to emit {message.msg_type}: {e}")
+            with self._cond:
+                self._sending = False
+                self._cond.notify_all()
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """
+        Wait for all queued messages to be sent
+        @param timeout: max seconds to wait
+        @return: True if the queue was drained
+        """
+        with self._cond:
+            if not self._running:
+                return not self._queue
+            return self._cond.wait_for(
+                lambda: not self._queue and not self._sending, timeout)
+
+    def shutdown(self, timeout: float = 5):
+        """
+        Send queued messages and stop the sender thread
+        @param timeout: max seconds to wait for queued messages
+        """
+        with self._cond:
+            self._running = False
+            self._stopped = True
+            self._cond.notify_all()
+        if self._thread is not None:
+            self._thread.join(timeout=timeout)
+            self._thread = None
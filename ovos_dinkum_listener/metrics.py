@@ -0,0 +1,274 @@
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""
+Listener metrics in the Prometheus text exposition format.
+
+Metrics are plain counters, gauges and histograms updated in process, they
+are only rendered when scraped from the optional `MetricsExporter` HTTP
+endpoint.
+"""
+import math
+from threading import Lock, Thread
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+from ovos_utils.log import LOG
+
+# seconds
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0,
+                   10.0)
+# work done for every audio chunk
+CHUNK_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25)
+
+Sample = Tuple[str, Dict[str, str], float]
+
+
+def _format_labels(labels: Dict[str, str]) -> str:
+    if not labels:
+        return ""
+    escaped = (str(v).replace("\\", "\\\\").replace("\n", "\\n")
+               .replace('"', '\\"') for v in labels.values())
+    return "{" + ",".join(f'{k}="{v}"'
+                          for k, v in zip(labels, escaped)) + "}"
+
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    return repr(float(value))
+
+
+class Counter:
+    type = "counter"
+
+    def __init__(self, name: str, documentation: str,
+                 labelnames: Sequence[str] = (),
+                 fn: Optional[Callable[[], float]] = None):
+        """
+        @param name: metric name
+        @param documentation: help text
+        @param labelnames: names of the labels values are tracked by
+        @param fn: read the value when scraped instead of tracking it
+        """
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.fn = fn
+        self._values: Dict[tuple, float] = {}
+        self._lock = Lock()
+
+    def _key(self, labels: Dict[str, str]) -> tuple:
+        return tuple(str(labels.get(name, "")) for name in self.labelnames)
+
+    def inc(self, amount: float = 1.0, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels) -> float:
+        if self.fn is not None:
+            return self.fn()
+        return self._values.get(self._key(labels), 0.0)
+
+    def samples(self) -> List[Sample]:
+        if self.fn is not None:
+            return [("", {}, self.fn())]
+        with self._lock:
+            values = list(self._values.items())
+        if not values and not self.labelnames:
+            values = [((), 0.0)]
+        return [("", dict(zip(self.labelnames, key)), value)
+                for key, value in values]
+
+
+class Gauge(Counter):
+    type = "gauge"
+
+    def set(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+
+class Histogram(Counter):
+    type = "histogram"
+
+    def __init__(self, name: str, documentation: str,
+                 labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets)) + (math.inf,)
+        # label values -> (per bucket counts, sum)
+        self._observed: Dict[tuple, Tuple[List[int], float]] = {}
+
+    def inc(self, amount: float = 1.0, **labels):
+        raise TypeError("histograms are updated with `observe`")
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            counts, total = self._observed.get(key) or \
+                ([0] * len(self.buckets), 0.0)
+            for idx, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[idx] += 1
+                    break
+            self._observed[key] = (counts, total + value)
+
+    def count(self, **labels) -> int:
+        counts, _ = self._observed.get(self._key(labels)) or ([0], 0.0)
+        return sum(counts)
+
+    def samples(self) -> List[Sample]:
+        with self._lock:
+            observed = [(key, list(counts), total)
+                        for key, (counts, total) in self._observed.items()]
+        samples = []
+        for key, counts, total in observed:
+            labels = dict(zip(self.labelnames, key))
+            cumulative = 0
+            for bound, count in zip(self.buckets, counts):
+                cumulative += count
+                samples.append(("_bucket",
+                                dict(labels, le=_format_value(bound)),
+                                cumulative))
+            samples.append(("_sum", labels, total))
+            samples.append(("_count", labels, cumulative))
+        return samples
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._metrics: Dict[str, Counter] = {}
+
+    def register(self, metric: Counter) -> Counter:
+        if metric.name in self._metrics:
+            raise ValueError(f"Duplicate metric: {metric.name}")
+        self._metrics[metric.name] = metric
+        return metric
+
+    def render(self) -> str:
+        """
+        Render all metrics in the Prometheus text exposition format
+        """
+        lines = []
+        for metric in self._metrics.values():
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.type}")
+            for suffix, labels, value in metric.samples():
+                lines.append(f"{metric.name}{suffix}{_format_labels(labels)} "
+                             f"{_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+
+class ListenerMetrics(MetricsRegistry):
+    """
+    Metrics updated by the voice loop, hotword engines and the service
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.chunks = self.register(Counter(
+            "listener_chunks_total", "Audio chunks processed by the voice loop"))
+        self.chunk_duration = self.register(Gauge(
+            "listener_chunk_duration_seconds",
+            "Seconds of audio in a microphone chunk"))
+        self.realtime_factor = self.register(Gauge(
+            "listener_realtime_factor",
+            "Chunk processing time divided by audio time, the voice loop "
+            "falls behind above 1"))
+        self.chunk_processing = self.register(Histogram(
+            "listener_chunk_processing_seconds",
+            "Time spent processing a chunk, must stay below the chunk "
+            "duration", buckets=CHUNK_BUCKETS))
+        self.hotword = self.register(Histogram(
+            "listener_hotword_seconds", "Hotword engine time per chunk",
+            labelnames=("hotword",), buckets=CHUNK_BUCKETS))
+        self.vad = self.register(Histogram(
+            "listener_vad_seconds", "VAD time per chunk",
+            buckets=CHUNK_BUCKETS))
+        self.stt = self.register(Histogram(
+            "listener_stt_seconds", "Time to get a transcription",
+            labelnames=("engine", "role")))
+        self.utterances = self.register(Counter(
+            "listener_utterances_total", "Transcribed utterances emitted"))
+        self.empty_transcriptions = self.register(Counter(
+            "listener_empty_transcriptions_total",
+            "Recordings without a transcription"))
+        self.hallucinations = self.register(Counter(
+            "listener_hallucinations_filtered_total",
+            "Transcriptions dropped as known STT hallucinations"))
+        self.saved_bytes = self.register(Counter(
+            "listener_saved_bytes_total",
+            "Bytes of audio and metadata saved to disk"))
+
+    def observe_chunk(self, seconds: float, chunk_duration: float):
+        self.chunks.inc()
+        self.chunk_duration.set(chunk_duration)
+        self.chunk_processing.observe(seconds)
+
+
+class MetricsExporter:
+    """
+    Serve a metrics registry over HTTP from a background thread
+    """
+
+    def __init__(self, registry: MetricsRegistry, host: str = "127.0.0.1",
+                 port: int = 9464):
+        self.registry = registry
+        self.host = host
+        self.port = port
+        self._server = None
+        self._thread: Optional[Thread] = None
+
+    @property
+    def running(self) -> bool:
+        return self._server is not None
+
+    def start(self):
+        """
+        Start serving on `host`:`port`, port 0 picks a free port
+        """
+        from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+        registry = self.registry
+
+        class _Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split("?")[0] not in ("/", "/metrics"):
+                    self.send_error(404)
+                    return
+                body = registry.render().encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type",
+                                 "text/plain; version=0.0.4; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self._server = ThreadingHTTPServer((self.host, self.port), _Handler)
+        self._server.daemon_threads = True
+        self.port = self._server.server_address[1]
+        self._thread = Thread(target=self._server.serve_forever, daemon=True,
+                              name="metrics_exporter")
+        self._thread.start()
+        LOG.info(f"Serving metrics on http://{self.host}:{self.port}/metrics")
+
+    def shutdown(self):
+        if self._server is None:
+            return
+        self._server.shutdown()
+        self._server.server_close()
+        self._server = None
+        self._thread = None
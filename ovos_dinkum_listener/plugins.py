@@ -1,11 +1,15 @@
-from typing import Any, Dict, Optional, List, Tuple, Union
+from typing import TYPE_CHECKING, Any, Dict, Optional, List, Tuple, Union
 
 from ovos_config.config import Configuration
 from ovos_plugin_manager.stt import OVOSSTTFactory
 from ovos_plugin_manager.templates.stt import StreamingSTT, StreamThread
 from ovos_plugin_manager.utils import ReadWriteStream
 from ovos_utils.log import LOG
-from speech_recognition import AudioData
+
+from ovos_dinkum_listener.settings import get_settings
+
+if TYPE_CHECKING:
+    from speech_recognition import AudioData
 
 
 class FakeStreamThread(StreamThread):
@@ -24,6 +28,7 @@ class FakeStreamThread(StreamThread):
             return ""
 
         try:
+            from speech_recognition import AudioData
             # plugins expect AudioData objects
             audio = AudioData(self.buffer.read(),
                               sample_rate=self.sample_rate,
@@ -50,16 +55,15 @@ class FakeStreamingSTT(StreamingSTT):
         self.engine = engine
 
     def create_streaming_thread(self):
-        listener = Configuration().get("listener", {})
-        sample_rate = listener.get("sample_rate", 16000)
-        sample_width = listener.get("sample_width", 2)
-        return FakeStreamThread(self.queue, self.lang, self.engine, sample_rate,
-                                sample_width)
+        settings = get_settings()
+        return FakeStreamThread(self.queue, self.lang, self.engine,
+                                settings.sample_rate, settings.sample_width)
 
-    def transcribe(self, audio: Optional[Union[bytes, AudioData]] = None,
+    def transcribe(self, audio: Optional[Union[bytes, "AudioData"]] = None,
                    lang: Optional[str] = None) -> List[Tuple[str, float]]:
         """transcribe audio data to a list of
         possible transcriptions and respective confidences"""
+        from speech_recognition import AudioData
         # plugins expect AudioData objects
         if audio is None:
             audiod = AudioData(self.stream.buffer.read(),
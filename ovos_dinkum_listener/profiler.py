@@ -0,0 +1,154 @@
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""
+Sampling profiler for a single thread.
+
+The stack of the profiled thread is read from a background thread every
+`interval` seconds, the profiled thread itself is never instrumented, so
+there is no overhead when no profile is running.
+"""
+import os
+import sys
+import time
+from collections import Counter
+from threading import Event, Thread
+from typing import Callable, Dict, Optional, Tuple
+
+from ovos_utils.log import LOG
+
+# (filename, first line, function name), as used by pstats
+FuncKey = Tuple[str, int, str]
+Stack = Tuple[FuncKey, ...]
+
+
+class ThreadProfiler:
+    def __init__(self, thread_id: int, interval: float = 0.005):
+        """
+        @param thread_id: `threading.get_ident()` of the thread to profile
+        @param interval: seconds between samples
+        """
+        self.thread_id = thread_id
+        self.interval = interval
+        # root first stacks -> number of samples
+        self.samples: Dict[Stack, int] = Counter()
+        self.duration = 0.0
+        self._stop = Event()
+        self._thread: Optional[Thread] = None
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    @property
+    def total_samples(self) -> int:
+        return sum(self.samples.values())
+
+    def start(self, duration: float,
+              on_done: Optional[Callable[["ThreadProfiler"], None]] = None):
+        """
+        Sample the thread in the background
+        @param duration: max seconds to sample for
+        @param on_done: called from the sampling thread once finished
+        """
+        self._stop.clear()
+        self._thread = Thread(target=self._run, args=(duration, on_done),
+                              daemon=True, name="thread_profiler")
+        self._thread.start()
+
+    def stop(self):
+        """
+        Stop sampling early, `on_done` is still called
+        """
+        self._stop.set()
+
+    def join(self, timeout: Optional[float] = None):
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def _sample(self) -> bool:
+        frame = sys._current_frames().get(self.thread_id)
+        if frame is None:
+            # the thread exited
+            return False
+        stack = []
+        while frame is not None:
+            code = frame.f_code
+            stack.append((code.co_filename, code.co_firstlineno,
+                          code.co_name))
+            frame = frame.f_back
+        self.samples[tuple(reversed(stack))] += 1
+        return True
+
+    def _run(self, duration: float, on_done):
+        start = time.monotonic()
+        end = start + duration
+        try:
+            while not self._stop.is_set() and time.monotonic() < end:
+                if not self._sample():
+                    break
+                self._stop.wait(self.interval)
+        finally:
+            self.duration = time.monotonic() - start
+        if on_done is not None:
+            try:
+                on_done(self)
+            except Exception as e:
+                LOG.exception(f"Profile callback failed: {e}")
+
+    @staticmethod
+    def _frame_name(func: FuncKey) -> str:
+        filename, line, name = func
+        return f"{name} ({os.path.basename(filename)}:{line})"
+
+    def write_folded(self, path: str):
+        """
+        Write collapsed stacks, one `frame;frame;frame count` line per stack,
+        as read by flamegraph.pl and speedscope
+        @param path: file to write
+        """
+        with open(path, "w") as f:
+            for stack, count in sorted(self.samples.items()):
+                f.write(";".join(self._frame_name(func).replace(";", ":")
+                                 for func in stack) + f" {count}\n")
+
+    def stats(self) -> Dict[FuncKey, tuple]:
+        """
+        Convert samples to the `pstats` format, sample counts are reported as
+        call counts and times are estimated as samples * interval
+        """
+        inclusive: Dict[FuncKey, int] = Counter()
+        own: Dict[FuncKey, int] = Counter()
+        callers: Dict[FuncKey, Dict[FuncKey, int]] = {}
+        for stack, count in self.samples.items():
+            own[stack[-1]] += count
+            for func in set(stack):
+                inclusive[func] += count
+            for caller, callee in set(zip(stack, stack[1:])):
+                edges = callers.setdefault(callee, Counter())
+                edges[caller] += count
+        stats = {}
+        for func, count in inclusive.items():
+            stats[func] = (count, count, own[func] * self.interval,
+                           count * self.interval,
+                           {caller: (n, n, 0.0, n * self.interval)
+                            for caller, n in callers.get(func, {}).items()})
+        return stats
+
+    def write_pstats(self, path: str):
+        """
+        Write samples in the `pstats` file format, readable with
+        `python -m pstats` and snakeviz
+        @param path: file to write
+        """
+        import marshal
+        with open(path, "wb") as f:
+            marshal.dump(self.stats(), f)
@@ -0,0 +1,86 @@
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+from typing import List, Optional, Sequence, Tuple
+
+from ovos_utils.log import LOG
+
+# work the voice loop can shed when it can not keep up with the microphone,
+# applied in the configured order
+DEGRADATIONS = (
+    "transformers",  # stop feeding audio chunks to audio transformers
+    "fallback_stt",  # do not stream to or call the fallback STT
+    "hotwords"       # only check listen words, skip other hotwords
+)
+
+
+class RealtimeMonitor:
+    """
+    Track the real-time factor of the voice loop, the time spent processing
+    audio chunks divided by the duration of that audio, over windows of
+    `window` seconds of audio.
+
+    Every window above `threshold` enables the next degradation, after
+    `recover_windows` consecutive windows below `recover_threshold` the last
+    enabled degradation is disabled again.
+    """
+
+    def __init__(self, degradations: Sequence[str] = DEGRADATIONS,
+                 window: float = 2.0, threshold: float = 1.0,
+                 recover_threshold: float = 0.8, recover_windows: int = 5):
+        for name in degradations:
+            if name not in DEGRADATIONS:
+                LOG.warning(f"Ignoring unknown degradation: {name}")
+        self.degradations = [name for name in degradations
+                             if name in DEGRADATIONS]
+        self.window = window
+        self.threshold = threshold
+        self.recover_threshold = recover_threshold
+        self.recover_windows = max(1, recover_windows)
+        self.realtime_factor = 0.0
+        self.active: List[str] = []
+        self._processing = 0.0
+        self._audio = 0.0
+        self._recovering = 0
+
+    def is_active(self, degradation: str) -> bool:
+        return degradation in self.active
+
+    def update(self, processing: float, audio: float) -> \
+            Optional[Tuple[str, bool]]:
+        """
+        Account for a processed chunk of audio
+        @param processing: seconds spent processing the chunk
+        @param audio: seconds of audio in the chunk
+        @return: (degradation, enabled) if a degradation changed
+        """
+        self._processing += processing
+        self._audio += audio
+        # tolerate rounding of summed chunk durations
+        if self._audio + 1e-6 < self.window:
+            return None
+        self.realtime_factor = self._processing / self._audio
+        self._processing = self._audio = 0.0
+
+        if self.realtime_factor > self.threshold:
+            self._recovering = 0
+            if len(self.active) < len(self.degradations):
+                degradation = self.degradations[len(self.active)]
+                self.active.append(degradation)
+                return degradation, True
+        elif self.realtime_factor < self.recover_threshold and self.active:
+            self._recovering += 1
+            if self._recovering >= self.recover_windows:
+                self._recovering = 0
+                return self.active.pop(), False
+        else:
+            self._recovering = 0
+        return None
@@ -0,0 +1,221 @@
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""
+Plan the minimal work needed to apply a configuration change.
+
+Every `listener` key is mapped to a `ReloadAction`, so changing a timing
+value updates the voice loop in place instead of recreating the microphone,
+VAD and hotword engines.
+"""
+from dataclasses import dataclass, field
+from enum import Enum
+from typing import Any, Dict, List, Set, Tuple
+
+from ovos_utils.log import LOG
+
+
+class ReloadAction(str, Enum):
+    # value is read from the configuration every time it is used
+    NONE = "none"
+    # voice loop field updated in place
+    UPDATE_LOOP = "update_loop"
+    # voice loop restarted with the same components (listening mode, buffers)
+    RESTART_LOOP = "restart_loop"
+    REBUILD_VAD = "rebuild_vad"
+    REOPEN_MIC = "reopen_mic"
+    # only the affected hotwords are reloaded
+    RELOAD_HOTWORD = "reload_hotword"
+    # metadata of loaded hotwords (listen sounds) updated in place
+    UPDATE_HOTWORDS = "update_hotwords"
+    RELOAD_STT = "reload_stt"
+    RELOAD_FALLBACK_STT = "reload_fallback_stt"
+    # only applied when the service starts
+    RESTART_SERVICE = "restart_service"
+
+
+# listener key -> (voice loop field, default)
+LOOP_FIELDS: Dict[str, Tuple[str, Any]] = {
+    "instant_listen": ("instant_listen", True),
+    "speech_begin": ("speech_seconds", 0.3),
+    "silence_end": ("silence_seconds", 0.7),
+    "recording_timeout": ("timeout_seconds", 10),
+    "recording_timeout_with_silence": ("timeout_seconds_with_silence", 5),
+    "recording_mode_max_silence_seconds":
+        ("recording_mode_max_silence_seconds", 30),
+    "utterance_chunks_to_rewind": ("num_stt_rewind_chunks", 2),
+    "wakeword_chunks_to_save": ("num_hotword_keep_chunks", 15),
+    "remove_silence": ("remove_silence", False),
+    "min_stt_confidence": ("min_stt_confidence", 0.6),
+    "max_transcripts": ("max_transcripts", 1),
+    "stream_fallback_stt": ("stream_fallback_stt", False),
+    "speculative_stt": ("speculative_stt", False)
+}
+
+LISTENER_ACTIONS: Dict[str, ReloadAction] = {
+    **{key: ReloadAction.UPDATE_LOOP for key in LOOP_FIELDS},
+    # audio buffers are sized when the loop starts
+    "utterance_chunks_to_rewind": ReloadAction.RESTART_LOOP,
+    "wakeword_chunks_to_save": ReloadAction.RESTART_LOOP,
+    # listening mode is set when the loop starts
+    "continuous_listen": ReloadAction.RESTART_LOOP,
+    "hybrid_listen": ReloadAction.RESTART_LOOP,
+    "VAD": ReloadAction.REBUILD_VAD,
+    "microphone": ReloadAction.REOPEN_MIC,
+    "wake_word": ReloadAction.RELOAD_HOTWORD,
+    "stand_up_word": ReloadAction.RELOAD_HOTWORD,
+    "warmup": ReloadAction.NONE,
+    "sample_rate": ReloadAction.NONE,
+    "sample_width": ReloadAction.NONE,
+    "save_path": ReloadAction.NONE,
+    "save_utterances": ReloadAction.NONE,
+    "record_wake_words": ReloadAction.NONE,
+    "utterance_filename": ReloadAction.NONE,
+    "fake_barge_in": ReloadAction.NONE,
+    "barge_in_volume": ReloadAction.NONE,
+    "mute_during_output": ReloadAction.NONE,
+    # used by other services
+    "listen_timeout": ReloadAction.NONE,
+    "wake_word_upload": ReloadAction.NONE,
+    "retry_mic_init": ReloadAction.NONE,
+    "phoneme_duration": ReloadAction.NONE,
+    "multiplier": ReloadAction.NONE,
+    "energy_ratio": ReloadAction.NONE,
+    "parallel_init": ReloadAction.RESTART_SERVICE,
+    "audio_transformers": ReloadAction.RESTART_SERVICE,
+    "audio_writer": ReloadAction.RESTART_SERVICE,
+    "audio_stream": ReloadAction.RESTART_SERVICE,
+    "b64_stt": ReloadAction.RESTART_SERVICE,
+    "emit_queue_size": ReloadAction.RESTART_SERVICE,
+    "telemetry_window": ReloadAction.RESTART_SERVICE,
+    "latency_window": ReloadAction.RESTART_SERVICE,
+    "trace_file": ReloadAction.RESTART_SERVICE,
+    "metrics_exporter": ReloadAction.RESTART_SERVICE,
+    "realtime_monitor": ReloadAction.RESTART_SERVICE
+}
+
+# top level sections -> action
+SECTION_ACTIONS: Dict[str, ReloadAction] = {
+    # legacy locations, the listener section takes precedence
+    "VAD": ReloadAction.REBUILD_VAD,
+    "microphone": ReloadAction.REOPEN_MIC,
+    # listen sounds of hotwords
+    "confirm_listening": ReloadAction.UPDATE_HOTWORDS,
+    "sounds": ReloadAction.UPDATE_HOTWORDS
+}
+
+
+@dataclass
+class ReloadPlan:
+    actions: Set[ReloadAction] = field(default_factory=set)
+    # voice loop field -> new value
+    loop_fields: Dict[str, Any] = field(default_factory=dict)
+    hotwords: Set[str] = field(default_factory=set)
+    # changed keys, eg. "listener.silence_end"
+    changed: List[str] = field(default_factory=list)
+
+    def __bool__(self) -> bool:
+        return bool(self.changed)
+
+    def requires(self, action: ReloadAction) -> bool:
+        return action in self.actions
+
+    def keys_for(self, action: ReloadAction) -> List[str]:
+        return [key for key in self.changed
+                if _action_of(key) == action]
+
+
+def loop_settings(listener_config: dict) -> Dict[str, Any]:
+    """
+    Get voice loop fields from the listener configuration
+    @param listener_config: `listener` section
+    @return: voice loop field -> value
+    """
+    return {name: listener_config.get(key, default)
+            for key, (name, default) in LOOP_FIELDS.items()}
+
+
+def _action_of(key: str) -> ReloadAction:
+    section, _, name = key.partition(".")
+    if section == "listener":
+        return LISTENER_ACTIONS.get(name, ReloadAction.NONE)
+    if section == "stt":
+        return ReloadAction.RELOAD_FALLBACK_STT \
+            if name == "fallback_module" else ReloadAction.RELOAD_STT
+    if section == "hotwords":
+        return ReloadAction.RELOAD_HOTWORD
+    return SECTION_ACTIONS.get(section, ReloadAction.NONE)
+
+
+def _changed_keys(old: dict, new: dict) -> List[str]:
+    old, new = old or {}, new or {}
+    return [key for key in list(old) + [k for k in new if k not in old]
+            if old.get(key) != new.get(key)]
+
+
+def _stt_config(config: dict, module_key: str) -> dict:
+    stt = config.get("stt") or {}
+    module = stt.get(module_key)
+    return {"lang": config.get("lang"), "module": module,
+            "config": stt.get(module)}
+
+
+def _hotword_name(listener: dict, key: str, default: str) -> str:
+    return (listener.get(key) or default).replace(" ", "_")
+
+
+def plan_reload(old: dict, new: dict) -> ReloadPlan:
+    """
+    Compare two configurations and plan the minimal reload
+    @param old: applied configuration
+    @param new: changed configuration
+    @return: actions needed to apply the new configuration
+    """
+    plan = ReloadPlan()
+
+    def _add(key: str):
+        action = _action_of(key)
+        plan.changed.append(key)
+        if action != ReloadAction.NONE:
+            plan.actions.add(action)
+
+    if _stt_config(old, "module") != _stt_config(new, "module"):
+        _add("stt.module")
+    if _stt_config(old, "fallback_module") != \
+            _stt_config(new, "fallback_module"):
+        _add("stt.fallback_module")
+
+    old_listener = old.get("listener") or {}
+    new_listener = new.get("listener") or {}
+    for key in _changed_keys(old_listener, new_listener):
+        _add(f"listener.{key}")
+        action = LISTENER_ACTIONS.get(key)
+        if action is None:
+            LOG.debug(f"No reload action for listener.{key}")
+        if key in LOOP_FIELDS:
+            name, default = LOOP_FIELDS[key]
+            plan.loop_fields[name] = new_listener.get(key, default)
+        if key == "wake_word":
+            # the old main wake word may be disabled, the new one enabled
+            plan.hotwords |= {_hotword_name(old_listener, key, "hey_mycroft"),
+                              _hotword_name(new_listener, key, "hey_mycroft")}
+        elif key == "stand_up_word":
+            plan.hotwords |= {_hotword_name(old_listener, key, "wake_up"),
+                              _hotword_name(new_listener, key, "wake_up")}
+
+    for key in _changed_keys(old.get("hotwords"), new.get("hotwords")):
+        _add(f"hotwords.{key}")
+        plan.hotwords.add(key.replace(" ", "_"))
+
+    for section in SECTION_ACTIONS:
+        if old.get(section) != new.get(section):
+            _add(section)
+    return plan
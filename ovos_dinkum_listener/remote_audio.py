@@ -0,0 +1,414 @@
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+import base64
+import binascii
+import math
+import time
+from dataclasses import dataclass, field
+from threading import Condition, Event, Lock, Thread
+from typing import Callable, Dict, List, Optional, Tuple
+
+from ovos_bus_client.message import Message
+from ovos_bus_client.session import SessionManager
+from ovos_plugin_manager.templates.microphone import Microphone
+from ovos_plugin_manager.templates.stt import StreamingSTT
+from ovos_plugin_manager.templates.vad import VADEngine
+from ovos_plugin_manager.vad import OVOSVADFactory
+from ovos_utils.log import LOG
+
+from ovos_dinkum_listener.plugins import load_stt_module
+from ovos_dinkum_listener.reload_plan import loop_settings
+from ovos_dinkum_listener.settings import get_settings
+from ovos_dinkum_listener.transformers import AudioTransformersService
+from ovos_dinkum_listener.voice_loop import DinkumVoiceLoop, ListeningMode, \
+    ListeningState
+
+
+@dataclass
+class BusMicrophone(Microphone):
+    """
+    Microphone fed with audio received over the messagebus.
+    Incoming audio of any size is re-chunked to `chunk_size` bytes.
+    """
+    timeout: float = 1.0
+    _buffer: bytearray = field(default_factory=bytearray)
+    _cond: Condition = field(default_factory=Condition)
+    _closed: bool = False
+    _padding_chunks: int = 0
+    on_drained: Optional[Callable[[], None]] = None
+
+    def start(self):
+        self._closed = False
+
+    def feed(self, data: bytes):
+        """
+        Append received audio
+        @param data: 16 bit mono PCM audio
+        """
+        with self._cond:
+            self._buffer += data
+            self._cond.notify()
+
+    def close(self, padding_seconds: float = 0.0):
+        """
+        Signal no more audio will be received. Once buffered audio has been
+        read, `padding_seconds` of silence are returned so VAD can detect the
+        end of speech, then `on_drained` is called.
+        @param padding_seconds: seconds of silence to append
+        """
+        with self._cond:
+            self._padding_chunks = math.ceil(padding_seconds /
+                                             self.seconds_per_chunk)
+            self._closed = True
+            self._cond.notify()
+
+    def read_chunk(self) -> Optional[bytes]:
+        with self._cond:
+            if len(self._buffer) < self.chunk_size and not self._closed:
+                self._cond.wait(self.timeout)
+            if len(self._buffer) >= self.chunk_size:
+                chunk = bytes(self._buffer[:self.chunk_size])
+                del self._buffer[:self.chunk_size]
+                return chunk
+            if not self._closed:
+                return None
+            if self._buffer:
+                chunk = bytes(self._buffer).ljust(self.chunk_size, b'\0')
+                self._buffer.clear()
+                return chunk
+            if self._padding_chunks > 0:
+                self._padding_chunks -= 1
+                return bytes(self.chunk_size)
+        if self.on_drained is not None:
+            self.on_drained()
+        return None
+
+    def stop(self):
+        self.close()
+
+
+class _NullHotwords:
+    """
+    Hotword container stand-in for remote sessions, which are already
+    listening for a command when they start
+    """
+    state = None
+    reload_on_failure = False
+
+    def update(self, chunk: bytes):
+        pass
+
+    def found(self) -> Optional[str]:
+        return None
+
+    def reset(self):
+        pass
+
+
+@dataclass
+class RemoteAudioSession:
+    session_id: str
+    message: Message
+    mic: BusMicrophone
+    lang: str
+    loop: Optional[DinkumVoiceLoop] = None
+    thread: Optional[Thread] = None
+    generation: int = 0
+    last_activity: float = field(default_factory=time.time)
+    closed: bool = False
+    finished: Event = field(default_factory=Event)
+
+
+class RemoteAudioStreams:
+    """
+    Handle audio streamed over the messagebus by remote clients.
+
+    Each stream is keyed by session_id and runs its own DinkumVoiceLoop,
+    so remote audio gets VAD endpointing and streaming STT like the local
+    microphone. STT and VAD instances are reused across streams.
+
+    Input messages:
+    * recognizer_loop:audio_stream.start
+      * Begin a stream, replies with `accepted` or `error`
+    * recognizer_loop:audio_stream.chunk
+      * base64 encoded 16kHz 16 bit mono PCM audio in `audio`
+    * recognizer_loop:audio_stream.end
+      * No more audio for this stream
+
+    Output messages (forwarded from the start message):
+    * recognizer_loop:record_end
+      * End of speech was detected, client can stop streaming
+    * recognizer_loop:utterance
+    * recognizer_loop:speech.recognition.unknown
+    """
+
+    def __init__(self, bus, config: Optional[dict] = None,
+                 stt_loader: Callable[[], StreamingSTT] = load_stt_module,
+                 vad_loader: Callable[[], VADEngine] = OVOSVADFactory.create,
+                 transcript_filter: Optional[Callable] = None):
+        self.bus = bus
+        self.config = config or {}
+        stream_config = self.config.get("listener",
+                                        {}).get("audio_stream") or {}
+        self.max_sessions = stream_config.get("max_sessions", 2)
+        self.idle_timeout = stream_config.get("idle_timeout", 10)
+        self.chunk_size = stream_config.get("chunk_size", 4096)
+        self._stt_loader = stt_loader
+        self._vad_loader = vad_loader
+        self._transcript_filter = transcript_filter
+        self._transformers = AudioTransformersService(
+            self.bus, {"listener": {"audio_transformers": {}}})
+        self.sessions: Dict[str, RemoteAudioSession] = {}
+        self._idle_engines: List[Tuple[StreamingSTT, VADEngine]] = []
+        self._lock = Lock()
+        self._stopped = Event()
+        self._reaper: Optional[Thread] = None
+        self._generation = 0
+
+    def register_event_handlers(self):
+        self.bus.on("recognizer_loop:audio_stream.start",
+                    self._handle_stream_start)
+        self.bus.on("recognizer_loop:audio_stream.chunk",
+                    self._handle_stream_chunk)
+        self.bus.on("recognizer_loop:audio_stream.end",
+                    self._handle_stream_end)
+        if self._reaper is None:
+            self._reaper = Thread(target=self._reap_idle_sessions,
+                                  daemon=True)
+            self._reaper.start()
+
+    @staticmethod
+    def _get_session_id(message: Message) -> str:
+        return message.data.get("session_id") or \
+            SessionManager.get(message).session_id
+
+    @staticmethod
+    def _get_lang(message: Message) -> str:
+        return message.data.get("lang") or SessionManager.get(message).lang
+
+    def _get_engines(self) -> Tuple[StreamingSTT, VADEngine]:
+        with self._lock:
+            if self._idle_engines:
+                return self._idle_engines.pop()
+        return self._stt_loader(), self._vad_loader()
+
+    def _release_engines(self, stt: StreamingSTT, vad: VADEngine,
+                         generation: int):
+        if hasattr(vad, "reset"):
+            vad.reset()
+        with self._lock:
+            if not self._stopped.is_set() and \
+                    generation == self._generation and \
+                    len(self._idle_engines) < self.max_sessions:
+                self._idle_engines.append((stt, vad))
+                return
+        self._shutdown_engines(stt, vad)
+
+    @staticmethod
+    def _shutdown_engines(stt: StreamingSTT, vad: VADEngine):
+        try:
+            if hasattr(stt, "shutdown"):
+                stt.shutdown()
+            if hasattr(vad, "stop"):
+                vad.stop()
+        except Exception as e:
+            LOG.warning(e)
+
+    def _create_session(self, session_id: str,
+                        message: Message) -> RemoteAudioSession:
+        """
+        Create a session that buffers received audio until its voice loop
+        has been created by `_run_session`
+        """
+        session = RemoteAudioSession(session_id=session_id, message=message,
+                                     mic=BusMicrophone(
+                                         chunk_size=self.chunk_size),
+                                     lang=self._get_lang(message),
+                                     generation=self._generation)
+        session.thread = Thread(target=self._run_session, args=(session,),
+                                daemon=True)
+        return session
+
+    def _create_loop(self, session: RemoteAudioSession) -> DinkumVoiceLoop:
+        """
+        Load STT and VAD engines and create the voice loop for a session
+        """
+        listener = self.config.get("listener") or {}
+        stt, vad = self._get_engines()
+        # engines are owned by a single session until released
+        stt.lang = session.lang
+        mic = session.mic
+        loop = DinkumVoiceLoop(
+            mic=mic,
+            hotwords=_NullHotwords(),
+            stt=stt,
+            fallback_stt=None,
+            vad=vad,
+            transformers=self._transformers,
+            listen_mode=ListeningMode.CONTINUOUS,
+            **loop_settings(listener))
+        loop.text_callback = \
+            lambda utts, ctx: self._on_transcript(session, utts, ctx)
+        loop.record_end_callback = lambda: self.bus.emit(
+            session.message.forward("recognizer_loop:record_end"))
+        mic.on_drained = loop.stop
+        return loop
+
+    def _run_session(self, session: RemoteAudioSession):
+        loop = None
+        try:
+            loop = self._create_loop(session)
+            session.loop = loop
+            # skip streams aborted while engines were loading
+            loop._is_running = not session.finished.is_set()
+            loop.run()
+            if not session.finished.is_set() and \
+                    loop.state == ListeningState.IN_COMMAND:
+                # stream ended mid-speech, transcribe what we have
+                loop._after_cmd(bytes(session.mic.chunk_size))
+        except Exception:
+            LOG.exception(f"Audio stream failed: {session.session_id}")
+        if not session.finished.is_set():
+            self._on_transcript(session, [], {})
+        with self._lock:
+            if self.sessions.get(session.session_id) is session:
+                self.sessions.pop(session.session_id)
+        if loop is not None:
+            self._release_engines(loop.stt, loop.vad, session.generation)
+        LOG.debug(f"Audio stream finished: {session.session_id}")
+
+    def _on_transcript(self, session: RemoteAudioSession, utts: list,
+                       stt_context: dict):
+        if session.finished.is_set():
+            return
+        session.finished.set()
+        if session.loop is not None:
+            session.loop.stop()
+        if utts and self._transcript_filter is not None:
+            utts = self._transcript_filter(utts)
+        else:
+            utts = [u[0] for u in utts]
+        message = session.message
+        if utts:
+            lang = stt_context.get("stt_lang") or session.lang
+            self.bus.emit(message.forward("recognizer_loop:utterance",
+                                          {"utterances": utts,
+                                           "lang": lang}))
+        else:
+            self.bus.emit(message.forward(
+                "recognizer_loop:speech.recognition.unknown"))
+
+    def _handle_stream_start(self, message: Message):
+        session_id = self._get_session_id(message)
+        with self._lock:
+            old = self.sessions.get(session_id)
+            busy = old is None and len(self.sessions) >= self.max_sessions
+            if not busy:
+                # register before engines load so early chunks are buffered
+                session = self._create_session(session_id, message)
+                self.sessions[session_id] = session
+        if busy:
+            LOG.warning(f"Rejecting audio stream {session_id}, "
+                        f"{self.max_sessions} streams already open")
+            self.bus.emit(message.response({"accepted": False,
+                                            "session_id": session_id,
+                                            "error": "busy"}))
+            return
+        if old is not None:
+            LOG.warning(f"Restarting audio stream: {session_id}")
+            self._abort(old)
+        session.thread.start()
+        LOG.debug(f"Audio stream started: {session_id}")
+        self.bus.emit(message.response({"accepted": True,
+                                        "session_id": session_id}))
+
+    def _handle_stream_chunk(self, message: Message):
+        session = self.sessions.get(self._get_session_id(message))
+        if session is None:
+            return
+        try:
+            audio = base64.b64decode(message.data.get("audio"),
+                                     validate=True)
+        except (binascii.Error, TypeError, ValueError) as e:
+            LOG.warning(f"Ignoring malformed audio chunk for stream "
+                        f"{session.session_id}: {e}")
+            return
+        session.last_activity = time.time()
+        session.mic.feed(audio)
+
+    def _handle_stream_end(self, message: Message):
+        session = self.sessions.get(self._get_session_id(message))
+        if session is None:
+            return
+        session.last_activity = time.time()
+        session.closed = True
+        session.mic.close(get_settings().silence_end)
+
+    def _abort(self, session: RemoteAudioSession):
+        """
+        Drop a session without transcribing it
+        """
+        session.finished.set()
+        if session.loop is not None:
+            session.loop.stop()
+        session.mic.close()
+
+    def _reap_idle_sessions(self):
+        while not self._stopped.wait(1):
+            self._reap_idle_sessions_once()
+
+    def _reap_idle_sessions_once(self):
+        """
+        Abort streams that stopped sending audio without ending the stream
+        and report them as unknown speech
+        """
+        now = time.time()
+        with self._lock:
+            # closed streams are still being transcribed
+            idle = [s for s in self.sessions.values()
+                    if not s.closed and
+                    now - s.last_activity > self.idle_timeout]
+        for session in idle:
+            if session.finished.is_set():
+                continue
+            LOG.info(f"Reclaiming idle audio stream: {session.session_id}")
+            self._abort(session)
+            with self._lock:
+                if self.sessions.get(session.session_id) is session:
+                    self.sessions.pop(session.session_id)
+            self.bus.emit(session.message.forward(
+                "recognizer_loop:speech.recognition.unknown",
+                {"error": "timeout"}))
+
+    def reload(self):
+        """
+        Discard idle STT and VAD instances so new streams use the current
+        configuration
+        """
+        with self._lock:
+            self._generation += 1
+            engines, self._idle_engines = self._idle_engines, []
+        for stt, vad in engines:
+            self._shutdown_engines(stt, vad)
+
+    def shutdown(self):
+        """
+        Abort all streams and shutdown STT and VAD instances
+        """
+        self._stopped.set()
+        with self._lock:
+            sessions = list(self.sessions.values())
+        for session in sessions:
+            self._abort(session)
+            if session.thread is not None:
+                session.thread.join(timeout=5)
+        self.reload()
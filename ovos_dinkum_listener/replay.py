@@ -0,0 +1,379 @@
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""
+Replay WAV files through the voice loop faster than real time.
+
+`WavFileMicrophone` returns audio as fast as the loop reads it and advances a
+`VirtualClock`, so wake word timeouts follow audio time. `ReplayHarness`
+reports detections, transcripts and state transitions at their audio time,
+together with the CPU time of every pipeline stage and the real-time factor.
+"""
+import audioop
+import time
+import wave
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from ovos_plugin_manager.templates.microphone import Microphone
+from ovos_utils.log import LOG
+
+from ovos_dinkum_listener.tracing import LatencyTracer
+from ovos_dinkum_listener.voice_loop import DinkumVoiceLoop, ListeningMode
+
+# pipeline stage -> (voice loop component, timed methods)
+STAGES = {
+    "hotwords": ("hotwords", ("update",)),
+    "vad": ("vad", ("is_silence", "extract_speech")),
+    "stt": ("stt", ("stream_start", "stream_data", "transcribe")),
+    "fallback_stt": ("fallback_stt",
+                     ("stream_start", "stream_data", "transcribe")),
+    "transformers": ("transformers",
+                     ("feed_audio", "feed_hotword", "feed_speech",
+                      "transform"))
+}
+
+
+class VirtualClock:
+    """
+    Clock following the audio read from a `WavFileMicrophone`
+    """
+
+    def __init__(self, start: Optional[float] = None):
+        self.start = time.time() if start is None else start
+        self.elapsed = 0.0
+
+    def advance(self, seconds: float):
+        self.elapsed += seconds
+
+    def time(self) -> float:
+        return self.start + self.elapsed
+
+
+def read_wav(path: str, sample_rate: int = 16000,
+             sample_width: int = 2) -> bytes:
+    """
+    Read a WAV file as mono PCM audio in the requested format
+    @param path: WAV file to read
+    @param sample_rate: sample rate to convert to
+    @param sample_width: bytes per sample to convert to
+    @return: audio frames
+    """
+    with wave.open(path, "rb") as wav:
+        channels = wav.getnchannels()
+        width = wav.getsampwidth()
+        rate = wav.getframerate()
+        audio = wav.readframes(wav.getnframes())
+    if channels == 2:
+        audio = audioop.tomono(audio, width, 0.5, 0.5)
+    elif channels != 1:
+        raise ValueError(f"Unsupported number of channels in {path}: "
+                         f"{channels}")
+    if width != sample_width:
+        audio = audioop.lin2lin(audio, width, sample_width)
+    if rate != sample_rate:
+        audio, _ = audioop.ratecv(audio, sample_width, 1, rate, sample_rate,
+                                  None)
+    return audio
+
+
+@dataclass
+class WavFileMicrophone(Microphone):
+    """
+    Microphone reading WAV files one after another, chunks are returned as
+    fast as they are read. `padding_seconds` of silence follow every file so
+    VAD can detect the end of speech.
+    """
+    files: List[str] = field(default_factory=list)
+    padding_seconds: float = 1.0
+    clock: Optional[VirtualClock] = None
+    on_drained: Optional[Callable[[], None]] = None
+    # (file, audio second the file starts at)
+    offsets: List[Tuple[str, float]] = field(default_factory=list)
+    _audio: bytes = b''
+    _position: int = 0
+
+    @property
+    def audio_seconds(self) -> float:
+        return len(self._audio) / (self.sample_rate * self.sample_width)
+
+    def start(self):
+        padding = bytes(int(self.padding_seconds * self.sample_rate) *
+                        self.sample_width)
+        audio = bytearray()
+        self.offsets = []
+        for path in self.files:
+            self.offsets.append((path, len(audio) / (self.sample_rate *
+                                                     self.sample_width)))
+            audio += read_wav(path, self.sample_rate, self.sample_width)
+            audio += padding
+        # whole chunks, the last one is padded with silence
+        remainder = len(audio) % self.chunk_size
+        if remainder:
+            audio += bytes(self.chunk_size - remainder)
+        self._audio = bytes(audio)
+        self._position = 0
+
+    def file_at(self, seconds: float) -> Optional[str]:
+        """
+        Get the file being read at an audio time
+        """
+        current = None
+        for path, start in self.offsets:
+            if start > seconds:
+                break
+            current = path
+        return current
+
+    def read_chunk(self) -> Optional[bytes]:
+        if self._position >= len(self._audio):
+            if self.on_drained is not None:
+                self.on_drained()
+            return None
+        chunk = self._audio[self._position:self._position + self.chunk_size]
+        self._position += self.chunk_size
+        if self.clock is not None:
+            self.clock.advance(self.seconds_per_chunk)
+        return chunk
+
+    def stop(self):
+        self._position = len(self._audio)
+
+
+@dataclass
+class ReplayReport:
+    # seconds of audio replayed
+    audio_seconds: float = 0.0
+    wall_seconds: float = 0.0
+    # process CPU time, includes plugin threads
+    cpu_seconds: float = 0.0
+    # voice loop thread CPU time per stage, "loop" is the remainder
+    stage_cpu_seconds: Dict[str, float] = field(default_factory=dict)
+    # {"time", "file", "type", "key_phrase"}
+    detections: List[dict] = field(default_factory=list)
+    # {"time", "file", "utterances"}
+    transcripts: List[dict] = field(default_factory=list)
+    # {"time", "from", "to"}
+    transitions: List[dict] = field(default_factory=list)
+    # wall clock pipeline latency, see `LatencyTracer.summary`
+    latency: Dict[str, dict] = field(default_factory=dict)
+
+    @property
+    def realtime_factor(self) -> float:
+        """
+        Wall time divided by audio time, below 1 is faster than real time
+        """
+        if not self.audio_seconds:
+            return 0.0
+        return self.wall_seconds / self.audio_seconds
+
+    def as_dict(self) -> dict:
+        return {"audio_seconds": round(self.audio_seconds, 3),
+                "wall_seconds": round(self.wall_seconds, 3),
+                "cpu_seconds": round(self.cpu_seconds, 3),
+                "realtime_factor": round(self.realtime_factor, 4),
+                "stage_cpu_seconds": {k: round(v, 4) for k, v in
+                                      self.stage_cpu_seconds.items()},
+                "detections": self.detections,
+                "transcripts": self.transcripts,
+                "transitions": self.transitions,
+                "latency": self.latency}
+
+
+class ReplayHarness:
+    """
+    Drive a `DinkumVoiceLoop` over WAV files in the calling thread
+    """
+
+    def __init__(self, hotwords, stt, vad, transformers, fallback_stt=None,
+                 listen_mode: Optional[ListeningMode] = None,
+                 loop_settings: Optional[Dict[str, Any]] = None,
+                 sample_rate: int = 16000, sample_width: int = 2,
+                 chunk_size: int = 4096):
+        """
+        @param hotwords: loaded `HotwordContainer`
+        @param stt: streaming STT plugin
+        @param vad: VAD plugin
+        @param transformers: `AudioTransformersService`
+        @param fallback_stt: optional fallback STT plugin
+        @param listen_mode: listening mode, from configuration by default
+        @param loop_settings: voice loop fields, see `reload_plan.loop_settings`
+        """
+        self.hotwords = hotwords
+        self.stt = stt
+        self.vad = vad
+        self.transformers = transformers
+        self.fallback_stt = fallback_stt
+        self.listen_mode = listen_mode
+        self.loop_settings = loop_settings or {}
+        self.sample_rate = sample_rate
+        self.sample_width = sample_width
+        self.chunk_size = chunk_size
+
+    def run(self, files: List[str],
+            padding_seconds: float = 1.0) -> ReplayReport:
+        """
+        Replay audio files through a new voice loop
+        @param files: WAV files, replayed one after another
+        @param padding_seconds: silence appended to every file
+        @return: replay report
+        """
+        report = ReplayReport()
+        clock = VirtualClock()
+        mic = WavFileMicrophone(sample_rate=self.sample_rate,
+                                sample_width=self.sample_width,
+                                chunk_size=self.chunk_size, files=files,
+                                padding_seconds=padding_seconds, clock=clock)
+        mic.start()
+        report.audio_seconds = mic.audio_seconds
+        tracer = LatencyTracer(window=max(1, len(files) * 4))
+
+        def _event(**data) -> dict:
+            return dict(time=round(clock.elapsed, 3),
+                        file=mic.file_at(clock.elapsed), **data)
+
+        def _detection(kind: str) -> Callable[[bytes, dict], None]:
+            def _on_detection(audio: bytes, meta: dict):
+                report.detections.append(_event(
+                    type=kind, key_phrase=(meta or {}).get("key_phrase")))
+            return _on_detection
+
+        def _on_text(utts: List[Tuple[str, float]], context: dict):
+            report.transcripts.append(_event(
+                utterances=[list(u) for u in utts]))
+
+        loop = DinkumVoiceLoop(
+            mic=mic, hotwords=self.hotwords, stt=self.stt,
+            fallback_stt=self.fallback_stt, vad=self.vad,
+            transformers=self.transformers, tracer=tracer,
+            clock=clock.time,
+            listenword_audio_callback=_detection("listen"),
+            hotword_audio_callback=_detection("hotword"),
+            wakeupword_audio_callback=_detection("wakeup"),
+            stopword_audio_callback=_detection("stop"),
+            text_callback=_on_text,
+            **self.loop_settings)
+        state = [loop.state]
+
+        def _on_chunk(_):
+            if loop.state != state[0]:
+                report.transitions.append({"time": round(clock.elapsed, 3),
+                                           "from": state[0].value,
+                                           "to": loop.state.value})
+                state[0] = loop.state
+
+        loop.chunk_callback = _on_chunk
+        mic.on_drained = loop.stop
+
+        stage_cpu: Dict[str, float] = {}
+        restore = self._instrument(loop, stage_cpu)
+        try:
+            loop.start()
+            if self.listen_mode is not None:
+                loop.listen_mode = self.listen_mode
+            state[0] = loop.state
+            wall, cpu, thread_cpu = \
+                time.perf_counter(), time.process_time(), time.thread_time()
+            loop.run()
+            report.wall_seconds = time.perf_counter() - wall
+            report.cpu_seconds = time.process_time() - cpu
+            thread_cpu = time.thread_time() - thread_cpu
+        finally:
+            restore()
+        stage_cpu["loop"] = max(0.0, thread_cpu - sum(stage_cpu.values()))
+        report.stage_cpu_seconds = stage_cpu
+        report.latency = tracer.summary()
+        LOG.info(f"Replayed {report.audio_seconds:.1f}s of audio in "
+                 f"{report.wall_seconds:.2f}s "
+                 f"(rtf={report.realtime_factor:.3f})")
+        return report
+
+    @staticmethod
+    def _instrument(loop: DinkumVoiceLoop,
+                    totals: Dict[str, float]) -> Callable[[], None]:
+        """
+        Time methods of the loop components with `time.thread_time`
+        @return: function removing the instrumentation
+        """
+        patched = []
+
+        def _timed(stage: str, method: Callable) -> Callable:
+            def _wrapper(*args, **kwargs):
+                start = time.thread_time()
+                try:
+                    return method(*args, **kwargs)
+                finally:
+                    totals[stage] = totals.get(stage, 0.0) + \
+                        time.thread_time() - start
+            return _wrapper
+
+        for stage, (attr, methods) in STAGES.items():
+            component = getattr(loop, attr)
+            if component is None:
+                continue
+            for name in methods:
+                method = getattr(component, name, None)
+                if method is None or name in vars(component):
+                    continue
+                setattr(component, name, _timed(stage, method))
+                patched.append((component, name))
+
+        def _restore():
+            for component, name in patched:
+                delattr(component, name)
+        return _restore
+
+
+def replay_main():
+    """Replay WAV files through the voice loop and print a JSON report"""
+    import argparse
+    import json
+
+    from ovos_config import Configuration
+    from ovos_plugin_manager.vad import OVOSVADFactory
+    from ovos_utils.fakebus import FakeBus
+
+    from ovos_dinkum_listener.plugins import load_fallback_stt, \
+        load_stt_module
+    from ovos_dinkum_listener.reload_plan import loop_settings
+    from ovos_dinkum_listener.settings import update_settings
+    from ovos_dinkum_listener.transformers import AudioTransformersService
+    from ovos_dinkum_listener.voice_loop.hotwords import HotwordContainer
+
+    parser = argparse.ArgumentParser(
+        description="Replay WAV files through the ovos-dinkum-listener voice "
+                    "loop faster than real time")
+    parser.add_argument("files", nargs="+", help="WAV files to replay")
+    parser.add_argument("--mode", choices=[m.value for m in ListeningMode],
+                        help="listening mode, from configuration by default")
+    parser.add_argument("--padding", type=float, default=1.0,
+                        help="seconds of silence after every file")
+    parser.add_argument("--fallback", action="store_true",
+                        help="load the fallback STT plugin")
+    args = parser.parse_args()
+
+    config = Configuration()
+    update_settings(config)
+    listener = config.get("listener", {})
+    bus = FakeBus()
+    hotwords = HotwordContainer(bus)
+    hotwords.load_hotword_engines()
+    harness = ReplayHarness(
+        hotwords=hotwords, stt=load_stt_module(),
+        vad=OVOSVADFactory.create(),
+        transformers=AudioTransformersService(bus, config),
+        fallback_stt=load_fallback_stt() if args.fallback else None,
+        listen_mode=ListeningMode(args.mode) if args.mode else None,
+        loop_settings=loop_settings(listener),
+        sample_rate=listener.get("sample_rate", 16000),
+        sample_width=listener.get("sample_width", 2))
+    report = harness.run(args.files, padding_seconds=args.padding)
+    print(json.dumps(report.as_dict(), indent=2))
@@ -9,75 +9,154 @@
 # WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
 # See the License for the specific language governing permissions and
 # limitations under the License.
+import audioop
 import base64
-import json
+import io
 import random
-import subprocess
 import wave
+from array import array
+from copy import deepcopy
 from enum import Enum
-from hashlib import md5
 from os.path import dirname
 from pathlib import Path
-from shutil import which
-from tempfile import NamedTemporaryFile
+from concurrent.futures import ThreadPoolExecutor
 from threading import Thread, RLock, Event
-from typing import List, Tuple, Optional, Union
+from typing import TYPE_CHECKING, Any, Callable, Dict, List, Tuple, Optional, Union
 
-import speech_recognition as sr
 import time
 from ovos_bus_client import MessageBusClient
 from ovos_bus_client.message import Message
 from ovos_bus_client.session import SessionManager
 from ovos_config import Configuration
-from ovos_config.locations import get_xdg_data_save_path
 from ovos_plugin_manager.microphone import OVOSMicrophoneFactory
-from ovos_plugin_manager.stt import get_stt_lang_configs, get_stt_supported_langs, get_stt_module_configs
+from ovos_plugin_manager.templates.hotwords import HotWordEngine
 from ovos_plugin_manager.templates.microphone import Microphone
 from ovos_plugin_manager.templates.stt import STT, StreamingSTT
 from ovos_plugin_manager.templates.vad import VADEngine
-from ovos_plugin_manager.utils.tts_cache import hash_sentence
-from ovos_plugin_manager.vad import OVOSVADFactory, get_vad_configs
-from ovos_plugin_manager.wakewords import get_ww_lang_configs, get_ww_supported_langs, get_ww_module_configs
+from ovos_plugin_manager.vad import OVOSVADFactory
 from ovos_utils.fakebus import FakeBus
 from ovos_utils.log import LOG, log_deprecation
 from ovos_utils.process_utils import ProcessStatus, StatusCallbackMap, ProcessState
 
 import warnings
 from ovos_dinkum_listener._util import _TemplateFilenameFormatter
+from ovos_dinkum_listener.audio_writer import AudioWriter, SaveJob
+from ovos_dinkum_listener.emitter import BusEmitter
 from ovos_dinkum_listener.plugins import load_stt_module, load_fallback_stt, FakeStreamingSTT
+from ovos_dinkum_listener.reload_plan import ReloadAction, loop_settings, \
+    plan_reload
+from ovos_dinkum_listener.settings import ListenerSettings, get_settings, \
+    update_settings
 from ovos_dinkum_listener.transformers import AudioTransformersService
 from ovos_dinkum_listener.voice_loop import DinkumVoiceLoop, ListeningMode, ListeningState
 from ovos_dinkum_listener.voice_loop.hotwords import HotwordContainer
 
-
-try:
-    from ovos_utils.sound import get_sound_duration
-except ImportError:
-
-    def get_sound_duration(*args, **kwargs):
-        raise ImportError("please install ovos-utils>=0.1.0a25")
+if TYPE_CHECKING:
+    from speech_recognition import AudioData
+    from ovos_dinkum_listener.profiler import ThreadProfiler
 
 # Seconds between systemd watchdog updates
 WATCHDOG_DELAY = 0.5
 
+# Seconds a config reload waits for the voice loop to swap in new components
+SWAP_TIMEOUT = 5
 
-def bytes2audiodata(data):
-    recognizer = sr.Recognizer()
-    with NamedTemporaryFile() as fp:
-        fp.write(data)
-        ffmpeg = which("ffmpeg")
-        if ffmpeg:
-            p = fp.name + "converted.wav"
-            # ensure file format
-            cmd = [ffmpeg, "-i", fp.name, "-acodec", "pcm_s16le", "-ar",
-                   "16000", "-ac", "1", "-f", "wav", p, "-y"]
-            subprocess.call(cmd)
-        else:
-            LOG.warning("ffmpeg not found, please ensure audio is in a valid format")
-            p = fp.name
+# Max seconds the voice loop can be profiled for with a single request
+MAX_PROFILE_SECONDS = 300
 
-        with sr.AudioFile(p) as source:
+
+def wav2audiodata(data: bytes, sample_rate: int = 16000,
+                   sample_width: int = 2) -> Optional["AudioData"]:
+    """
+    Parse PCM WAV audio in memory, downmixing and resampling it as needed
+    @param data: bytes of a WAV file
+    @param sample_rate: output sample rate
+    @param sample_width: output sample width
+    @return: mono AudioData, or None if data is not PCM WAV
+    """
+    from speech_recognition import AudioData
+
+    try:
+        with wave.open(io.BytesIO(data), "rb") as wav:
+            channels = wav.getnchannels()
+            width = wav.getsampwidth()
+            rate = wav.getframerate()
+            frames = wav.readframes(wav.getnframes())
+    except (wave.Error, EOFError):
+        return None
+    if channels > 2:
+        return None
+    if width == 1:
+        # 8 bit WAV is unsigned, audioop expects signed samples
+        frames = audioop.bias(frames, 1, -128)
+    if channels == 2:
+        frames = audioop.tomono(frames, width, 0.5, 0.5)
+    if width != sample_width:
+        frames = audioop.lin2lin(frames, width, sample_width)
+    if rate != sample_rate:
+        frames, _ = audioop.ratecv(frames, sample_width, 1, rate,
+                                   sample_rate, None)
+    return AudioData(frames, sample_rate, sample_width)
+
+
+def _ffmpeg2audiodata(ffmpeg: str, data: bytes) -> "AudioData":
+    """
+    Decode audio with ffmpeg to 16kHz mono AudioData.
+    Input is piped to ffmpeg, containers that need a seekable input
+    (eg. mp4/m4a with the index at the end) are retried from a temp file
+    @param ffmpeg: path to the ffmpeg executable
+    @param data: bytes of an audio file
+    @return: decoded AudioData
+    """
+    import subprocess
+    from tempfile import NamedTemporaryFile
+
+    from speech_recognition import AudioData
+
+    output = ["-acodec", "pcm_s16le", "-ar", "16000", "-ac", "1",
+              "-f", "s16le", "pipe:1"]
+    p = subprocess.run([ffmpeg, "-i", "pipe:0"] + output, input=data,
+                       capture_output=True)
+    if p.returncode != 0 or not p.stdout:
+        LOG.debug("ffmpeg failed to decode piped audio, retrying from file")
+        with NamedTemporaryFile() as fp:
+            fp.write(data)
+            fp.flush()
+            p = subprocess.run([ffmpeg, "-i", fp.name] + output,
+                               capture_output=True)
+    if p.returncode != 0:
+        error = p.stderr.decode(errors="ignore").strip().splitlines()
+        raise ValueError(f"unsupported audio format: "
+                         f"{error[-1] if error else p.returncode}")
+    return AudioData(p.stdout, 16000, 2)
+
+
+def bytes2audiodata(data: bytes) -> "AudioData":
+    """
+    Decode an audio file to 16kHz mono AudioData.
+    PCM WAV is decoded in memory, other formats are piped through ffmpeg
+    @param data: bytes of an audio file
+    @return: decoded AudioData
+    @raises ValueError: if the audio format can not be decoded
+    """
+    audio = wav2audiodata(data)
+    if audio is not None:
+        return audio
+
+    from shutil import which
+
+    ffmpeg = which("ffmpeg")
+    if ffmpeg:
+        return _ffmpeg2audiodata(ffmpeg, data)
+
+    LOG.warning("ffmpeg not found, please ensure audio is in a valid format")
+    import speech_recognition as sr
+    recognizer = sr.Recognizer()
+    try:
+        with sr.AudioFile(io.BytesIO(data)) as source:
             audio = recognizer.record(source)
+    except ValueError as e:
+        raise ValueError(f"unsupported audio format: {e}") from e
     return audio
 
 
@@ -180,39 +259,101 @@ class OVOSDinkumVoiceService(Thread):
         self._watchdog = watchdog
         self._shutdown_event = Event()
         self._stopping = False
+        self._profiler: Optional["ThreadProfiler"] = None
+        self.warmup_times = {}
+        self.startup_times = {}
         self.status.set_alive()
         self.config = Configuration()
-        self._applied_config_hash = self._config_hash()
+        update_settings(self.config)
+        self._applied_config = self._config_snapshot()
         self._default_vol = 70  # for barge-in
 
         self._before_start()  # connect to bus
 
         # Initialize with default (bundled) plugin
-        microphone_config = self.config.get("listener",
-                                            {}).get("microphone", {})
-        microphone_config.setdefault('module', 'ovos-microphone-plugin-alsa')
-
-        self.mic = mic or OVOSMicrophoneFactory.create(microphone_config)
+        microphone_config = self._microphone_config()
 
-        self.hotwords = hotwords or HotwordContainer(self.bus)
-        self.vad = vad or OVOSVADFactory.create()
         if stt and not isinstance(stt, StreamingSTT):
             stt = FakeStreamingSTT(stt)
-        self.stt = stt or load_stt_module()
         self.disable_fallback = disable_fallback
         self.disable_reload = stt is not None
         self.disable_hotword_reload = hotwords is not None
-        if disable_fallback:
-            self.fallback_stt = None
-        else:
-            self.fallback_stt = fallback_stt or load_fallback_stt()
-        self.transformers = AudioTransformersService(self.bus, self.config)
+
+        # plugins do not depend on each other, load them concurrently
+        components = self._run_parallel({
+            "microphone": lambda: mic or OVOSMicrophoneFactory.create(
+                microphone_config),
+            "vad": lambda: vad or OVOSVADFactory.create(),
+            "stt": lambda: stt or load_stt_module(),
+            "fallback_stt": lambda: None if disable_fallback else
+            fallback_stt or load_fallback_stt(),
+            "transformers": lambda: AudioTransformersService(self.bus,
+                                                             self.config)
+        })
+        # optional features are imported when enabled to keep startup fast
+        from ovos_dinkum_listener.metrics import ListenerMetrics
+        from ovos_dinkum_listener.stt_pool import OfflineSTTPool
+        from ovos_dinkum_listener.telemetry import AudioTelemetry
+        from ovos_dinkum_listener.tracing import LatencyTracer
+
+        self.mic = components["microphone"]
+        self.hotwords = hotwords or HotwordContainer(self.bus)
+        self.metrics = ListenerMetrics()
+        self.hotwords.metrics = self.metrics
+        self.vad = components["vad"]
+        self.stt = components["stt"]
+        self.fallback_stt = components["fallback_stt"]
+        self.transformers = components["transformers"]
+        # messages emitted from the voice loop thread are sent in background
+        self.emitter = BusEmitter(
+            self.bus, self.config.get("listener", {}).get("emit_queue_size", 64))
+        # separate STT instances for base64 requests received over the bus
+        self.offline_stt = OfflineSTTPool(self.config)
+        self.audio_writer = AudioWriter(
+            self.config, index_path=Path(self.default_save_path) / "index.db")
+        self.metrics.saved_bytes.fn = lambda: self.audio_writer.bytes_written
+        exporter_config = self.config["listener"].get("metrics_exporter") or {}
+        self.metrics_exporter = None
+        if exporter_config.get("enabled"):
+            from ovos_dinkum_listener.metrics import MetricsExporter
+            self.metrics_exporter = MetricsExporter(
+                self.metrics, host=exporter_config.get("host", "127.0.0.1"),
+                port=exporter_config.get("port", 9464))
+        # audio streamed over the bus by remote clients
+        self.remote_audio = None
+        if (self.config["listener"].get("audio_stream") or {}).get("enabled",
+                                                                   True):
+            from ovos_dinkum_listener.remote_audio import RemoteAudioStreams
+            self.remote_audio = RemoteAudioStreams(
+                self.bus, self.config,
+                transcript_filter=self.__normtranscripts)
 
         self._load_lock = RLock()
         self._reload_event = Event()
         self._reload_event.set()
         listener = self.config["listener"]
+        # per-utterance pipeline timings
+        self.tracer = LatencyTracer(listener.get("latency_window", 100),
+                                    listener.get("trace_file"))
+        realtime_config = listener.get("realtime_monitor") or {}
+        self.realtime = None
+        if realtime_config.get("enabled", False):
+            from ovos_dinkum_listener.realtime import DEGRADATIONS, \
+                RealtimeMonitor
+            self.realtime = RealtimeMonitor(
+                realtime_config.get("degradations", DEGRADATIONS),
+                window=realtime_config.get("window", 2.0),
+                threshold=realtime_config.get("threshold", 1.0),
+                recover_threshold=realtime_config.get("recover_threshold",
+                                                      0.8),
+                recover_windows=realtime_config.get("recover_windows", 5))
+            self.metrics.realtime_factor.fn = \
+                lambda: self.realtime.realtime_factor
         self.voice_loop = self._init_voice_loop(listener)
+        # audio levels published while clients are subscribed
+        self.telemetry = AudioTelemetry(
+            self.emitter.emit, window=listener.get("telemetry_window", 0.1))
+        self.telemetry.bind(self.voice_loop)
 
     def _validate_message_context(self, message, native_sources=None):
         """ used to determine if a message should be processed or ignored
@@ -222,9 +363,7 @@ class OVOSDinkumVoiceService(Thread):
             return True
         destination = message.context.get("destination")
         if destination:
-            native_sources = native_sources or \
-                             Configuration()["Audio"].get("native_sources",
-                                                          ["debug_cli", "audio"]) or []
+            native_sources = native_sources or self.settings.native_sources
             if any(s in destination for s in native_sources):
                 # request from device
                 return True
@@ -233,38 +372,32 @@ class OVOSDinkumVoiceService(Thread):
         # broadcast for everyone
         return True
 
-    def _config_hash(self):
-        lang = self.config.get("lang")
-        stt_module = self.config.get("stt", {}).get("module")
-        fallback_module = self.config.get("stt", {}).get("fallback_module")
-        stt_config = {
-            "lang": lang,
-            "module": stt_module,
-            "config": self.config.get("stt", {}).get(stt_module)
-        }
-        stt_fallback = {
-            "lang": lang,
-            "module": fallback_module,
-            "config": self.config.get("stt", {}).get(fallback_module)
-        }
-        loop_config = {
-            "listener": self.config.get('listener'),
-            "vad": self.config.get("VAD"),
-            "mic": self.config.get("microphone")
-        }
-        hotword_config = {
-            "confirm": self.config.get('confirm_listening'),
-            "sounds": self.config.get("sounds"),
-            "listener": self.config.get('listener'),  # Defaults, save_hotwords
-            "hotwords": self.config.get('hotwords')
-        }
-        config_hashes = {
-            "loop": hash(json.dumps(loop_config)),
-            "hotwords": hash(json.dumps(hotword_config)),
-            "stt": hash(json.dumps(stt_config)),
-            "fallback": hash(json.dumps(stt_fallback)),
-        }
-        return config_hashes
+    def _config_snapshot(self) -> dict:
+        """
+        Copy the configuration sections that affect the voice loop, so
+        changes can be planned against the applied configuration
+        """
+        return deepcopy({section: self.config.get(section) for section in
+                         ("lang", "stt", "listener", "hotwords",
+                          "confirm_listening", "sounds", "VAD",
+                          "microphone")})
+
+    def _microphone_config(self) -> dict:
+        microphone_config = self.config.get("listener", {}).get(
+            "microphone") or self.config.get("microphone") or {}
+        microphone_config.setdefault('module', 'ovos-microphone-plugin-alsa')
+        return microphone_config
+
+    def _restart_voice_loop(self, timeout: float = 2):
+        """
+        Stop the voice loop and wait for `run` to return, so it is restarted
+        by the service with the current settings
+        """
+        self._reload_event.clear()
+        self.voice_loop.stop()
+        end = time.monotonic() + timeout
+        while self.voice_loop.looping and time.monotonic() < end:
+            time.sleep(0.01)
 
     def _init_voice_loop(self, listener_config: dict):
         """
@@ -280,15 +413,6 @@ class OVOSDinkumVoiceService(Thread):
                 fallback_stt=self.fallback_stt,
                 vad=self.vad,
                 transformers=self.transformers,
-                instant_listen=listener_config.get("instant_listen", True),
-                speech_seconds=listener_config.get("speech_begin", 0.3),
-                silence_seconds=listener_config.get("silence_end", 0.7),
-                timeout_seconds=listener_config.get("recording_timeout", 10),
-                timeout_seconds_with_silence=listener_config.get("recording_timeout_with_silence", 5),
-                recording_mode_max_silence_seconds=listener_config.get("recording_mode_max_silence_seconds", 30),
-                num_stt_rewind_chunks=listener_config.get("utterance_chunks_to_rewind", 2),
-                num_hotword_keep_chunks=listener_config.get("wakeword_chunks_to_save", 15),
-                remove_silence=listener_config.get("remove_silence", False),
                 wake_callback=self._record_begin,
                 text_callback=self._stt_text,
                 listenword_audio_callback=self._hotword_audio,
@@ -299,16 +423,23 @@ class OVOSDinkumVoiceService(Thread):
                 recording_audio_callback=self._recording_audio,
                 wakeup_callback=self._wakeup,
                 record_end_callback=self._record_end_signal,
-                min_stt_confidence=listener_config.get("min_stt_confidence", 0.6),
-                max_transcripts=listener_config.get("max_transcripts", 1)
+                tracer=self.tracer,
+                metrics=self.metrics,
+                realtime=self.realtime,
+                degradation_callback=self._degradation_changed,
+                **loop_settings(listener_config)
             )
         return loop
 
+    @property
+    def settings(self) -> ListenerSettings:
+        """ configuration snapshot, rebuilt on every configuration change """
+        return get_settings()
+
     @property
     def default_save_path(self):
         """ where recorded hotwords/utterances are saved """
-        listener = Configuration().get("listener", {})
-        return listener.get('save_path', f"{get_xdg_data_save_path()}/listener")
+        return self.settings.save_path
 
     @property
     def state(self):
@@ -335,7 +466,10 @@ class OVOSDinkumVoiceService(Thread):
         """
         try:
             self.status.set_alive()
+            self.bus.emit(Message("voice.initialize.started"))
+            start = time.monotonic()
             self._start()
+            self.startup_times["start"] = round(time.monotonic() - start, 3)
             self.status.set_started()
             self._after_start()
             LOG.debug("Service started")
@@ -346,7 +480,9 @@ class OVOSDinkumVoiceService(Thread):
 
         try:
             self.status.set_ready()
-            LOG.info("Service ready")
+            LOG.info(f"Service ready, startup timings: {self.startup_times}")
+            self.bus.emit(Message("voice.initialize.ended",
+                                  {"timings": self.startup_times}))
             while not self._stopping:
                 if not self._reload_event.wait(30):
                     raise TimeoutError("Timed out waiting for reload")
@@ -372,16 +508,115 @@ class OVOSDinkumVoiceService(Thread):
         LOG.info("Starting service...")
         self._connect_to_bus()
 
+    def _run_parallel(self, phases: Dict[str, Callable[[], Any]]) -> \
+            Dict[str, Any]:
+        """
+        Run independent startup phases concurrently and record their timing
+        in `startup_times`. Phases run one after another if
+        `listener.parallel_init` is disabled.
+        @param phases: dict of phase name to callable
+        @return: dict of phase name to returned value
+        @raises: the first exception raised by a phase, after all complete
+        """
+
+        def _timed(name, func):
+            start = time.monotonic()
+            try:
+                return func()
+            finally:
+                self.startup_times[name] = round(time.monotonic() - start, 3)
+
+        if not self.config.get("listener", {}).get("parallel_init", True):
+            return {name: _timed(name, func) for name, func in phases.items()}
+        with ThreadPoolExecutor(max_workers=len(phases),
+                                thread_name_prefix="voice_init") as pool:
+            futures = {name: pool.submit(_timed, name, func)
+                       for name, func in phases.items()}
+        return {name: future.result() for name, future in futures.items()}
+
     def _start(self):
         """
         Start microphone and listener loop
         @return:
         """
-        self.mic.start()
-        self.hotwords.load_hotword_engines()
+        self._run_parallel({"mic_start": self.mic.start,
+                            "hotwords": self.hotwords.load_hotword_engines})
+        if self.config.get("listener", {}).get("warmup", False):
+            start = time.monotonic()
+            self._warmup()
+            self.startup_times["warmup"] = round(time.monotonic() - start, 3)
         self.voice_loop.start()
+        self.offline_stt.start()
+        if self.metrics_exporter is not None:
+            try:
+                self.metrics_exporter.start()
+            except OSError as e:
+                LOG.error(f"Failed to start metrics exporter: {e}")
         self.register_event_handlers()
 
+    def _warmup(self, stt: bool = True, vad: bool = True,
+                hotwords: bool = True):
+        """
+        Run synthetic audio through the loaded plugins so models are loaded
+        and initialized before the first real utterance
+        @param stt: warm up the STT plugin
+        @param vad: warm up the VAD plugin
+        @param hotwords: warm up the hotword engines
+        """
+        # one second of low level noise, silence may be skipped by plugins
+        audio = array("h", (random.randint(-64, 64)
+                            for _ in range(16000))).tobytes()
+        chunk = audio[:4096]
+
+        def _timed(name, func):
+            start = time.monotonic()
+            try:
+                func()
+            except Exception as e:
+                LOG.warning(f"{name} warm-up failed: {e}")
+            self.warmup_times[name] = time.monotonic() - start
+            LOG.info(f"{name} warm-up took {self.warmup_times[name]:.3f}s")
+
+        if stt:
+            from speech_recognition import AudioData
+            from ovos_dinkum_listener.stt_pool import transcribe_audio
+            _timed("stt", lambda: transcribe_audio(
+                self.stt, AudioData(audio, 16000, 2), self.stt.lang))
+        if vad:
+            def _vad():
+                self.vad.is_silence(chunk)
+                if hasattr(self.vad, "reset"):
+                    self.vad.reset()
+
+            _timed("vad", _vad)
+        if hotwords:
+            for name, engine in zip(self.hotwords.ww_names,
+                                    self.hotwords.plugins):
+                self._warmup_hotword(name, engine, chunk)
+
+    def _warmup_hotword(self, name: str, engine: HotWordEngine,
+                        chunk: Optional[bytes] = None):
+        """
+        Run synthetic audio through a hotword engine
+        @param name: hotword name
+        @param engine: engine to warm up
+        @param chunk: audio to feed, low level noise by default
+        """
+        if chunk is None:
+            chunk = array("h", (random.randint(-64, 64)
+                                for _ in range(2048))).tobytes()
+        start = time.monotonic()
+        try:
+            engine.update(chunk)
+            engine.found_wake_word()
+            if hasattr(engine, "reset"):
+                engine.reset()
+        except Exception as e:
+            LOG.warning(f"hotword.{name} warm-up failed: {e}")
+        self.warmup_times[f"hotword.{name}"] = time.monotonic() - start
+        LOG.info(f"hotword.{name} warm-up took "
+                 f"{self.warmup_times[f'hotword.{name}']:.3f}s")
+
     def register_event_handlers(self):
         # Register events
         self.bus.on("mycroft.mic.mute", self._handle_mute)
@@ -401,6 +636,18 @@ class OVOSDinkumVoiceService(Thread):
         self.bus.on('recognizer_loop:record_stop', self._handle_stop_recording)
         self.bus.on('recognizer_loop:state.set', self._handle_change_state)
         self.bus.on('recognizer_loop:state.get', self._handle_get_state)
+        self.bus.on('recognizer_loop:transformers.metrics',
+                    self._handle_transformers_metrics)
+        self.bus.on('recognizer_loop:latency.summary',
+                    self._handle_latency_summary)
+        self.bus.on('recognizer_loop:realtime.get',
+                    self._handle_realtime_get)
+        self.bus.on('ovos.listener.profile.start', self._handle_profile_start)
+        self.bus.on('ovos.listener.profile.stop', self._handle_profile_stop)
+        self.bus.on('recognizer_loop:telemetry.subscribe',
+                    self._handle_telemetry_subscribe)
+        self.bus.on('recognizer_loop:telemetry.unsubscribe',
+                    self._handle_telemetry_unsubscribe)
         self.bus.on("intent.service.skills.activated", self._handle_extend_listening)
 
         self.bus.on("ovos.languages.stt", self._handle_get_languages_stt)
@@ -410,6 +657,9 @@ class OVOSDinkumVoiceService(Thread):
 
         self.bus.on("mycroft.audio.play_sound.response", self._handle_sound_played)
 
+        if self.remote_audio is not None:
+            self.remote_audio.register_event_handlers()
+
         # tracking volume for fake barge-in
         self.bus.on("volume.set.percent", self._handle_volume_change)
         self.bus.on("mycroft.volume.increase", self._handle_volume_change)
@@ -448,6 +698,17 @@ class OVOSDinkumVoiceService(Thread):
             if hasattr(self.fallback_stt, "shutdown"):
                 self.fallback_stt.shutdown()
 
+            self.offline_stt.shutdown()
+            if self.remote_audio is not None:
+                self.remote_audio.shutdown()
+            self.audio_writer.shutdown()
+            self.emitter.shutdown()
+            self.tracer.close()
+            if self._profiler is not None:
+                self._profiler.stop()
+            if self.metrics_exporter is not None:
+                self.metrics_exporter.shutdown()
+
             if not self.disable_hotword_reload:
                 self.hotwords.shutdown()
 
@@ -492,20 +753,24 @@ class OVOSDinkumVoiceService(Thread):
 
     # Fake Barge In
     def _query_volume(self):
-        """get the default volume"""
-        response = self.bus.wait_for_response(Message("mycroft.volume.get"))
-        if response:
-            self._default_vol = int(response.data["percent"] * 100)
+        """get the default volume, without waiting for the response"""
+        self.bus.once("mycroft.volume.get.response",
+                      self._handle_volume_response)
+        self.bus.emit(Message("mycroft.volume.get"))
+
+    def _handle_volume_response(self, message: Message):
+        if "percent" in message.data:
+            self._default_vol = int(message.data["percent"] * 100)
 
     @property
     def fake_barge_in(self) -> bool:
         """lower volume during recording"""
-        return Configuration().get("listener", {}).get("fake_barge_in", False)
+        return self.settings.fake_barge_in
 
     @property
     def fake_barge_in_volume(self) -> int:
         """volume to set when recording"""
-        return Configuration().get("listener", {}).get("barge_in_volume", 30)
+        return self.settings.barge_in_volume
 
     def _handle_volume_change(self, message: Message):
         """keep track of volume changes so we restore to the correct level"""
@@ -526,52 +791,68 @@ class OVOSDinkumVoiceService(Thread):
     # callbacks
     def _wakeup(self):
         """ callback when voice loop exits SLEEP mode"""
-        self.bus.emit(Message("mycroft.awoken"))
+        self.emitter.emit(Message("mycroft.awoken"))
 
     def _record_begin(self):
         LOG.debug("Record begin")
         if self.fake_barge_in:
             LOG.info(f"fake barge-in lowering volume to: {self.fake_barge_in_volume}")
-            self.bus.emit(
+            self.emitter.emit(
                 Message("mycroft.volume.set",
                         {"percent": self.fake_barge_in_volume / 100,  # alsa plugin expects between 0-1
                          "play_sound": False},
                         {"skill_id": "dinkum-listener"})
             )
-        self.bus.emit(Message("recognizer_loop:record_begin"))
+        self.emitter.emit(Message("recognizer_loop:record_begin"))
 
     def _save_ww(self, audio_bytes, ww_meta, save_path=None):
         if save_path:
             hotword_audio_dir = Path(save_path)
         else:
             hotword_audio_dir = Path(f"{self.default_save_path}/wake_words")
-            hotword_audio_dir.mkdir(parents=True, exist_ok=True)
 
         metafile = self._compile_ww_context(ww_meta["key_phrase"], ww_meta["module"])
         # TODO - do we need to keep this convention? i don't think so...
         #   move to the standard ww_id + timestamp from OPM
         filename = '_'.join(str(metafile[k]) for k in sorted(metafile))
 
+        return self._write_audio(hotword_audio_dir, filename, audio_bytes,
+                                 metafile)
+
+    def _write_audio(self, directory: Path, filename: Optional[str],
+                     audio_bytes: bytes, meta: dict,
+                     filename_fn: Optional[Callable[[dict], str]] = None
+                     ) -> Optional[str]:
+        """
+        Queue audio and metadata to be written in the background
+        @param directory: directory to write files to
+        @param filename: file name without extension, None to build it with
+            `filename_fn` on the writer thread
+        @param audio_bytes: audio captured by the microphone
+        @param meta: metadata to write next to the audio
+        @param filename_fn: build the file name from the metadata
+        @return: URI the audio file will be written to, None if the file name
+            is built by the writer
+        """
         mic = self.voice_loop.mic
-        wav_path = hotword_audio_dir / f"{filename}.wav"
-        meta_path = hotword_audio_dir / f"{filename}.json"
-        with open(wav_path, "wb") as wav_io, \
-                wave.open(wav_io, "wb") as wav_file:
-            wav_file.setframerate(mic.sample_rate)
-            wav_file.setsampwidth(mic.sample_width)
-            wav_file.setnchannels(mic.sample_channels)
-            wav_file.writeframes(audio_bytes)
-        with open(meta_path, "w") as f:
-            json.dump(metafile, f)
-
-        LOG.debug(f"Wrote {wav_path}")
-        return f"file://{wav_path.absolute()}"
+        # copied, callers keep adding keys to the context after queuing
+        job = SaveJob(directory=directory, filename=filename,
+                      audio=audio_bytes, meta=dict(meta),
+                      sample_rate=mic.sample_rate,
+                      sample_width=mic.sample_width,
+                      sample_channels=mic.sample_channels,
+                      audio_format=self.audio_writer.audio_format,
+                      filename_fn=filename_fn)
+        self.audio_writer.submit(job)
+        return job.uri if filename is not None else None
 
     @staticmethod
     def _compile_ww_context(key_phrase, ww_module):
         """ creates metadata in the format expected by selene
         while this format is mostly deprecated we want to
         ensure backwards compat and no missing keys"""
+        from hashlib import md5
+
         model_hash = '0'
         return {
             'name': key_phrase,
@@ -597,8 +878,7 @@ class OVOSDinkumVoiceService(Thread):
             context["lang"] = stt_lang
 
         try:
-            listener = self.config["listener"]
-            if listener["record_wake_words"]:
+            if self.settings.record_wake_words:
                 payload["filename"] = self._save_ww(audio_bytes, ww_context)
 
             utterance = ww_context.get("utterance")
@@ -607,9 +887,9 @@ class OVOSDinkumVoiceService(Thread):
                 # send the transcribed word on for processing
                 payload = {
                     'utterances': [utterance],
-                    "lang": stt_lang or Configuration().get("lang", "en-us")
+                    "lang": stt_lang or self.settings.lang
                 }
-                self.bus.emit(Message("recognizer_loop:utterance",
+                self.emitter.emit(Message("recognizer_loop:utterance",
                                       payload,
                                       context))
                 return payload
@@ -628,7 +908,7 @@ class OVOSDinkumVoiceService(Thread):
                 LOG.debug(f"Handling listen sound: {sound}")
                 audio_context = dict(context)
                 audio_context["destination"] = ["audio"]
-                self.bus.emit(Message("mycroft.audio.play_sound",
+                self.emitter.emit(Message("mycroft.audio.play_sound",
                                       {"uri": sound, "force_unmute": True},
                                       audio_context))
             if listen:
@@ -648,7 +928,7 @@ class OVOSDinkumVoiceService(Thread):
 
             LOG.debug(f"Emitting hotword event: {msg_type}")
             # emit ww event
-            self.bus.emit(Message(msg_type, payload, context))
+            self.emitter.emit(Message(msg_type, payload, context))
 
         except Exception:
             LOG.exception("Error while saving STT audio")
@@ -658,44 +938,48 @@ class OVOSDinkumVoiceService(Thread):
         LOG.debug("Record end")
         if self.fake_barge_in:
             LOG.info(f"fake barge-in restoring volume to: {self._default_vol}")
-            self.bus.emit(
+            self.emitter.emit(
                 Message("mycroft.volume.set",
                         {"percent": self._default_vol / 100,  # alsa plugin expects between 0-1
                          "play_sound": False},
                         {"skill_id": "dinkum-listener"})
             )
-        self.bus.emit(Message("recognizer_loop:record_end"))
+        self.emitter.emit(Message("recognizer_loop:record_end"))
+
+    def _degradation_changed(self, degradation: str, active: bool,
+                             realtime_factor: float):
+        """ callback when the voice loop sheds or restores work """
+        msg_type = "recognizer_loop:realtime.degraded" if active else \
+            "recognizer_loop:realtime.restored"
+        self.emitter.emit(Message(msg_type, {
+            "degradation": degradation,
+            "realtime_factor": realtime_factor,
+            "degraded": list(self.realtime.active)}))
 
     def __normtranscripts(self, transcripts: List[Tuple[str, float]]) -> List[str]:
         # unfortunately common enough when using whisper to deserve a setting
-        # mainly happens on silent audio, not as a mistranscription
-        default_hallucinations = [
-            "thanks for watching!",
-            'thank you for watching!',
-            "so",
-            "beep!"
-            # "Thank you"  # this one can also be valid!!
-        ]
-        hallucinations = self.config.get("hallucination_list", default_hallucinations) \
-            if self.config.get("filter_hallucinations", True) else []
+        hallucinations = self.settings.hallucinations
         utts = [u[0].lstrip(" \"'").strip(" \"'") for u in transcripts if u[0]]
         filtered_hutts = [u for u in utts if u and u.lower() not in hallucinations]
         hutts = [u for u in utts if u not in filtered_hutts]
         if hutts:
             LOG.debug(f"Filtered hallucinations: {hutts}")
+            self.metrics.hallucinations.inc(len(hutts))
         return filtered_hutts
 
     def _stt_text(self, transcripts: List[Tuple[str, float]], stt_context: dict):
         utts = self.__normtranscripts(transcripts) if transcripts else []
         LOG.debug(f"STT: {utts}")
         if utts:
-            lang = stt_context.get("lang") or Configuration().get("lang", "en-us")
+            lang = stt_context.get("lang") or self.settings.lang
             payload = {"utterances": utts, "lang": lang}
-            self.bus.emit(Message("recognizer_loop:utterance", payload, stt_context))
+            self.emitter.emit(Message("recognizer_loop:utterance", payload, stt_context))
+            self.metrics.utterances.inc()
         else:
+            self.metrics.empty_transcriptions.inc()
             if self.voice_loop.listen_mode != ListeningMode.CONTINUOUS:
                 LOG.error("Empty transcription, either recorded silence or STT failed!")
-                self.bus.emit(Message("recognizer_loop:speech.recognition.unknown", context=stt_context))
+                self.emitter.emit(Message("recognizer_loop:speech.recognition.unknown", context=stt_context))
             else:
                 LOG.debug("Ignoring empty transcription in continuous listening mode")
 
@@ -705,13 +989,22 @@ class OVOSDinkumVoiceService(Thread):
             stt_audio_dir = Path(save_path)
         else:
             stt_audio_dir = Path(f"{self.default_save_path}/utterances")
-        stt_audio_dir.mkdir(parents=True, exist_ok=True)
 
-        listener = self.config.get("listener", {})
+        # Documented in ovos_config/mycroft.conf, hashing the transcription
+        # is left to the writer thread
+        template = self.settings.utterance_filename
+        return self._write_audio(
+            stt_audio_dir, None, audio_bytes, stt_meta,
+            filename_fn=lambda meta: self._utterance_filename(template, meta))
 
-        # Documented in ovos_config/mycroft.conf
-        default_template = "{md5}-{uuid4}"
-        utterance_filename = listener.get("utterance_filename", default_template)
+    @staticmethod
+    def _utterance_filename(template: str, stt_meta: dict) -> str:
+        """
+        Build the file name of a saved utterance
+        @param template: `utterance_filename` template
+        @param stt_meta: context of the utterance
+        @return: file name without extension
+        """
         formatter = _TemplateFilenameFormatter()
 
         @formatter.register('md5')
@@ -725,30 +1018,17 @@ class OVOSDinkumVoiceService(Thread):
                 # handles legacy API
                 return stt_meta.get('transcription') or 'null'
 
+            from ovos_plugin_manager.utils.tts_cache import hash_sentence
             return hash_sentence(text)
 
-        filename = formatter.format(utterance_filename)
-
-        mic = self.voice_loop.mic
-        wav_path = stt_audio_dir / f"{filename}.wav"
-        meta_path = stt_audio_dir / f"{filename}.json"
-        with open(wav_path, "wb") as wav_io, \
-                wave.open(wav_io, "wb") as wav_file:
-            wav_file.setframerate(mic.sample_rate)
-            wav_file.setsampwidth(mic.sample_width)
-            wav_file.setnchannels(mic.sample_channels)
-            wav_file.writeframes(audio_bytes)
-        with open(meta_path, "w") as f:
-            json.dump(stt_meta, f)
-
-        LOG.debug(f"Wrote {wav_path}")
-        return f"file://{wav_path.absolute()}"
+        return formatter.format(template)
 
     def _stt_audio(self, audio_bytes: bytes, stt_context: dict):
         try:
-            listener = self.config["listener"]
-            if listener["save_utterances"]:
-                stt_context["filename"] = self._save_stt(audio_bytes, stt_context)
+            if self.settings.save_utterances:
+                filename = self._save_stt(audio_bytes, stt_context)
+                if filename:
+                    stt_context["filename"] = filename
         except Exception:
             LOG.exception("Error while saving STT audio")
         return stt_context
@@ -759,23 +1039,10 @@ class OVOSDinkumVoiceService(Thread):
             rec_audio_dir = Path(save_path)
         else:
             rec_audio_dir = Path(self.default_save_path) / "recordings"
-        rec_audio_dir.mkdir(parents=True, exist_ok=True)
 
         filename = stt_meta.get("recording_name", time.time())
-        mic = self.voice_loop.mic
-        wav_path = rec_audio_dir / f"{filename}.wav"
-        meta_path = rec_audio_dir / f"{filename}.json"
-        with open(wav_path, "wb") as wav_io, \
-                wave.open(wav_io, "wb") as wav_file:
-            wav_file.setframerate(mic.sample_rate)
-            wav_file.setsampwidth(mic.sample_width)
-            wav_file.setnchannels(mic.sample_channels)
-            wav_file.writeframes(audio_bytes)
-        with open(meta_path, "w") as f:
-            json.dump(stt_meta, f)
-
-        LOG.debug(f"Wrote {wav_path}")
-        return f"file://{wav_path.absolute()}"
+        return self._write_audio(rec_audio_dir, str(filename), audio_bytes,
+                                 stt_meta)
 
     def _recording_audio(self, audio_bytes: bytes, stt_context: dict):
         try:
@@ -804,15 +1071,15 @@ class OVOSDinkumVoiceService(Thread):
         self.voice_loop.reset_speech_timer()
         self.voice_loop.stt_audio_bytes = bytes()
         self.voice_loop.stt.stream_start()
-        if self.voice_loop.fallback_stt is not None:
-            self.voice_loop.fallback_stt.stream_start()
+        self.voice_loop.start_fallback_stream()
 
-        if self.config.get('confirm_listening'):
-            sound = self.config.get('sounds', {}).get('start_listening')
+        if self.settings.confirm_listening:
+            sound = self.settings.start_listening_sound
             if sound:
                 self.bus.emit(message.forward("mycroft.audio.play_sound", {"uri": sound}))
                 self.voice_loop.state = ListeningState.CONFIRMATION
                 try:
+                    from ovos_utils.sound import get_sound_duration
                     if sound.startswith("snd/"):
                         dur = get_sound_duration(sound, base_dir=f"{dirname(__file__)}/res")
                     else:
@@ -831,12 +1098,12 @@ class OVOSDinkumVoiceService(Thread):
 
     def _handle_audio_start(self, message: Message):
         """audio output started"""
-        if self.config.get("listener").get("mute_during_output"):
+        if self.settings.mute_during_output:
             self.voice_loop.is_muted = True
 
     def _handle_audio_end(self, message: Message):
         """audio output ended"""
-        if self.config.get("listener").get("mute_during_output"):
+        if self.settings.mute_during_output:
             self.voice_loop.is_muted = False  # restore
 
     def _handle_stop(self, message: Message):
@@ -882,10 +1149,98 @@ class OVOSDinkumVoiceService(Thread):
                 "state": self.voice_loop.state}
         self.bus.emit(message.reply("recognizer_loop:state", data))
 
+    def _handle_transformers_metrics(self, message: Message):
+        """Query audio transformer timings and quarantine status"""
+        self.bus.emit(message.response(
+            {"transformers": self.transformers.metrics}))
+
+    def _handle_latency_summary(self, message: Message):
+        """Query percentiles of the pipeline stage durations"""
+        self.bus.emit(message.response({"traced": self.tracer.traced,
+                                        "window": self.tracer.window,
+                                        "latency": self.tracer.summary()}))
+
+    def _handle_realtime_get(self, message: Message):
+        """Query the real-time factor and active degradations"""
+        if self.realtime is None:
+            data = {"enabled": False}
+        else:
+            data = {"enabled": True,
+                    "realtime_factor": round(self.realtime.realtime_factor, 3),
+                    "threshold": self.realtime.threshold,
+                    "degraded": list(self.realtime.active)}
+        self.bus.emit(message.response(data))
+
+    def _handle_profile_start(self, message: Message):
+        """
+        Sample the voice loop thread for `duration` seconds, then reply with
+        the paths of the collapsed stacks and pstats files
+        """
+        if self._profiler is not None and self._profiler.running:
+            self.bus.emit(message.response({"error": "busy"}))
+            return
+        thread_id = self.voice_loop.thread_id
+        if thread_id is None:
+            self.bus.emit(message.response({"error": "not running"}))
+            return
+        duration = min(float(message.data.get("duration", 10)),
+                       MAX_PROFILE_SECONDS)
+        interval = float(message.data.get("interval", 0.005))
+        LOG.info(f"Profiling the voice loop for {duration} seconds")
+        from ovos_dinkum_listener.profiler import ThreadProfiler
+        self._profiler = ThreadProfiler(thread_id, interval)
+        self._profiler.start(
+            duration, lambda profiler: self._save_profile(profiler, message))
+
+    def _handle_profile_stop(self, message: Message):
+        """End a running profile early, files are still saved"""
+        if self._profiler is not None:
+            self._profiler.stop()
+
+    def _save_profile(self, profiler: "ThreadProfiler", message: Message):
+        """
+        Write profiler output to the save path and reply to the request
+        @param profiler: finished profiler
+        @param message: `ovos.listener.profile.start` request
+        """
+        directory = Path(self.default_save_path) / "profiles"
+        name = f"voice_loop-{time.strftime('%Y%m%d-%H%M%S')}"
+        folded = directory / f"{name}.folded"
+        pstats = directory / f"{name}.pstats"
+        try:
+            directory.mkdir(parents=True, exist_ok=True)
+            profiler.write_folded(str(folded))
+            profiler.write_pstats(str(pstats))
+        except OSError as e:
+            LOG.error(f"Failed to save voice loop profile: {e}")
+            self.bus.emit(message.response({"error": str(e)}))
+            return
+        LOG.info(f"Saved voice loop profile to {folded}")
+        self.bus.emit(message.response({
+            "folded": str(folded),
+            "pstats": str(pstats),
+            "samples": profiler.total_samples,
+            "duration": round(profiler.duration, 3)}))
+
+    def _handle_telemetry_subscribe(self, message: Message):
+        """Start or renew a subscription to audio telemetry"""
+        subscriber = message.data.get("subscriber") or \
+            SessionManager.get(message).session_id
+        self.telemetry.subscribe(subscriber)
+        self.bus.emit(message.response({"subscriber": subscriber,
+                                        "ttl": self.telemetry.ttl,
+                                        "window": self.telemetry.window}))
+
+    def _handle_telemetry_unsubscribe(self, message: Message):
+        """End a subscription to audio telemetry"""
+        subscriber = message.data.get("subscriber") or \
+            SessionManager.get(message).session_id
+        self.telemetry.unsubscribe(subscriber)
+
     def _handle_stop_recording(self, message: Message):
         """Stop current recording session """
         self.voice_loop.stop_recording()
-        sound = self.config.get('sounds', {}).get('end_listening')
+        sound = self.settings.end_listening_sound
         if sound:
             self.bus.emit(message.forward("mycroft.audio.play_sound", {"uri": sound}))
 
@@ -918,15 +1273,25 @@ class OVOSDinkumVoiceService(Thread):
         b64audio = message.data["audio"]
         lang = message.data.get("lang", self.voice_loop.stt.lang)
 
-        wav_data = base64.b64decode(b64audio)
-
-        self.voice_loop.stt.stream_start()
-        audio = bytes2audiodata(wav_data)
-        utterances = self.voice_loop.stt.transcribe(audio, lang)
-        self.voice_loop.stt.stream_stop()
-
-        LOG.debug(f"transcripts: {utterances}")
-        self.bus.emit(message.response({"transcriptions": utterances, "lang": lang}))
+        def _transcribe(stt: STT):
+            from ovos_dinkum_listener.stt_pool import transcribe_audio
+            try:
+                audio = bytes2audiodata(base64.b64decode(b64audio))
+                utterances = transcribe_audio(stt, audio, lang)
+            except Exception as e:
+                LOG.exception("Base64 STT request failed")
+                self.bus.emit(message.response({"transcriptions": [],
+                                                "lang": lang,
+                                                "error": str(e)}))
+                return
+            LOG.debug(f"transcripts: {utterances}")
+            self.bus.emit(message.response({"transcriptions": utterances,
+                                            "lang": lang}))
+
+        if not self.offline_stt.submit(_transcribe):
+            self.bus.emit(message.response({"transcriptions": [],
+                                            "lang": lang,
+                                            "error": "busy"}))
 
     def _handle_b64_audio(self, message: Message):
         """ transcribe base64 encoded audio and inject result into bus"""
@@ -934,23 +1299,32 @@ class OVOSDinkumVoiceService(Thread):
         b64audio = message.data["audio"]
         lang = message.data.get("lang", self.voice_loop.stt.lang)
 
-        wav_data = base64.b64decode(b64audio)
-
-        audio = bytes2audiodata(wav_data)
+        def _transcribe(stt: STT):
+            from ovos_dinkum_listener.stt_pool import transcribe_audio
+            try:
+                audio = bytes2audiodata(base64.b64decode(b64audio))
+                utterances = transcribe_audio(stt, audio, lang)
+            except Exception as e:
+                LOG.exception("Base64 audio request failed")
+                self.bus.emit(message.response({"error": str(e)}))
+                self.bus.emit(message.forward(
+                    "recognizer_loop:speech.recognition.unknown"))
+                return
+            filtered = [u for u in utterances if u[1] >= self.voice_loop.min_stt_confidence]
+            if filtered != utterances:
+                LOG.info(f"Ignoring low confidence STT transcriptions: {[u for u in utterances if u not in filtered]}")
+
+            if filtered:
+                self.bus.emit(message.forward(
+                    "recognizer_loop:utterance",
+                    {"utterances": [u[0] for u in filtered],
+                     "lang": lang}))
+            else:
+                self.bus.emit(message.forward(
+                    "recognizer_loop:speech.recognition.unknown"))
 
-        utterances = self.voice_loop.stt.transcribe(audio, lang)
-        filtered = [u for u in utterances if u[1] >= self.voice_loop.min_stt_confidence]
-        if filtered != utterances:
-            LOG.info(f"Ignoring low confidence STT transcriptions: {[u for u in utterances if u not in filtered]}")
-
-        if filtered:
-            self.bus.emit(message.forward(
-                "recognizer_loop:utterance",
-                {"utterances": [u[0] for u in filtered],
-                 "lang": lang}))
-        else:
-            self.bus.emit(message.forward(
-                "recognizer_loop:speech.recognition.unknown"))
+        if not self.offline_stt.submit(_transcribe):
+            self.bus.emit(message.response({"error": "busy"}))
 
     # OPM bus api
     def _handle_get_languages_stt(self, message):
@@ -967,6 +1341,8 @@ class OVOSDinkumVoiceService(Thread):
     def get_stt_lang_options(lang, blacklist=None):
         blacklist = blacklist or []
         opts = []
+        from ovos_plugin_manager.stt import get_stt_lang_configs
+
         cfgs = get_stt_lang_configs(lang=lang, include_dialects=True)
         for engine, configs in cfgs.items():
             if engine in blacklist:
@@ -984,6 +1360,8 @@ class OVOSDinkumVoiceService(Thread):
     def get_ww_lang_options(lang, blacklist=None):
         blacklist = blacklist or []
         opts = []
+        from ovos_plugin_manager.wakewords import get_ww_lang_configs
+
         cfgs = get_ww_lang_configs(lang=lang, include_dialects=True)
         for engine, configs in cfgs.items():
             if engine in blacklist:
@@ -999,6 +1377,8 @@ class OVOSDinkumVoiceService(Thread):
 
     @staticmethod
     def get_vad_options(blacklist=None):
+        from ovos_plugin_manager.vad import get_vad_configs
+
         blacklist = blacklist or []
         tts_opts = []
         cfgs = get_vad_configs()
@@ -1014,6 +1394,9 @@ class OVOSDinkumVoiceService(Thread):
         return tts_opts
 
     def _handle_opm_stt_query(self, message):
+        from ovos_plugin_manager.stt import get_stt_supported_langs, \
+            get_stt_module_configs
+
         plugs = get_stt_supported_langs()
         configs = {}
         opts = {}
@@ -1031,6 +1414,9 @@ class OVOSDinkumVoiceService(Thread):
         self.bus.emit(message.response(data))
 
     def _handle_opm_ww_query(self, message):
+        from ovos_plugin_manager.wakewords import get_ww_supported_langs, \
+            get_ww_module_configs
+
         plugs = get_ww_supported_langs()
         configs = {}
         opts = {}
@@ -1048,6 +1434,8 @@ class OVOSDinkumVoiceService(Thread):
         self.bus.emit(message.response(data))
 
     def _handle_opm_vad_query(self, message):
+        from ovos_plugin_manager.vad import get_vad_configs
+
         cfgs = get_vad_configs()
         data = {
             "plugins": list(cfgs.keys()),
@@ -1056,12 +1444,102 @@ class OVOSDinkumVoiceService(Thread):
         }
         self.bus.emit(message.response(data))
 
+    def _swap_components(self, components: Dict[str, Any],
+                         replaced: Dict[str, Any]):
+        """
+        Swap new components into the voice loop and release the replaced
+        ones once the loop stopped using them
+        @param components: voice loop field name to new instance
+        @param replaced: voice loop field name to old instance
+        """
+        swap = self.voice_loop.swap_components(**components)
+        start = time.monotonic()
+        if swap.wait(SWAP_TIMEOUT):
+            LOG.debug(f"Components swapped after "
+                      f"{time.monotonic() - start:.3f}s")
+            self._release_components(replaced)
+            return
+
+        def _release():
+            swap.wait()
+            self._release_components(replaced)
+
+        LOG.info("Voice loop is busy, components will be swapped after the "
+                 "current utterance")
+        Thread(target=_release, daemon=True).start()
+
+    def _start_microphone(self) -> Microphone:
+        """
+        Create and start the configured microphone
+        @return: started microphone
+        """
+        mic = OVOSMicrophoneFactory.create(self._microphone_config())
+        try:
+            mic.start()
+        except Exception:
+            self._release_components({"mic": mic})
+            raise
+        return mic
+
+    def _reopen_microphone(self) -> Tuple[Microphone, bool]:
+        """
+        Open the configured microphone while the current one keeps
+        recording. Devices that can't be opened twice are opened after
+        stopping the current microphone, which is restarted if that fails.
+        @return: started microphone, True if the current one was stopped
+        """
+        try:
+            return self._start_microphone(), False
+        except Exception as e:
+            LOG.warning(f"Failed to open microphone while the current one "
+                        f"is in use, stopping it first: {e}")
+        self.mic.stop()
+        try:
+            return self._start_microphone(), True
+        except Exception:
+            self.mic.start()
+            raise
+
+    def _discard_components(self, loaded: Dict[str, Any],
+                            replaced: Dict[str, Any]):
+        """
+        Undo a reload that failed before its components were swapped in,
+        restoring the replaced components and releasing the loaded ones
+        @param loaded: voice loop field name to new instance
+        @param replaced: voice loop field name to old instance
+        """
+        for name, component in replaced.items():
+            setattr(self, name, component)
+        self._release_components(loaded)
+
+    @staticmethod
+    def _release_components(components: Dict[str, Any]):
+        """
+        Shut down voice loop components that were replaced
+        @param components: voice loop field name to old instance
+        """
+        for name, component in components.items():
+            try:
+                if name == "mic":
+                    component.stop()
+                elif name == "vad":
+                    if hasattr(component, "stop"):
+                        component.stop()
+                elif hasattr(component, "shutdown"):
+                    component.shutdown()
+            except Exception as e:
+                LOG.error(f"Failed to shut down old {name}: {e}")
+
     def reload_configuration(self):
         """
-        Reload configuration and restart loop. Automatically called when
-        Configuration object reports a change
+        Reload configuration, applying changes with the minimal action
+        planned by `plan_reload`. New STT, VAD and microphone instances are
+        loaded while the voice loop keeps listening and are swapped in between
+        utterances. Automatically called when Configuration object reports a
+        change
         """
-        if self._config_hash() == self._applied_config_hash:
+        update_settings(self.config)
+        if not plan_reload(self._applied_config, self._config_snapshot()):
             LOG.debug("No relevant configuration changed")
             return
         LOG.info("Reloading changed configuration")
@@ -1071,89 +1549,112 @@ class OVOSDinkumVoiceService(Thread):
             LOG.info("Shutting down, skipping config reload")
             self._load_lock.release()
             return
+        # new components are loaded while the voice loop keeps listening
+        # with the old ones, then swapped in between utterances
+        swap, replaced = {}, {}
+        swapped = False
         try:
             LOG.debug("Lock Acquired")
-            new_hash = self._config_hash()
+            snapshot = self._config_snapshot()
+            plan = plan_reload(self._applied_config, snapshot)
+            LOG.info(f"Changed configuration: {plan.changed}")
 
             # Configuration changed, update status and reload
             self.status.set_alive()
 
-            if not self.disable_reload and new_hash['stt'] != self._applied_config_hash['stt']:
+            reload_stt = not self.disable_reload and \
+                plan.requires(ReloadAction.RELOAD_STT)
+            reload_fallback = not self.disable_reload and \
+                not self.disable_fallback and \
+                plan.requires(ReloadAction.RELOAD_FALLBACK_STT)
+            reload_hotwords = not self.disable_hotword_reload and \
+                plan.requires(ReloadAction.RELOAD_HOTWORD)
+            warmup = self.config.get("listener", {}).get("warmup", False)
+
+            if reload_stt:
                 LOG.info("Reloading STT")
                 if self.stt:
                     LOG.debug(f"old={self.stt.__class__}: {self.stt.config}")
-                if hasattr(self.stt, "shutdown"):
-                    self.stt.shutdown()
-                del self.stt
+                replaced["stt"] = self.stt
                 self.stt = load_stt_module(self.config['stt'])
-                self.voice_loop.stt = self.stt
+                if warmup:
+                    # before the running loop can use it
+                    self._warmup(stt=True, vad=False, hotwords=False)
+                swap["stt"] = self.stt
+                self.offline_stt.reload()
+                if self.remote_audio is not None:
+                    self.remote_audio.reload()
                 if self.stt:
                     LOG.debug(f"new={self.stt.__class__}: {self.stt.config}")
 
-            if not self.disable_reload and not self.disable_fallback and new_hash['fallback'] != self._applied_config_hash['fallback']:
+            if reload_fallback:
                 LOG.info("Reloading Fallback STT")
                 if self.fallback_stt:
                     LOG.debug(f"old={self.fallback_stt.__class__}: "
                               f"{self.fallback_stt.config}")
-                if hasattr(self.fallback_stt, "shutdown"):
-                    self.fallback_stt.shutdown()
-                del self.fallback_stt
+                replaced["fallback_stt"] = self.fallback_stt
                 self.fallback_stt = load_fallback_stt(self.config['stt'])
-                self.voice_loop.fallback_stt = self.fallback_stt
+                swap["fallback_stt"] = self.fallback_stt
                 if self.fallback_stt:
                     LOG.debug(f"new={self.fallback_stt.__class__}: "
                               f"{self.fallback_stt.config}")
 
-            if not self.disable_hotword_reload and new_hash['hotwords'] != self._applied_config_hash['hotwords']:
-                LOG.info("Reloading Hotwords")
-                LOG.debug(f"old={self.hotwords.applied_hotwords_config}")
-                self._reload_event.clear()
-                self.voice_loop.stop()
-                self.hotwords.shutdown()
-                self.hotwords.load_hotword_engines()
-                LOG.debug(f"new={self.hotwords.applied_hotwords_config}")
+            if reload_hotwords:
+                LOG.info(f"Reloading Hotwords: {sorted(plan.hotwords)}")
+                for word in sorted(plan.hotwords):
+                    self.hotwords.reload_hotword(
+                        word, on_load=self._warmup_hotword if warmup else None)
 
-            if new_hash['loop'] != self._applied_config_hash['loop']:
-                LOG.info("Reloading Listener")
-                self._reload_event.clear()
-                self.voice_loop.stop()
+            if not self.disable_hotword_reload and \
+                    plan.requires(ReloadAction.UPDATE_HOTWORDS):
+                LOG.info("Updating hotword sounds")
+                self.hotwords.update_metadata()
 
-                if hasattr(self.vad, "stop"):
-                    self.vad.stop()
-                del self.vad
+            if plan.requires(ReloadAction.REBUILD_VAD):
+                LOG.info("Reloading VAD")
+                replaced["vad"] = self.vad
                 self.vad = OVOSVADFactory.create(self.config)
-
-                self.mic.stop()
-                del self.mic
-                microphone_config = self.config.get("microphone", {})
-                microphone_config.setdefault('module',
-                                             'ovos-microphone-plugin-alsa')
-                self.mic = OVOSMicrophoneFactory.create(microphone_config)
-                self.mic.start()
-
-                # Update voice_loop with new parameters
-                self.voice_loop.mic = self.mic
-                self.voice_loop.vad = self.vad
-                listener_config = self.config['listener']
-                self.voice_loop.speech_seconds = \
-                    listener_config.get("speech_begin", 0.3)
-                self.voice_loop.silence_seconds = \
-                    listener_config.get("silence_end", 0.7)
-                self.voice_loop.timeout_seconds = listener_config.get(
-                    "recording_timeout", 10)
-                self.voice_loop.num_stt_rewind_chunks = listener_config.get(
-                    "utterance_chunks_to_rewind", 2)
-                self.voice_loop.num_hotword_keep_chunks = listener_config.get(
-                    "wakeword_chunks_to_save", 15)
+                if warmup:
+                    self._warmup(stt=False, vad=True, hotwords=False)
+                swap["vad"] = self.vad
+                if self.remote_audio is not None:
+                    self.remote_audio.reload()
+
+            if plan.requires(ReloadAction.REOPEN_MIC):
+                LOG.info("Reopening Microphone")
+                mic, stopped = self._reopen_microphone()
+                if not stopped:
+                    replaced["mic"] = self.mic
+                self.mic = mic
+                swap["mic"] = mic
+
+            # timing and STT settings take effect on the next chunk
+            for name, value in plan.loop_fields.items():
+                setattr(self.voice_loop, name, value)
+            if swap:
+                self._swap_components(swap, replaced)
+            swapped = True
+            if plan.requires(ReloadAction.RESTART_LOOP):
+                LOG.info("Restarting voice loop")
+                self._restart_voice_loop()
             if not self.voice_loop.running:
                 self.voice_loop.start()
                 self._reload_event.set()
+            if plan.requires(ReloadAction.RESTART_SERVICE):
+                LOG.warning(f"Changes to "
+                            f"{plan.keys_for(ReloadAction.RESTART_SERVICE)} "
+                            f"take effect after a restart")
 
-            self._applied_config_hash = new_hash
+            self._applied_config = snapshot
             self.status.set_ready()
             LOG.info("Reload Completed")
         except Exception as e:
             LOG.exception(e)
+            if not swapped:
+                # the voice loop still uses the replaced components, the
+                # whole change is retried on the next configuration update
+                LOG.warning("Reload failed, keeping the current components")
+                self._discard_components(swap, replaced)
             self.status.set_error(e)
         finally:
             self._load_lock.release()
@@ -0,0 +1,120 @@
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+from dataclasses import dataclass
+from typing import Optional, Tuple
+
+from ovos_config import Configuration
+from ovos_config.locations import get_xdg_data_save_path
+
+# mainly happens on silent audio, not as a mistranscription
+DEFAULT_HALLUCINATIONS = (
+    "thanks for watching!",
+    'thank you for watching!',
+    "so",
+    "beep!"
+    # "Thank you"  # this one can also be valid!!
+)
+
+
+@dataclass(frozen=True)
+class ListenerSettings:
+    """
+    Immutable snapshot of the configuration values read for every utterance
+    or bus event. Built once per configuration change with `update_settings`,
+    so hot paths read attributes instead of merged configuration dicts.
+    """
+    lang: str = "en-us"
+    secondary_langs: Tuple[str, ...] = ()
+    native_sources: Tuple[str, ...] = ("debug_cli", "audio")
+    sample_rate: int = 16000
+    sample_width: int = 2
+    silence_end: float = 0.7
+    fake_barge_in: bool = False
+    barge_in_volume: int = 30
+    mute_during_output: bool = False
+    save_path: str = ""
+    record_wake_words: bool = False
+    save_utterances: bool = False
+    utterance_filename: str = "{md5}-{uuid4}"
+    confirm_listening: bool = False
+    start_listening_sound: Optional[str] = None
+    end_listening_sound: Optional[str] = None
+    hallucinations: Tuple[str, ...] = DEFAULT_HALLUCINATIONS
+
+    @property
+    def valid_langs(self) -> Tuple[str, ...]:
+        """
+        Primary language codes of the default and secondary languages
+        """
+        return tuple(lang.lower().split("-")[0]
+                     for lang in (self.lang,) + self.secondary_langs)
+
+    @classmethod
+    def from_config(cls, config: dict) -> "ListenerSettings":
+        """
+        Build settings from a configuration
+        @param config: full configuration, eg. `Configuration()`
+        @return: settings snapshot
+        """
+        listener = config.get("listener") or {}
+        sounds = config.get("sounds") or {}
+        native_sources = (config.get("Audio") or {}).get(
+            "native_sources", ["debug_cli", "audio"]) or []
+        if config.get("filter_hallucinations", True):
+            hallucinations = config.get("hallucination_list",
+                                        DEFAULT_HALLUCINATIONS)
+        else:
+            hallucinations = ()
+        return cls(
+            lang=config.get("lang") or "en-us",
+            secondary_langs=tuple(config.get("secondary_langs") or ()),
+            native_sources=tuple(native_sources),
+            sample_rate=listener.get("sample_rate", 16000),
+            sample_width=listener.get("sample_width", 2),
+            silence_end=listener.get("silence_end", 0.7),
+            fake_barge_in=listener.get("fake_barge_in", False),
+            barge_in_volume=listener.get("barge_in_volume", 30),
+            mute_during_output=bool(listener.get("mute_during_output")),
+            save_path=listener.get("save_path",
+                                   f"{get_xdg_data_save_path()}/listener"),
+            record_wake_words=bool(listener.get("record_wake_words")),
+            save_utterances=bool(listener.get("save_utterances")),
+            utterance_filename=listener.get("utterance_filename",
+                                            "{md5}-{uuid4}"),
+            confirm_listening=bool(config.get("confirm_listening")),
+            start_listening_sound=sounds.get("start_listening"),
+            end_listening_sound=sounds.get("end_listening"),
+            hallucinations=tuple(hallucinations)
+        )
+
+
+_settings: Optional[ListenerSettings] = None
+
+
+def get_settings() -> ListenerSettings:
+    """
+    Get the current settings snapshot, built from `Configuration()` on
+    first use
+    """
+    return _settings or update_settings()
+
+
+def update_settings(config: Optional[dict] = None) -> ListenerSettings:
+    """
+    Rebuild the settings snapshot after a configuration change
+    @param config: full configuration, `Configuration()` by default
+    @return: new settings snapshot
+    """
+    global _settings
+    _settings = ListenerSettings.from_config(
+        config if config is not None else Configuration())
+    return _settings
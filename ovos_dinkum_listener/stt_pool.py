@@ -0,0 +1,152 @@
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+from queue import Queue, Full
+from threading import Thread, Lock
+from typing import TYPE_CHECKING, Callable, List, Optional, Tuple
+
+from ovos_plugin_manager.templates.stt import STT, StreamingSTT
+from ovos_utils.log import LOG
+
+from ovos_dinkum_listener.plugins import FakeStreamingSTT, load_stt_module
+
+if TYPE_CHECKING:
+    from speech_recognition import AudioData
+
+STTJob = Callable[[STT], None]
+
+
+def transcribe_audio(stt: STT, audio: "AudioData",
+                     lang: Optional[str] = None) -> List[Tuple[str, float]]:
+    """
+    Transcribe a complete recording with any kind of STT plugin
+    @param stt: STT plugin to use
+    @param audio: recorded audio to transcribe
+    @param lang: language of the audio
+    @return: list of (transcript, confidence) tuples
+    """
+    if isinstance(stt, StreamingSTT) and not isinstance(stt, FakeStreamingSTT):
+        # native streaming plugins only transcribe what was streamed to them
+        stt.stream_start(lang)
+        stt.stream_data(audio.get_raw_data())
+        return stt.transcribe(lang=lang) or []
+    return stt.transcribe(audio, lang) or []
+
+
+class OfflineSTTPool:
+    """
+    Pool of worker threads transcribing complete recordings received over the
+    bus (`recognizer_loop:b64_transcribe` and `recognizer_loop:b64_audio`).
+
+    Every worker owns a private STT instance, loaded on first use, so requests
+    never share state with the live voice loop or with each other.
+    """
+
+    def __init__(self, config: Optional[dict] = None,
+                 stt_loader: Callable[[], STT] = load_stt_module):
+        pool_config = (config or {}).get("listener", {}).get("b64_stt") or {}
+        self.num_workers = max(1, pool_config.get("workers", 1))
+        self.queue_size = max(1, pool_config.get("queue_size", 8))
+        self._stt_loader = stt_loader
+        self._queue: Queue = Queue(maxsize=self.queue_size)
+        self._workers: List[Thread] = []
+        self._engines: List[STT] = []
+        self._engines_lock = Lock()
+        self._generation = 0
+
+    @property
+    def running(self) -> bool:
+        return bool(self._workers)
+
+    def start(self):
+        """
+        Start the worker threads
+        """
+        if self.running:
+            return
+        for idx in range(self.num_workers):
+            worker = Thread(target=self._run_worker, daemon=True,
+                            name=f"b64_stt_{idx}")
+            worker.start()
+            self._workers.append(worker)
+        LOG.debug(f"Started {self.num_workers} offline STT workers")
+
+    def submit(self, job: STTJob) -> bool:
+        """
+        Queue a job for the next free worker
+        @param job: callable receiving the worker's STT instance
+        @return: False if the queue is full and the request was rejected
+        """
+        if not self.running:
+            self.start()
+        try:
+            self._queue.put_nowait(job)
+        except Full:
+            LOG.warning("Offline STT queue full, rejecting request")
+            return False
+        return True
+
+    def reload(self):
+        """
+        Discard loaded STT instances; workers will load new ones with the
+        current configuration on their next request
+        """
+        self._generation += 1
+
+    def _load_stt(self) -> STT:
+        stt = self._stt_loader()
+        with self._engines_lock:
+            self._engines.append(stt)
+        return stt
+
+    def _unload_stt(self, stt: STT):
+        with self._engines_lock:
+            if stt in self._engines:
+                self._engines.remove(stt)
+        if hasattr(stt, "shutdown"):
+            try:
+                stt.shutdown()
+            except Exception as e:
+                LOG.warning(e)
+
+    def _run_worker(self):
+        stt = None
+        generation = self._generation
+        while True:
+            job = self._queue.get()
+            if job is None:
+                break
+            try:
+                if stt is not None and generation != self._generation:
+                    self._unload_stt(stt)
+                    stt = None
+                if stt is None:
+                    generation = self._generation
+                    stt = self._load_stt()
+                job(stt)
+            except Exception as e:
+                LOG.exception(f"Offline STT request failed: {e}")
+        if stt is not None:
+            self._unload_stt(stt)
+
+    def shutdown(self):
+        """
+        Stop all workers and shutdown their STT instances
+        """
+        for _ in self._workers:
+            self._queue.put(None)
+        for worker in self._workers:
+            worker.join(timeout=5)
+        self._workers = []
+        with self._engines_lock:
+            engines, self._engines = self._engines, []
+        for stt in engines:
+            self._unload_stt(stt)
@@ -0,0 +1,119 @@
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+import time
+from threading import Lock
+from typing import Callable, Dict, Optional
+
+from ovos_bus_client.message import Message
+
+from ovos_dinkum_listener.voice_loop.voice_loop import ChunkInfo, \
+    DinkumVoiceLoop
+
+
+class AudioTelemetry:
+    """
+    Publish audio levels and VAD state aggregated over `window` seconds as
+    `recognizer_loop:telemetry` messages.
+
+    Clients subscribe with `recognizer_loop:telemetry.subscribe` and must
+    renew the subscription every `ttl` seconds. The voice loop only computes
+    chunk energy while at least one subscription is active.
+    """
+
+    def __init__(self, emit: Callable[[Message], None], window: float = 0.1,
+                 ttl: float = 30):
+        self.emit = emit
+        self.window = window
+        self.ttl = ttl
+        self.loop: Optional[DinkumVoiceLoop] = None
+        self._subscribers: Dict[str, float] = {}
+        self._lock = Lock()
+        self._chained = None
+        self._window_chunks = 1
+        self._reset()
+
+    @property
+    def active(self) -> bool:
+        return self.loop is not None and \
+            self.loop.chunk_callback == self._on_chunk
+
+    def _reset(self):
+        self._chunks = 0
+        self._speech_chunks = 0
+        self._energy_sum = 0.0
+        self._energy_peak = 0.0
+
+    def subscribe(self, subscriber: str):
+        """
+        Start or renew a subscription
+        @param subscriber: unique id of the subscriber
+        """
+        with self._lock:
+            self._subscribers[subscriber] = time.monotonic() + self.ttl
+            if not self.active and self.loop is not None:
+                self._attach()
+
+    def unsubscribe(self, subscriber: str):
+        with self._lock:
+            self._subscribers.pop(subscriber, None)
+            if not self._subscribers and self.active:
+                self._detach()
+
+    def bind(self, loop: DinkumVoiceLoop):
+        """
+        Set the voice loop to publish telemetry for
+        """
+        with self._lock:
+            if self.active:
+                self._detach()
+            self.loop = loop
+            if self._subscribers:
+                self._attach()
+
+    def _attach(self):
+        self._chained = self.loop.chunk_callback
+        seconds_per_chunk = self.loop.mic.seconds_per_chunk or self.window
+        self._window_chunks = max(1, round(self.window / seconds_per_chunk))
+        self._reset()
+        self.loop.chunk_callback = self._on_chunk
+
+    def _detach(self):
+        self.loop.chunk_callback = self._chained
+        self._chained = None
+
+    def _expire(self):
+        now = time.monotonic()
+        with self._lock:
+            for subscriber, expires in list(self._subscribers.items()):
+                if expires < now:
+                    self._subscribers.pop(subscriber)
+            if not self._subscribers and self.active:
+                self._detach()
+
+    def _on_chunk(self, info: ChunkInfo):
+        if self._chained is not None:
+            self._chained(info)
+        self._chunks += 1
+        self._speech_chunks += info.is_speech
+        self._energy_sum += info.energy
+        self._energy_peak = max(self._energy_peak, info.energy)
+        if self._chunks < self._window_chunks:
+            return
+        self.emit(Message("recognizer_loop:telemetry", {
+            "energy_peak": self._energy_peak,
+            "energy_mean": round(self._energy_sum / self._chunks, 2),
+            "speech_ratio": round(self._speech_chunks / self._chunks, 2),
+            "state": self.loop.state,
+            "window": self._chunks * self.loop.mic.seconds_per_chunk
+        }))
+        self._reset()
+        self._expire()
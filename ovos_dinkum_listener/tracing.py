@@ -0,0 +1,174 @@
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""
+Per-utterance latency tracing.
+
+The voice loop marks monotonic timestamps as an utterance moves through the
+pipeline (`TRACE_EVENTS`). Every pair of consecutive marks is a span named
+`"<previous>-><event>"`, eg. `"speech_end->transformers"` is the time taken
+by audio transformers. Spans of finished utterances are aggregated into
+p50/p95/p99 summaries and optionally appended to a trace file in the Chrome
+Trace Event Format, which can be opened with https://ui.perfetto.dev
+"""
+import json
+import math
+import os
+import time
+from collections import deque
+from threading import Lock
+from typing import Deque, Dict, List, Optional, Tuple
+
+from ovos_utils.log import LOG
+
+TRACE_EVENTS = (
+    "wakeword",      # wake word detected
+    "speech",        # first chunk of the spoken command
+    "speech_end",    # end of speech decided by VAD or a timeout
+    "transformers",  # audio transformers done
+    "stt",           # primary STT returned
+    "fallback_stt",  # fallback STT returned, only if the primary failed
+    "emit"           # transcription handed to the bus emitter
+)
+
+
+class UtteranceTrace:
+    """
+    Monotonic timestamps of the pipeline events of a single utterance
+    """
+
+    def __init__(self):
+        # converts monotonic timestamps to epoch time
+        self.epoch_offset = time.time() - time.monotonic()
+        self.marks: Dict[str, float] = {}
+
+    def mark(self, event: str, timestamp: Optional[float] = None):
+        """
+        Record a pipeline event
+        @param event: name of the event, one of `TRACE_EVENTS`
+        @param timestamp: `time.monotonic()` of the event, now by default
+        """
+        self.marks[event] = time.monotonic() if timestamp is None \
+            else timestamp
+
+    @property
+    def spans(self) -> List[Tuple[str, float, float]]:
+        """
+        Spans between consecutive events
+        @return: list of (name, start, seconds)
+        """
+        events = sorted(self.marks.items(), key=lambda e: e[1])
+        return [(f"{prev}->{event}", start, end - start)
+                for (prev, start), (event, end) in zip(events, events[1:])]
+
+    @property
+    def total(self) -> float:
+        if not self.marks:
+            return 0.0
+        return max(self.marks.values()) - min(self.marks.values())
+
+    def as_dict(self) -> dict:
+        """
+        Serializable trace, added to the `stt_context` of utterances
+        """
+        return {"marks": dict(self.marks),
+                "spans": {name: round(seconds * 1000, 3)
+                          for name, _, seconds in self.spans}}
+
+
+def percentile(values: List[float], pct: float) -> float:
+    """
+    Nearest-rank percentile
+    @param values: sorted values
+    @param pct: percentile between 0 and 100
+    """
+    if not values:
+        return 0.0
+    idx = max(0, math.ceil(pct / 100 * len(values)) - 1)
+    return values[idx]
+
+
+class LatencyTracer:
+    """
+    Collect traces of finished utterances. Span durations of the last
+    `window` utterances are kept for `summary`, all traces are appended to
+    `trace_file` if set.
+    """
+
+    def __init__(self, window: int = 100, trace_file: Optional[str] = None):
+        self.window = max(1, window)
+        self.trace_file = trace_file
+        self.traced = 0
+        self._spans: Dict[str, Deque[float]] = {}
+        self._lock = Lock()
+        self._file = None
+
+    def start(self) -> UtteranceTrace:
+        return UtteranceTrace()
+
+    def finish(self, trace: UtteranceTrace):
+        """
+        Record the spans of a finished utterance
+        @param trace: trace with all events of the utterance marked
+        """
+        if len(trace.marks) < 2:
+            return
+        spans = trace.spans
+        with self._lock:
+            self.traced += 1
+            for name, _, seconds in spans + [("total", 0, trace.total)]:
+                if name not in self._spans:
+                    self._spans[name] = deque(maxlen=self.window)
+                self._spans[name].append(seconds)
+            if self.trace_file:
+                self._write(trace, spans)
+
+    def summary(self) -> Dict[str, dict]:
+        """
+        Span percentiles over the last `window` utterances
+        @return: dict of span name to count and p50/p95/p99 in milliseconds
+        """
+        with self._lock:
+            spans = {name: sorted(values)
+                     for name, values in self._spans.items()}
+        return {name: {"count": len(values),
+                       **{f"p{pct}": round(percentile(values, pct) * 1000, 3)
+                          for pct in (50, 95, 99)}}
+                for name, values in spans.items()}
+
+    def _write(self, trace: UtteranceTrace, spans: list):
+        # JSON array format without the closing bracket, so events can be
+        # appended, trace viewers accept an unterminated array
+        pid = os.getpid()
+        start = min(trace.marks.values())
+        events = [("utterance", start, trace.total)] + spans
+        try:
+            if self._file is None:
+                os.makedirs(os.path.dirname(self.trace_file) or ".",
+                            exist_ok=True)
+                self._file = open(self.trace_file, "a")
+                if self._file.tell() == 0:
+                    self._file.write("[\n")
+            for name, ts, seconds in events:
+                self._file.write(json.dumps({
+                    "name": name, "cat": "listener", "ph": "X",
+                    "ts": round((ts + trace.epoch_offset) * 1e6),
+                    "dur": round(seconds * 1e6), "pid": pid, "tid": 0}) +
+                    ",\n")
+            self._file.flush()
+        except OSError as e:
+            LOG.error(f"Failed to write trace to {self.trace_file}: {e}")
+
+    def close(self):
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
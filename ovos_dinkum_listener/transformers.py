@@ -26,17 +26,244 @@
 # NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS
 # SOFTWARE,  EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
 
+import time
+from collections import deque
+from threading import Condition, Thread
+from typing import Callable, Optional
+
+from ovos_bus_client.message import Message
 from ovos_plugin_manager.audio_transformers import find_audio_transformer_plugins
 from ovos_utils.json_helper import merge_dict
 from ovos_utils.log import LOG
 
 
+class TransformerMonitor:
+    """
+    Time every call to a transformer plugin and quarantine the plugin after
+    `max_overruns` consecutive calls fail or exceed their budget.
+
+    `chunk_budget` applies to `feed_*_chunk` calls, `utterance_budget` to
+    `feed_speech_utterance` and `transform`. A quarantined plugin is skipped
+    for `quarantine_seconds`.
+    """
+    UTTERANCE_METHODS = ("feed_speech_utterance", "transform")
+
+    def __init__(self, name: str, plugin, chunk_budget: float = 0.1,
+                 utterance_budget: float = 2.0, max_overruns: int = 3,
+                 quarantine_seconds: float = 60,
+                 on_quarantine: Optional[Callable[[str], None]] = None):
+        self.name = name
+        self.plugin = plugin
+        self.chunk_budget = chunk_budget
+        self.utterance_budget = utterance_budget
+        self.max_overruns = max(1, max_overruns)
+        self.quarantine_seconds = quarantine_seconds
+        self.on_quarantine = on_quarantine
+        self.timings = {}
+        self.overruns = 0
+        self.quarantine_count = 0
+        self.quarantined_until = 0.0
+
+    @property
+    def active(self) -> bool:
+        """
+        Return False while the plugin is quarantined
+        """
+        if not self.quarantined_until:
+            return True
+        if time.monotonic() < self.quarantined_until:
+            return False
+        LOG.info(f"Re-enabling audio transformer: {self.name}")
+        self.quarantined_until = 0.0
+        return True
+
+    @property
+    def metrics(self) -> dict:
+        timings = {method: {"calls": calls,
+                            "avg_ms": round(total * 1000 / calls, 3),
+                            "max_ms": round(peak * 1000, 3)}
+                   for method, (calls, total, peak) in list(self.timings.items())}
+        return {"timings": timings,
+                "quarantined": not self.active,
+                "quarantine_count": self.quarantine_count}
+
+    def call(self, method: str, *args):
+        """
+        Call a plugin method and record its latency. Exceptions are
+        re-raised after being counted as an overrun.
+        @param method: name of the plugin method to call
+        @return: value returned by the plugin
+        """
+        start = time.perf_counter()
+        failed = True
+        try:
+            result = getattr(self.plugin, method)(*args)
+            failed = False
+            return result
+        finally:
+            elapsed = time.perf_counter() - start
+            calls, total, peak = self.timings.get(method, (0, 0.0, 0.0))
+            self.timings[method] = (calls + 1, total + elapsed,
+                                    max(peak, elapsed))
+            budget = self.utterance_budget \
+                if method in self.UTTERANCE_METHODS else self.chunk_budget
+            if failed or (budget is not None and elapsed > budget):
+                self._overrun(method, elapsed)
+            else:
+                self.overruns = 0
+
+    def _overrun(self, method: str, elapsed: float):
+        self.overruns += 1
+        if self.overruns < self.max_overruns:
+            return
+        self.overruns = 0
+        self.quarantine_count += 1
+        self.quarantined_until = time.monotonic() + self.quarantine_seconds
+        LOG.warning(f"Quarantining audio transformer {self.name} for "
+                    f"{self.quarantine_seconds} seconds, {method} took "
+                    f"{elapsed:.3f} seconds")
+        if self.on_quarantine is not None:
+            self.on_quarantine(self.name)
+
+
+class TransformerWorker(Thread):
+    """
+    Feed audio chunks to a single transformer plugin from its own thread,
+    so a slow plugin does not delay the voice loop.
+
+    drop_policy decides what happens when `queue_size` chunks are pending:
+    * "oldest": discard the oldest pending chunk
+    * "newest": discard the incoming chunk
+    * "block": wait for the worker to catch up
+    """
+
+    def __init__(self, name: str, plugin, queue_size: int = 32,
+                 drop_policy: str = "oldest",
+                 monitor: Optional[TransformerMonitor] = None):
+        super().__init__(daemon=True, name=f"transformer_{name}")
+        self.plugin = plugin
+        self.monitor = monitor
+        self.queue_size = max(1, queue_size)
+        if drop_policy not in ("oldest", "newest", "block"):
+            LOG.warning(f"Invalid drop_policy for {name}: {drop_policy}")
+            drop_policy = "oldest"
+        self.drop_policy = drop_policy
+        self.dropped = 0
+        self.max_depth = 0
+        self._queue = deque()
+        self._cond = Condition()
+        self._busy = False
+        self._running = True
+
+    @property
+    def depth(self) -> int:
+        return len(self._queue)
+
+    @property
+    def metrics(self) -> dict:
+        return {"depth": self.depth,
+                "max_depth": self.max_depth,
+                "dropped": self.dropped}
+
+    def put(self, method: str, chunk: bytes):
+        """
+        Queue a chunk for the plugin
+        @param method: name of the plugin method to call with chunk
+        @param chunk: bytes of audio data
+        """
+        with self._cond:
+            if len(self._queue) >= self.queue_size:
+                if self.drop_policy == "block":
+                    self._cond.wait_for(
+                        lambda: len(self._queue) < self.queue_size or
+                        not self._running)
+                    if not self._running:
+                        self.dropped += 1
+                        return
+                elif self.drop_policy == "newest":
+                    self.dropped += 1
+                    return
+                else:
+                    self._queue.popleft()
+                    self.dropped += 1
+            self._queue.append((method, chunk))
+            self.max_depth = max(self.max_depth, len(self._queue))
+            self._cond.notify_all()
+
+    def run(self):
+        while True:
+            with self._cond:
+                self._cond.wait_for(lambda: self._queue or not self._running)
+                if not self._queue:
+                    break
+                method, chunk = self._queue.popleft()
+                self._busy = True
+                self._cond.notify_all()
+            try:
+                if self.monitor is not None:
+                    self.monitor.call(method, chunk)
+                else:
+                    getattr(self.plugin, method)(chunk)
+            except Exception as e:
+                LOG.exception(e)
+            with self._cond:
+                self._busy = False
+                self._cond.notify_all()
+
+    def wait_idle(self, timeout: Optional[float] = None) -> bool:
+        """
+        Wait for all queued chunks to be processed
+        @param timeout: max seconds to wait
+        @return: True if the queue was drained
+        """
+        with self._cond:
+            return self._cond.wait_for(
+                lambda: not self._queue and not self._busy, timeout)
+
+    @property
+    def busy(self) -> bool:
+        """
+        Return True while the plugin is processing a chunk
+        """
+        return self._busy
+
+    def clear(self) -> int:
+        """
+        Discard all pending chunks
+        @return: number of chunks discarded
+        """
+        with self._cond:
+            cleared = len(self._queue)
+            self._queue.clear()
+            self.dropped += cleared
+            self._cond.notify_all()
+        return cleared
+
+    def stop(self):
+        """
+        Process remaining chunks and stop the thread
+        """
+        with self._cond:
+            self._running = False
+            self._cond.notify_all()
+        self.join(timeout=5)
+
+
 class AudioTransformersService:
 
     def __init__(self, bus, config=None):
         self.config_core = config or {}
         self.loaded_plugins = {}
+        self.workers = {}
+        self.monitors = {}
+        self.utterance_view = set()
+        self._plugins = ()
+        self._dispatch = ()
+        self._speech_dispatch = ()
         self.has_loaded = False
+        # set while the voice loop runs behind real time, audio chunks are
+        # not fed to plugins but `transform` is still called
+        self.skip_feed = False
         self.bus = bus
         # to activate a plugin, just add an entry to mycroft.conf for it
         self.config = \
@@ -56,8 +283,54 @@ class AudioTransformersService:
                 except Exception:
                     LOG.exception(f"Failed to load audio transformer plugin: "
                                   f"{plug_name}")
+                    continue
+                plug_config = self.config[plug_name]
+                monitor = TransformerMonitor(
+                    plug_name, self.loaded_plugins[plug_name],
+                    chunk_budget=plug_config.get("chunk_budget", 0.1),
+                    utterance_budget=plug_config.get("utterance_budget", 2.0),
+                    max_overruns=plug_config.get("max_overruns", 3),
+                    quarantine_seconds=plug_config.get("quarantine_seconds",
+                                                       60),
+                    on_quarantine=self._on_quarantine)
+                self.monitors[plug_name] = monitor
+                # plugins reading the whole utterance are not fed speech chunks
+                if plug_config.get("utterance_view",
+                                   getattr(self.loaded_plugins[plug_name],
+                                           "utterance_view", False) is True):
+                    self.utterance_view.add(plug_name)
+                if plug_config.get("async", False):
+                    worker = TransformerWorker(
+                        plug_name, self.loaded_plugins[plug_name],
+                        queue_size=plug_config.get("queue_size", 32),
+                        drop_policy=plug_config.get("drop_policy", "oldest"),
+                        monitor=monitor)
+                    worker.start()
+                    self.workers[plug_name] = worker
+        self._sort_plugins()
         self.has_loaded = True
 
+    def _sort_plugins(self):
+        """
+        Cache loaded plugins in priority order, must be called whenever
+        `loaded_plugins` changes
+        """
+        ordered = sorted(self.loaded_plugins.items(),
+                         key=lambda k: k[1].priority, reverse=True)
+        self._plugins = tuple(plug for _, plug in ordered)
+        self._dispatch = tuple((self.monitors[name], self.workers.get(name))
+                               for name, _ in ordered)
+        self._speech_dispatch = tuple(
+            (monitor, worker) for monitor, worker in self._dispatch
+            if monitor.name not in self.utterance_view)
+
+    def _on_quarantine(self, name: str):
+        monitor = self.monitors[name]
+        self.bus.emit(Message("recognizer_loop:transformer.quarantined",
+                              {"name": name,
+                               "seconds": monitor.quarantine_seconds,
+                               **monitor.metrics}))
+
     @property
     def plugins(self) -> list:
         """
@@ -68,62 +341,132 @@ class AudioTransformersService:
         A plugin of `priority` 1 will override any existing context keys and
         will be the last to modify `audio_data`
         """
-        return sorted(self.loaded_plugins.values(),
-                      key=lambda k: k.priority, reverse=True)
+        return list(self._plugins)
+
+    @property
+    def queue_metrics(self) -> dict:
+        """
+        Return queue depth and dropped chunk counts of async transformers
+        """
+        return {name: worker.metrics for name, worker in self.workers.items()}
+
+    @property
+    def metrics(self) -> dict:
+        """
+        Return call timings, quarantine status and queue metrics per plugin
+        """
+        metrics = {name: monitor.metrics
+                   for name, monitor in self.monitors.items()}
+        for name, queue in self.queue_metrics.items():
+            metrics[name]["queue"] = queue
+        return metrics
 
     def shutdown(self):
         """
         Shutdown all loaded plugins
         """
+        for worker in self.workers.values():
+            worker.stop()
         for module in self.plugins:
             try:
                 module.shutdown()
             except Exception as e:
                 LOG.warning(e)
 
+    def _feed(self, dispatch: tuple, method: str, chunk: bytes):
+        """
+        Feed a chunk to every active plugin, a failing plugin is logged and
+        counted by its monitor without affecting the others
+        @param dispatch: (monitor, worker) pairs to feed
+        @param method: name of the plugin method to call
+        @param chunk: bytes of audio data
+        """
+        for monitor, worker in dispatch:
+            if not monitor.active:
+                continue
+            if worker is not None:
+                worker.put(method, chunk)
+                continue
+            try:
+                monitor.call(method, chunk)
+            except Exception as e:
+                LOG.exception(f"{monitor.name} {method} failed: {e}")
+
     def feed_audio(self, chunk: bytes):
         """
         Feed a chunk of untagged (not speech) audio to all loaded plugins
         @param chunk: bytes of audio data
         """
-        for module in self.plugins:
-            module.feed_audio_chunk(chunk)
+        if self.skip_feed or not self._plugins:
+            return
+        self._feed(self._dispatch, "feed_audio_chunk", chunk)
 
     def feed_hotword(self, chunk: bytes):
         """
         Feed a chunk of hotword audio to all loaded plugins
         @param chunk: bytes of audio data
         """
-        for module in self.plugins:
-            module.feed_hotword_chunk(chunk)
+        if self.skip_feed or not self._plugins:
+            return
+        self._feed(self._dispatch, "feed_hotword_chunk", chunk)
 
     def feed_speech(self, chunk: bytes):
         """
         Feed a chunk of speech audio to all loaded plugins
         @param chunk: bytes of audio data
         """
-        try:
-            for module in self.plugins:
-                module.feed_speech_chunk(chunk)
-        except Exception as e:
-            LOG.exception(e)
+        if self.skip_feed or not self._speech_dispatch:
+            return
+        self._feed(self._speech_dispatch, "feed_speech_chunk", chunk)
 
-    def transform(self, chunk: bytes) -> (bytes, dict):
+    def transform(self, chunk: bytes,
+                  utterance: Optional[memoryview] = None) -> (bytes, dict):
         """
-        Get transformed audio and context for the preceding audio
+        Get transformed audio and context for the preceding audio.
+        Plugins with `utterance_view` enabled receive `utterance` instead of
+        `chunk`, so they don't need to keep their own copy of speech audio
         @param chunk: bytes of audio data
+        @param utterance: read-only view of the complete utterance audio
         @return: transformed audio data, dict context
         """
         context = {'client_name': 'ovos_dinkum_listener',
                    'source': 'audio',  # default native audio source
                    'destination': ["skills"]}
-        for module in self.plugins:
+        # async plugins must process all audio before transforming,
+        # join_timeout is measured from the same start for every worker
+        start = time.monotonic()
+        skip = set()
+        for name, worker in self.workers.items():
+            timeout = self.config[name].get("join_timeout", 2.0)
+            remaining = max(0.0, start + timeout - time.monotonic())
+            if not worker.wait_idle(remaining):
+                # pending audio must not leak into the next utterance
+                cleared = worker.clear()
+                LOG.warning(f"{name} did not process queued audio within "
+                            f"{timeout} seconds, dropped {cleared} chunks")
+                if worker.busy:
+                    # never call the plugin from two threads at once
+                    LOG.warning(f"{name} still busy, skipping transform")
+                    skip.add(worker.plugin)
+        for monitor, _ in self._dispatch:
+            if monitor.plugin in skip or not monitor.active:
+                continue
             try:
-                LOG.debug(f"checking audio transformer: {module}")
-                chunk = module.feed_speech_utterance(chunk)
-                chunk, data = module.transform(chunk)
-                LOG.debug(f"{module.name}: {data}")
+                LOG.debug(f"checking audio transformer: {monitor.name}")
+                if utterance is not None and \
+                        monitor.name in self.utterance_view:
+                    chunk = monitor.call("feed_speech_utterance", utterance)
+                else:
+                    if isinstance(chunk, memoryview):
+                        # an opt-in plugin passed the view along, legacy
+                        # plugins expect bytes
+                        chunk = chunk.tobytes()
+                    chunk = monitor.call("feed_speech_utterance", chunk)
+                chunk, data = monitor.call("transform", chunk)
+                LOG.debug(f"{monitor.name}: {data}")
                 context = merge_dict(context, data)
             except Exception as e:
                 LOG.exception(e)
+        if isinstance(chunk, memoryview):
+            chunk = chunk.tobytes()
         return chunk, context
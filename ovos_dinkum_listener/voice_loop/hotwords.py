@@ -1,7 +1,8 @@
+import time
 from enum import Enum
 from os.path import dirname
-from threading import Event
-from typing import Optional
+from threading import Event, RLock
+from typing import Callable, Optional
 
 from ovos_config import Configuration
 from ovos_plugin_manager.wakewords import OVOSWakeWordFactory, HotWordEngine
@@ -102,6 +103,8 @@ def _safe_get_plugins(func):
 class HotwordContainer:
     _plugins = {}
     _loaded = Event()
+    # guards _plugins, hotwords are reloaded while the voice loop reads them
+    _lock = RLock()
 
     def __init__(self, bus=FakeBus(), expected_duration=3, sample_rate=16000,
                  sample_width=2, reload_allowed=True, autoload=False):
@@ -110,6 +113,8 @@ class HotwordContainer:
         self.state = HotwordState.HOTWORD
         self.reload_on_failure = False
         self.applied_hotwords_config = None
+        # optional ListenerMetrics, engine time per chunk is observed if set
+        self.metrics = None
         if autoload:
             self.load_hotword_engines()
 
@@ -123,18 +128,8 @@ class HotwordContainer:
         self._loaded.clear()
         LOG.info("creating hotword engines")
         config_core = Configuration()
-        default_lang = config_core.get("lang", "en-us")
         hot_words = config_core.get("hotwords", {})
         self.applied_hotwords_config = hot_words
-        global_listen = config_core.get("confirm_listening")
-        global_sounds = config_core.get("sounds", {})
-
-        main_ww = config_core.get("listener",
-                                  {}).get("wake_word",
-                                          "hey_mycroft").replace(" ", "_")
-        wakeupw = config_core.get("listener",
-                                  {}).get("stand_up_word",
-                                          "wake_up").replace(" ", "_")
 
         for word, data in dict(hot_words).items():
             try:
@@ -143,65 +138,19 @@ class HotwordContainer:
                 #  on changes to the hotwords section this should be enforced directly
                 # this approach does not fully solve the issue, config merging may be messed up
                 word = word.replace(" ", "_")
-
-                sound = data.get("sound")
-                utterance = data.get("utterance")
-                listen = data.get("listen", False) or word == main_ww
-                wakeup = data.get("wakeup", False)
-                stopword = data.get("stopword", False)
-                lang = data.get("stt_lang", default_lang)
-                enabled = data.get("active")
-                event = data.get("bus_event")
-
-                # automatically enable default wake words
-                # only if the active status is undefined
-                if enabled is None:
-                    if word == main_ww or word == wakeupw:
-                        enabled = True
-                    else:
-                        enabled = False
-
-                # global listening sound
-                if not sound and listen and global_listen:
-                    sound = global_sounds.get("start_listening")
-
-                if not enabled:
+                plugin = self._create_hotword(word, data, config_core)
+                if plugin is None:
                     continue
-
-                engine = OVOSWakeWordFactory.create_hotword(word)
-                if engine is not None:
-                    LOG.info(f"Loading hotword: {word} with engine: {engine}")
-                    if hasattr(engine, "bind"):
-                        engine.bind(self.bus)
-                        # not all plugins implement this
-                    if data.get('engine'):
-                        LOG.info(f"Engine previously defined. "
-                                 f"Deleting old instance.")
-                        try:
-                            data['engine'].stop()
-                            del data['engine']
-                        except Exception as e:
-                            LOG.error(e)
-                    self._plugins[word] = {"engine": engine,
-                                           "sound": sound,
-                                           "bus_event": event,
-                                           "utterance": utterance,
-                                           "stt_lang": lang,
-                                           "listen": listen,
-                                           "wakeup": wakeup,
-                                           "stopword": stopword}
-                    if sound:
-                        try:
-                            if sound.startswith("snd/"):
-                                dur = get_sound_duration(sound,
-                                                         base_dir=f"{dirname(dirname(__file__))}/res")
-                            else:
-                                dur = get_sound_duration(sound)
-                            LOG.debug(f"{sound} duration: {dur} seconds")
-                            self._plugins[word]["sound_duration"] = dur
-                        except:
-                            pass
-
+                if data.get('engine'):
+                    LOG.info(f"Engine previously defined. "
+                             f"Deleting old instance.")
+                    try:
+                        data['engine'].stop()
+                        del data['engine']
+                    except Exception as e:
+                        LOG.error(e)
+                with self._lock:
+                    self._plugins[word] = plugin
             except Exception as e:
                 LOG.error("Failed to load hotword: " + word)
 
@@ -216,45 +165,193 @@ class HotwordContainer:
         if not self.stop_words:
             LOG.warning("No stop words loaded")
 
+    @staticmethod
+    def _hotword_meta(word: str, data: dict,
+                      config_core: dict) -> Optional[dict]:
+        """
+        Get the metadata of a hotword
+        @param word: normalized hotword name
+        @param data: hotword configuration
+        @param config_core: full configuration
+        @return: metadata, None if the hotword is not enabled
+        """
+        default_lang = config_core.get("lang", "en-us")
+        global_listen = config_core.get("confirm_listening")
+        global_sounds = config_core.get("sounds", {})
+
+        main_ww = config_core.get("listener",
+                                  {}).get("wake_word",
+                                          "hey_mycroft").replace(" ", "_")
+        wakeupw = config_core.get("listener",
+                                  {}).get("stand_up_word",
+                                          "wake_up").replace(" ", "_")
+
+        sound = data.get("sound")
+        utterance = data.get("utterance")
+        listen = data.get("listen", False) or word == main_ww
+        wakeup = data.get("wakeup", False)
+        stopword = data.get("stopword", False)
+        lang = data.get("stt_lang", default_lang)
+        enabled = data.get("active")
+        event = data.get("bus_event")
+
+        # automatically enable default wake words
+        # only if the active status is undefined
+        if enabled is None:
+            if word == main_ww or word == wakeupw:
+                enabled = True
+            else:
+                enabled = False
+
+        # global listening sound
+        if not sound and listen and global_listen:
+            sound = global_sounds.get("start_listening")
+
+        if not enabled:
+            return None
+
+        meta = {"sound": sound,
+                "bus_event": event,
+                "utterance": utterance,
+                "stt_lang": lang,
+                "listen": listen,
+                "wakeup": wakeup,
+                "stopword": stopword}
+        if sound:
+            try:
+                if sound.startswith("snd/"):
+                    dur = get_sound_duration(sound,
+                                             base_dir=f"{dirname(dirname(__file__))}/res")
+                else:
+                    dur = get_sound_duration(sound)
+                LOG.debug(f"{sound} duration: {dur} seconds")
+                meta["sound_duration"] = dur
+            except:
+                pass
+        return meta
+
+    def _create_hotword(self, word: str, data: dict,
+                        config_core: dict) -> Optional[dict]:
+        """
+        Create the engine and metadata of a hotword
+        @param word: normalized hotword name
+        @param data: hotword configuration
+        @param config_core: full configuration
+        @return: engine and metadata, None if the hotword is not enabled
+        """
+        meta = self._hotword_meta(word, data, config_core)
+        if meta is None:
+            return None
+        engine = OVOSWakeWordFactory.create_hotword(word)
+        if engine is None:
+            return None
+        LOG.info(f"Loading hotword: {word} with engine: {engine}")
+        if hasattr(engine, "bind"):
+            engine.bind(self.bus)
+            # not all plugins implement this
+        return {"engine": engine, **meta}
+
+    def reload_hotword(self, word: str,
+                       on_load: Optional[Callable[[str, HotWordEngine],
+                                                  None]] = None):
+        """
+        Load, replace or unload a single hotword from configuration while
+        the other engines keep running. The new engine is loaded before the
+        old one is replaced, so detection is not interrupted.
+        @param word: hotword name
+        @param on_load: called with the new engine before it is used
+        """
+        word = word.replace(" ", "_")
+        config_core = Configuration()
+        hot_words = {w.replace(" ", "_"): data for w, data in
+                     config_core.get("hotwords", {}).items()}
+        plugin = None
+        if word in hot_words:
+            try:
+                plugin = self._create_hotword(word, hot_words[word],
+                                              config_core)
+            except Exception as e:
+                LOG.error(f"Failed to load hotword {word}: {e}")
+                return
+        if plugin is not None and on_load is not None:
+            on_load(word, plugin["engine"])
+
+        with self._lock:
+            old = self._plugins.pop(word, None)
+            if plugin is not None:
+                self._plugins[word] = plugin
+        self.applied_hotwords_config = config_core.get("hotwords", {})
+        LOG.info(f"Reloaded hotword: {word} "
+                 f"({'loaded' if plugin else 'unloaded'})")
+        if old is not None:
+            try:
+                old["engine"].shutdown()
+            except Exception as e:
+                LOG.error(e)
+
+    def update_metadata(self):
+        """
+        Apply configuration changes that don't need a new engine, such as
+        listen sounds, to the loaded hotwords
+        """
+        config_core = Configuration()
+        hot_words = {w.replace(" ", "_"): data for w, data in
+                     config_core.get("hotwords", {}).items()}
+        with self._lock:
+            for word, plugin in list(self._plugins.items()):
+                if word not in hot_words:
+                    continue
+                meta = self._hotword_meta(word, hot_words[word], config_core)
+                if meta is not None:
+                    self._plugins[word] = {"engine": plugin["engine"],
+                                           **meta}
+        self.applied_hotwords_config = config_core.get("hotwords", {})
+
     @property
     def ww_names(self):
         """ wakeup words exit sleep mode if detected after a listen word"""
-        return list(self._plugins.keys())
+        with self._lock:
+            return list(self._plugins.keys())
 
     @property
     @_safe_get_plugins
     def plugins(self):
-        return [v["engine"] for k, v in self._plugins.items()]
+        with self._lock:
+            return [v["engine"] for k, v in self._plugins.items()]
 
     @property
     @_safe_get_plugins
     def wakeup_words(self):
         """ wakeup words exit sleep mode if detected after a listen word"""
-        return {k: v["engine"] for k, v in self._plugins.items()
-                if v.get("wakeup")}
+        with self._lock:
+            return {k: v["engine"] for k, v in self._plugins.items()
+                    if v.get("wakeup")}
 
     @property
     @_safe_get_plugins
     def listen_words(self):
         """ listen words trigger the VAD/STT stages"""
-        return {k: v["engine"] for k, v in self._plugins.items()
-                if v.get("listen")}
+        with self._lock:
+            return {k: v["engine"] for k, v in self._plugins.items()
+                    if v.get("listen")}
 
     @property
     @_safe_get_plugins
     def stop_words(self):
         """ stop only work during recording mode, they exit recording mode"""
-        return {k: v["engine"] for k, v in self._plugins.items()
-                if v.get("stopword")}
+        with self._lock:
+            return {k: v["engine"] for k, v in self._plugins.items()
+                    if v.get("stopword")}
 
     @property
     @_safe_get_plugins
     def hot_words(self):
         """ hotwords only emit bus events / play sounds, they do not affect listening loop"""
-        return {k: v["engine"] for k, v in self._plugins.items()
-                if not v.get("stopword") and
-                not v.get("wakeup") and
-                not v.get("listen")}
+        with self._lock:
+            return {k: v["engine"] for k, v in self._plugins.items()
+                    if not v.get("stopword") and
+                    not v.get("wakeup") and
+                    not v.get("listen")}
 
     def found(self) -> Optional[str]:
         """
@@ -295,9 +392,10 @@ class HotwordContainer:
         @param ww: string wake word to get information for
         @return: dict wake word information
         """
-        if ww not in self._plugins:
-            raise ValueError(f"Requested ww not defined: {ww}")
-        meta = dict(self._plugins.get(ww))
+        with self._lock:
+            if ww not in self._plugins:
+                raise ValueError(f"Requested ww not defined: {ww}")
+            meta = dict(self._plugins.get(ww))
         plug = meta["engine"]
         assert isinstance(plug, HotWordEngine)
         meta["key_phrase"] = ww
@@ -312,22 +410,35 @@ class HotwordContainer:
         """
         if self.state == HotwordState.LISTEN:
             # LOG.debug(f"Update listen_words")
-            engines = self.listen_words.values()
+            engines = self.listen_words
         elif self.state == HotwordState.WAKEUP:
             # LOG.debug(f"Update wakeup_words")
-            engines = self.wakeup_words.values()
+            engines = self.wakeup_words
         elif self.state == HotwordState.RECORDING:
             # LOG.debug(f"Update stop_words")
-            engines = self.stop_words.values()
+            engines = self.stop_words
         else:
             # LOG.debug(f"Update hot_words")
-            engines = self.hot_words.values()
+            engines = self.hot_words
+
+        if self.metrics is not None:
+            self._timed_update(engines, chunk)
+            return
+        for engine in engines.values():
+            try:
+                engine.update(chunk)
+            except Exception as e:
+                LOG.error(e)
 
-        for engine in engines:
+    def _timed_update(self, engines, chunk: bytes):
+        for word, engine in engines.items():
+            start = time.perf_counter()
             try:
                 engine.update(chunk)
             except Exception as e:
                 LOG.error(e)
+            self.metrics.hotword.observe(time.perf_counter() - start,
+                                         hotword=word)
 
     def reset(self):
         """
@@ -350,5 +461,6 @@ class HotwordContainer:
                 engine.shutdown()
             except Exception as e:
                 LOG.error(e)
-        for ww in self.ww_names:
-            self._plugins.pop(ww)
+        with self._lock:
+            for ww in self.ww_names:
+                self._plugins.pop(ww)
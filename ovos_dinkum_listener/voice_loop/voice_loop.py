@@ -15,8 +15,9 @@ import time
 from collections import deque
 from dataclasses import dataclass, field
 from enum import Enum
-from threading import Event
-from typing import Callable, Deque, Optional
+from threading import Event, Lock, Thread, get_ident
+from typing import TYPE_CHECKING, Any, Callable, Deque, Dict, List, Optional, \
+    Tuple
 
 from ovos_config import Configuration
 from ovos_plugin_manager.stt import StreamingSTT
@@ -28,6 +29,12 @@ from ovos_dinkum_listener.voice_loop.hotwords import HotwordContainer, HotwordSt
 from ovos_plugin_manager.templates.microphone import Microphone
 
 from ovos_dinkum_listener.plugins import FakeStreamingSTT
+from ovos_dinkum_listener.settings import get_settings
+
+if TYPE_CHECKING:
+    from ovos_dinkum_listener.metrics import ListenerMetrics
+    from ovos_dinkum_listener.realtime import RealtimeMonitor
+    from ovos_dinkum_listener.tracing import LatencyTracer, UtteranceTrace
 
 
 class ListeningState(str, Enum):
@@ -96,10 +103,85 @@ class ChunkInfo:
     energy: float = 0.0
 
 
+class SpeculativeTranscription(Thread):
+    """
+    Transcribe a finished utterance in the default language while audio
+    transformers, which may detect a different language, are still running.
+    """
+
+    def __init__(self, stt: FakeStreamingSTT, lang: str):
+        super().__init__(daemon=True)
+        self.stt = stt
+        self.lang = lang
+        self.utts: List[Tuple[str, float]] = []
+        from speech_recognition import AudioData
+        # take the audio out of the stream so it can be transcribed again
+        self.audio = AudioData(stt.stream.buffer.read(),
+                               sample_rate=stt.stream.sample_rate,
+                               sample_width=stt.stream.sample_width)
+        stt.stream.buffer.clear()
+
+    def _transcribe(self, lang: str) -> List[Tuple[str, float]]:
+        try:
+            return self.stt.transcribe(self.audio, lang) or []
+        except Exception as e:
+            LOG.exception(f"Primary STT transcription failed: {str(e)}")
+            return []
+
+    def run(self):
+        self.utts = self._transcribe(self.lang)
+
+    def is_hit(self, lang: str) -> bool:
+        """
+        @param lang: language the utterance should be transcribed in
+        @return: True if the speculative transcription used that language
+        """
+        return lang.lower() == self.lang.lower()
+
+    def result(self, lang: str) -> List[Tuple[str, float]]:
+        """
+        Get the transcription in the requested language, transcribing again
+        if it differs from the speculated one
+        @param lang: language the utterance should be transcribed in
+        @return: list of (transcript, confidence) tuples
+        """
+        self.join()
+        if self.is_hit(lang):
+            return self.utts
+        LOG.info(f"Speculative STT used {self.lang}, transcribing again "
+                 f"in {lang}")
+        return self._transcribe(lang)
+
+
+class ComponentSwap:
+    """
+    Components to replace in a running voice loop once it reaches a state
+    boundary between utterances, see `DinkumVoiceLoop.swap_components`
+    """
+
+    def __init__(self, components: Dict[str, Any]):
+        self.components = components
+        self.replaced: Dict[str, Any] = {}
+        self._done = Event()
+
+    @property
+    def done(self) -> bool:
+        return self._done.is_set()
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """
+        Wait for the components to be swapped in
+        @param timeout: max seconds to wait
+        @return: True if the swap happened
+        """
+        return self._done.wait(timeout)
+
+
 RecordCallback = Callable[[], None]
 TextCallback = Callable[[str, dict], None]
 AudioCallback = Callable[[bytes, dict], None]
 ChunkCallback = Callable[[ChunkInfo], None]
+DegradationCallback = Callable[[str, bool, float], None]
 
 
 @dataclass
@@ -119,6 +201,10 @@ class DinkumVoiceLoop(VoiceLoop):
     stt_audio_bytes: bytes = bytes()
     min_stt_confidence: float = 0.6
     max_transcripts: int = 1
+    stream_fallback_stt: bool = False
+    speculative_stt: bool = False
+    speculative_stt_hits: int = 0
+    speculative_stt_misses: int = 0
     last_ww: float = -1.0
     speech_seconds_left: float = 0.0
     silence_seconds_left: float = 0.0
@@ -140,10 +226,23 @@ class DinkumVoiceLoop(VoiceLoop):
     recording_audio_callback: Optional[AudioCallback] = None
     record_end_callback: Optional[RecordCallback] = None
     chunk_callback: Optional[ChunkCallback] = None
+    tracer: Optional["LatencyTracer"] = None
+    metrics: Optional["ListenerMetrics"] = None
+    realtime: Optional["RealtimeMonitor"] = None
+    # wall clock used for wake word timeouts, replaced to replay audio files
+    clock: Callable[[], float] = time.time
+    degradation_callback: Optional[DegradationCallback] = None
     recording_filename: str = "rec"
     is_muted: bool = False
     _is_running: bool = False
+    _fallback_streaming: bool = False
     _chunk_info: ChunkInfo = field(default_factory=ChunkInfo)
+    _looping: bool = False
+    _pending_swaps: List[ComponentSwap] = field(default_factory=list)
+    _swap_lock: Lock = field(default_factory=Lock)
+    _trace: Optional["UtteranceTrace"] = None
+    _thread_id: Optional[int] = None
+    _speech_start: float = 0.0
 
     @property
     def running(self) -> bool:
@@ -152,10 +251,131 @@ class DinkumVoiceLoop(VoiceLoop):
         """
         return self._is_running is True
     
+    @property
+    def thread_id(self) -> Optional[int]:
+        """
+        Identifier of the thread running the loop, None if not looping
+        """
+        return self._thread_id if self._looping else None
+
+    @property
+    def looping(self) -> bool:
+        """
+        Return true while `run` is processing audio
+        """
+        return self._looping
+
+    @property
+    def at_boundary(self) -> bool:
+        """
+        Return true between utterances, when components can be replaced
+        without affecting a voice command or recording
+        """
+        if self.state in (ListeningState.DETECT_WAKEWORD,
+                          ListeningState.SLEEPING):
+            return True
+        # continuous listening, but speech has not started yet
+        return self.state == ListeningState.WAITING_CMD and \
+            self.speech_seconds_left >= self.speech_seconds
+
+    def swap_components(self, **components) -> ComponentSwap:
+        """
+        Replace components (eg. mic, vad, stt) of the loop. A running loop
+        swaps them at the next state boundary between utterances and keeps
+        using the old ones until then, so listening is never interrupted.
+        @param components: loop field name to new instance
+        @return: swap that can be waited on for the replaced instances
+        """
+        swap = ComponentSwap(components)
+        with self._swap_lock:
+            if self._looping:
+                self._pending_swaps.append(swap)
+                return swap
+        self._apply_swap(swap)
+        return swap
+
+    def _apply_swaps(self):
+        with self._swap_lock:
+            swaps, self._pending_swaps = self._pending_swaps, []
+        for swap in swaps:
+            self._apply_swap(swap)
+
+    def _apply_swap(self, swap: ComponentSwap):
+        for name, component in swap.components.items():
+            swap.replaced[name] = getattr(self, name)
+            setattr(self, name, component)
+        LOG.info(f"Swapped voice loop components: {list(swap.components)}")
+        swap._done.set()
+
     def reset_speech_timer(self):
         self.speech_seconds_left = self.speech_seconds
         self.timeout_seconds_left = self.timeout_seconds
         self.timeout_seconds_with_silence_left = self.timeout_seconds_with_silence  
+        # a new utterance begins
+        self._trace = None
+
+    def _observe_chunk(self, seconds: float):
+        """
+        Account for the time spent processing a chunk, degrading or
+        restoring work when the loop falls behind real time
+        @param seconds: time spent processing the last chunk
+        """
+        if self.metrics is not None:
+            self.metrics.observe_chunk(seconds, self.mic.seconds_per_chunk)
+        if self.realtime is None:
+            return
+        change = self.realtime.update(seconds, self.mic.seconds_per_chunk)
+        if change is None:
+            return
+        degradation, active = change
+        rtf = round(self.realtime.realtime_factor, 3)
+        if active:
+            LOG.warning(f"Voice loop is behind real time (rtf={rtf}), "
+                        f"degrading: {degradation}")
+        else:
+            LOG.info(f"Voice loop recovered (rtf={rtf}), "
+                     f"restoring: {degradation}")
+        if degradation == "transformers":
+            self.transformers.skip_feed = active
+        if self.degradation_callback is not None:
+            self.degradation_callback(degradation, active, rtf)
+
+    def _degraded(self, degradation: str) -> bool:
+        return self.realtime is not None and \
+            self.realtime.is_active(degradation)
+
+    def _mark(self, event: str, timestamp: Optional[float] = None):
+        """
+        Mark a pipeline event in the trace of the current utterance
+        @param event: name of the event, one of `tracing.TRACE_EVENTS`
+        @param timestamp: `time.monotonic()` of the event, now by default
+        """
+        if self.tracer is None:
+            return
+        if self._trace is None:
+            self._trace = self.tracer.start()
+        self._trace.mark(event, timestamp)
+
+    def _finish_trace(self):
+        if self._trace is not None:
+            if "emit" not in self._trace.marks:
+                self._mark("emit")
+            self.tracer.finish(self._trace)
+            self._trace = None
+
+    def start_fallback_stream(self):
+        """
+        Prepare the fallback STT for a new utterance. The fallback is kept cold
+        and only receives the finished utterance if the primary STT fails,
+        unless it is a native streaming plugin or `stream_fallback_stt` is set,
+        in which case audio is streamed to it live like the primary STT.
+        """
+        self._fallback_streaming = self.fallback_stt is not None and \
+            not self._degraded("fallback_stt") and \
+            (self.stream_fallback_stt or
+             not isinstance(self.fallback_stt, FakeStreamingSTT))
+        if self._fallback_streaming:
+            self.fallback_stt.stream_start()
 
     def start(self):
         """
@@ -202,78 +422,97 @@ class DinkumVoiceLoop(VoiceLoop):
 
         LOG.info(f"Starting loop in mode: {self.listen_mode}")
 
-        while self._is_running:
-            # If no audio is provided, raise an exception and stop the loop
-            chunk = self.mic.read_chunk()
-            if not self._is_running:  # handle shutdown in middle of read_chunk
-                break
-            if chunk is None:
-                #LOG.warning("No audio from microphone")
-                continue
-
-            if self.is_muted:
-                # Soft mute
-                chunk = bytes(self.mic.chunk_size)
-
-            self._chunk_info.is_speech = False
-            self._chunk_info.energy = 0.0
-
-            # State machine:
-            #
-            # DETECT_HOTWORD -> BEFORE_COMMAND
-            # BEFORE_COMMAND -> {IN_COMMAND, AFTER_COMMAND}
-            # IN_COMMAND -> AFTER_COMMAND
-            # AFTER_COMMAND -> DETECT_HOTWORD
-            #
-
-            if self.state == ListeningState.DETECT_WAKEWORD:
-                try:
-                    if self.listen_mode == ListeningMode.CONTINUOUS:
-                        LOG.info(f"Continuous listening mode, updating state")
-                        self.state = ListeningState.WAITING_CMD
-                        LOG.debug(f"STATE: {self.state}")
-                    elif self._detect_ww(chunk):
-                        LOG.info("Wakeword detected")
-                    elif self._detect_hot(chunk):
-                        LOG.info("Hotword detected")
-                    else:
-                        self.transformers.feed_audio(chunk)
-                except HotWordException as e:
-                    if self.hotwords.reload_on_failure:
-                        LOG.warning(e)
-                        self.hotwords.load_hotword_engines()
-                    else:
-                        raise e
-
-            if self.state == ListeningState.WAITING_CMD:
-                self._wait_cmd(chunk)
-
-            elif self.state == ListeningState.RECORDING:
-                self._in_recording(chunk)
-
-            elif self.state == ListeningState.SLEEPING:
-                self._before_wakeup(chunk)
-            elif self.state == ListeningState.CHECK_WAKE_UP:
-                self._detect_wakeup(chunk)
-
-            elif self.state == ListeningState.CONFIRMATION:
-                LOG.debug("playing listen sound")
-                self._confirmation_sound(chunk)
-
-            elif self.state == ListeningState.BEFORE_COMMAND:
-                LOG.debug("waiting for speech")
-                self._before_cmd(chunk)
-            elif self.state == ListeningState.IN_COMMAND:
-                LOG.debug("recording speech")
-                self._in_cmd(chunk)
-            elif self.state == ListeningState.AFTER_COMMAND:
-                LOG.info("speech finished")
-                self._after_cmd(chunk)
-
-            if self.chunk_callback is not None:
-                self._chunk_info.energy = \
-                    self.debiased_energy(chunk, self.mic.sample_width)
-                self.chunk_callback(self._chunk_info)
+        with self._swap_lock:
+            self._thread_id = get_ident()
+            self._looping = True
+        try:
+            while self._is_running:
+                if self._pending_swaps and self.at_boundary:
+                    self._apply_swaps()
+                # If no audio is provided, raise an exception and stop the loop
+                chunk = self.mic.read_chunk()
+                if not self._is_running:  # handle shutdown in middle of read_chunk
+                    break
+                if chunk is None:
+                    #LOG.warning("No audio from microphone")
+                    continue
+                chunk_start = time.perf_counter()
+
+                if self.is_muted:
+                    # Soft mute
+                    chunk = bytes(self.mic.chunk_size)
+
+                self._chunk_info.is_speech = False
+                self._chunk_info.energy = 0.0
+
+                # State machine:
+                #
+                # DETECT_HOTWORD -> BEFORE_COMMAND
+                # BEFORE_COMMAND -> {IN_COMMAND, AFTER_COMMAND}
+                # IN_COMMAND -> AFTER_COMMAND
+                # AFTER_COMMAND -> DETECT_HOTWORD
+                #
+
+                if self.state == ListeningState.DETECT_WAKEWORD:
+                    try:
+                        if self.listen_mode == ListeningMode.CONTINUOUS:
+                            LOG.info(f"Continuous listening mode, updating state")
+                            self.state = ListeningState.WAITING_CMD
+                            LOG.debug(f"STATE: {self.state}")
+                        elif self._detect_ww(chunk):
+                            LOG.info("Wakeword detected")
+                        elif self._detect_hot(chunk):
+                            LOG.info("Hotword detected")
+                        else:
+                            self.transformers.feed_audio(chunk)
+                    except HotWordException as e:
+                        if self.hotwords.reload_on_failure:
+                            LOG.warning(e)
+                            self.hotwords.load_hotword_engines()
+                        else:
+                            raise e
+
+                if self.state == ListeningState.WAITING_CMD:
+                    self._wait_cmd(chunk)
+
+                elif self.state == ListeningState.RECORDING:
+                    self._in_recording(chunk)
+
+                elif self.state == ListeningState.SLEEPING:
+                    self._before_wakeup(chunk)
+                elif self.state == ListeningState.CHECK_WAKE_UP:
+                    self._detect_wakeup(chunk)
+
+                elif self.state == ListeningState.CONFIRMATION:
+                    LOG.debug("playing listen sound")
+                    self._confirmation_sound(chunk)
+
+                elif self.state == ListeningState.BEFORE_COMMAND:
+                    LOG.debug("waiting for speech")
+                    self._before_cmd(chunk)
+                elif self.state == ListeningState.IN_COMMAND:
+                    LOG.debug("recording speech")
+                    self._in_cmd(chunk)
+                elif self.state == ListeningState.AFTER_COMMAND:
+                    LOG.info("speech finished")
+                    stt_start = time.perf_counter()
+                    self._after_cmd(chunk)
+                    # transcription is expected to take longer than a chunk,
+                    # the microphone buffers audio meanwhile, so it is not
+                    # counted as chunk processing time
+                    chunk_start += time.perf_counter() - stt_start
+
+                if self.chunk_callback is not None:
+                    self._chunk_info.energy = \
+                        self.debiased_energy(chunk, self.mic.sample_width)
+                    self.chunk_callback(self._chunk_info)
+                if self.metrics is not None or self.realtime is not None:
+                    self._observe_chunk(time.perf_counter() - chunk_start)
+        finally:
+            with self._swap_lock:
+                self._looping = False
+            # the loop is not using its components anymore
+            self._apply_swaps()
         LOG.info(f"Loop stopped running")
 
     def reset_state(self):
@@ -372,7 +611,7 @@ class DinkumVoiceLoop(VoiceLoop):
                                              self.hotwords.get_ww(ww))
         else:
             # Recording audio until user requests stop
-            self._chunk_info.is_speech = not self.vad.is_silence(chunk)
+            self._chunk_info.is_speech = self._vad_speech(chunk)
             self.stt_audio_bytes += chunk
             self.stt_chunks.append(chunk)
 
@@ -439,7 +678,7 @@ class DinkumVoiceLoop(VoiceLoop):
                 # emit record_end
                 self.record_end_callback()
             return True
-        elif time.time() - self.last_ww > 10:
+        elif self.clock() - self.last_ww > 10:
             # require wake word again
             self.hotwords.state = HotwordState.LISTEN
             self.state = ListeningState.SLEEPING
@@ -454,6 +693,8 @@ class DinkumVoiceLoop(VoiceLoop):
         @param chunk: bytes of audio captured
         @return: True if a hotword was detected
         """
+        if self._degraded("hotwords"):
+            return False
         self.hotwords.state = HotwordState.HOTWORD
 
         self.hotwords.update(chunk)
@@ -489,6 +730,7 @@ class DinkumVoiceLoop(VoiceLoop):
 
         ww = self.hotwords.found()
         if ww:
+            detected = time.monotonic()
             LOG.debug(f"Wake word detected={ww}")
             ww_data = self.hotwords.get_ww(ww)
 
@@ -520,13 +762,13 @@ class DinkumVoiceLoop(VoiceLoop):
                     self.state = ListeningState.BEFORE_COMMAND
                 # Wake word detected, begin recording voice command
                 self.reset_speech_timer()
+                self._mark("wakeword", detected)
                 self.stt_audio_bytes = bytes()
                 self.stt.stream_start()
-                if self.fallback_stt is not None:
-                    self.fallback_stt.stream_start()
+                self.start_fallback_stream()
 
             LOG.debug(f"STATE: {self.state}")
-            self.last_ww = time.time()
+            self.last_ww = self.clock()
             self.transformers.feed_hotword(chunk)
             return True
 
@@ -539,18 +781,20 @@ class DinkumVoiceLoop(VoiceLoop):
         @param chunk: bytes of audio captured
         """
         # Recording voice command, but user has not spoken yet
-        self._chunk_info.is_speech = not self.vad.is_silence(chunk)
+        self._chunk_info.is_speech = self._vad_speech(chunk)
         hot = False
         if self._chunk_info.is_speech:
+            if self.speech_seconds_left >= self.speech_seconds:
+                self._speech_start = time.monotonic()
             self.speech_seconds_left -= self.mic.seconds_per_chunk
             if self.speech_seconds_left <= 0:
                 # Voice command has started, so start looking for the end.
+                self._mark("speech", self._speech_start)
                 if self.listen_mode == ListeningMode.CONTINUOUS:
                     prev_audio = len(self.stt_chunks) * self.mic.seconds_per_chunk
                     LOG.debug(f"waiting for speech: {prev_audio}")
                     self.stt.stream_start()
-                    if self.fallback_stt is not None:
-                        self.fallback_stt.stream_start()
+                    self.start_fallback_stream()
                     self.state = ListeningState.IN_COMMAND
                 else:
                     self.state = ListeningState.BEFORE_COMMAND
@@ -599,7 +843,7 @@ class DinkumVoiceLoop(VoiceLoop):
         while self.stt_chunks:
             stt_chunk = self.stt_chunks.popleft()
             self.stt.stream_data(stt_chunk)
-            if self.fallback_stt is not None:
+            if self._fallback_streaming and self.fallback_stt is not None:
                 self.fallback_stt.stream_data(stt_chunk)
 
             self.timeout_seconds_left -= self.mic.seconds_per_chunk
@@ -607,23 +851,27 @@ class DinkumVoiceLoop(VoiceLoop):
             if self.timeout_seconds_with_silence_left <= 0 or self.timeout_seconds_left <= 0:
                 # Recording has timed out
                 self.state = ListeningState.AFTER_COMMAND
+                self._mark("speech_end")
                 LOG.debug(f"STATE: {self.state}")
                 break
 
             # Wait for enough speech before looking for the end of the
             # command (silence).
             try:
-                self._chunk_info.is_speech = not self.vad.is_silence(stt_chunk)
+                self._chunk_info.is_speech = self._vad_speech(stt_chunk)
             except Exception as e:
                 LOG.exception(f"Error processing chunk of "
                               f"size={len(stt_chunk)} with "
                               f"SR={self.vad.sample_rate}: {e}")
 
             if self._chunk_info.is_speech:
+                if self.speech_seconds_left >= self.speech_seconds:
+                    self._speech_start = time.monotonic()
                 self.speech_seconds_left -= self.mic.seconds_per_chunk
                 if self.speech_seconds_left <= 0:
                     # Voice command has started, so start looking for the
                     # end.
+                    self._mark("speech", self._speech_start)
                     self.state = ListeningState.IN_COMMAND
                     self.silence_seconds_left = self.silence_seconds
                     LOG.debug(f"STATE: {self.state}")
@@ -647,30 +895,52 @@ class DinkumVoiceLoop(VoiceLoop):
             stt_chunk = self.stt_chunks.popleft()
 
             self.stt.stream_data(stt_chunk)
-            if self.fallback_stt is not None:
+            if self._fallback_streaming and self.fallback_stt is not None:
                 self.fallback_stt.stream_data(stt_chunk)
 
             self.timeout_seconds_left -= self.mic.seconds_per_chunk
             if self.timeout_seconds_left <= 0:
                 # Recording has timed out
                 self.state = ListeningState.AFTER_COMMAND
+                self._mark("speech_end")
                 LOG.debug(f"STATE: {self.state}")
                 break
 
             # Wait for enough silence before considering the command to be
             # ended.
-            self._chunk_info.is_speech = not self.vad.is_silence(stt_chunk)
+            self._chunk_info.is_speech = self._vad_speech(stt_chunk)
             if not self._chunk_info.is_speech:
                 self.silence_seconds_left -= self.mic.seconds_per_chunk
                 if self.silence_seconds_left <= 0:
                     # End of voice command detected
                     self.state = ListeningState.AFTER_COMMAND
+                    self._mark("speech_end")
                     LOG.debug(f"STATE: {self.state}")
                     break
             else:
                 # Reset
                 self.silence_seconds_left = self.silence_seconds
 
+    def _vad_speech(self, chunk: bytes) -> bool:
+        """
+        Check a chunk for speech with the VAD plugin
+        @param chunk: bytes of audio captured
+        @return: True if the chunk contains speech
+        """
+        if self.metrics is None:
+            return not self.vad.is_silence(chunk)
+        start = time.perf_counter()
+        try:
+            return not self.vad.is_silence(chunk)
+        finally:
+            self.metrics.vad.observe(time.perf_counter() - start)
+
+    def _observe_stt(self, stt: StreamingSTT, role: str, start: float):
+        if self.metrics is not None:
+            engine = getattr(stt, "engine", stt)
+            self.metrics.stt.observe(time.perf_counter() - start,
+                                     engine=type(engine).__name__, role=role)
+
     def _validate_lang(self, lang: str) -> str:
         """
         ensure lang classification from speech is one of the valid langs
@@ -679,9 +949,9 @@ class DinkumVoiceLoop(VoiceLoop):
         @param lang: BCP-47 language code to evaluate
         @return: validated language (or default)
         """
-        default_lang = Configuration().get("lang", "en-us")
-        valid_langs = [default_lang] + Configuration().get("secondary_langs", [])
-        valid_langs = [l.lower().split("-")[0] for l in valid_langs]
+        settings = get_settings()
+        default_lang = settings.lang
+        valid_langs = list(settings.valid_langs)
         l2 = lang.lower().split("-")[0]
         if l2 in valid_langs:
             if l2 != default_lang.lower().split("-")[0]:
@@ -693,10 +963,12 @@ class DinkumVoiceLoop(VoiceLoop):
 
         return default_lang
 
-    def _get_tx(self, stt_context: dict) -> (str, dict):
+    def _get_tx(self, stt_context: dict,
+                speculative: Optional[SpeculativeTranscription] = None) -> (str, dict):
         """
         Get a string transcription of audio that was previously streamed to STT.
         @param stt_context: dict context determined by transformers service
+        @param speculative: transcription started before stt_context was known
         @return: string transcription and dict context
         """
         # handle lang detection from speech
@@ -707,24 +979,49 @@ class DinkumVoiceLoop(VoiceLoop):
             # note: self.stt.stream is recreated every listen start
             # this is safe to do, and makes lang be passed to self.execute
             self.stt.stream.language = lang
-            if self.fallback_stt:
+            if self._fallback_streaming and self.fallback_stt is not None:
                 self.fallback_stt.stream.language = lang
 
         # get text and trigger callback
-        try:
-            utts = self.stt.transcribe(lang=lang) or []
-        except Exception as e:
-            LOG.exception(f"Primary STT transcription failed: {str(e)}")
-            LOG.exception("STT failed")
-            utts = []
-
-        if not utts and self.fallback_stt is not None:
+        stt_start = time.perf_counter()
+        if speculative is not None:
+            if speculative.is_hit(lang):
+                self.speculative_stt_hits += 1
+            else:
+                self.speculative_stt_misses += 1
+            total = self.speculative_stt_hits + self.speculative_stt_misses
+            LOG.debug(f"Speculative STT misprediction rate: "
+                      f"{self.speculative_stt_misses}/{total}")
+            utts = speculative.result(lang)
+        else:
+            try:
+                utts = self.stt.transcribe(lang=lang) or []
+            except Exception as e:
+                LOG.exception(f"Primary STT transcription failed: {str(e)}")
+                LOG.exception("STT failed")
+                utts = []
+        self._observe_stt(self.stt, "primary", stt_start)
+        self._mark("stt")
+
+        if not utts and self.fallback_stt is not None and \
+                not self._degraded("fallback_stt"):
             LOG.info("Attempting fallback STT plugin")
+            stt_start = time.perf_counter()
             try:
-                utts = self.fallback_stt.transcribe(lang=lang) or []
+                if self._fallback_streaming:
+                    utts = self.fallback_stt.transcribe(lang=lang) or []
+                else:
+                    # replay the recorded utterance in a single call
+                    from speech_recognition import AudioData
+                    audio = AudioData(self.stt_audio_bytes,
+                                      sample_rate=self.mic.sample_rate,
+                                      sample_width=self.mic.sample_width)
+                    utts = self.fallback_stt.transcribe(audio, lang=lang) or []
             except Exception as e:
                 LOG.exception(f"Fallback STT transcription failed: {str(e)}")
                 LOG.exception("Fallback STT failed")
+            self._observe_stt(self.fallback_stt, "fallback", stt_start)
+            self._mark("fallback_stt")
 
         if not utts:
             LOG.warning("STT transcription failed!")
@@ -780,12 +1077,28 @@ class DinkumVoiceLoop(VoiceLoop):
         the next command.
         @param chunk: bytes of audio captured
         """
-        # Command has ended, call transformers pipeline before STT
-        chunk, stt_context = self.transformers.transform(chunk)
+        if self._trace is None or "speech_end" not in self._trace.marks:
+            # eg. a remote audio stream ended mid-speech
+            self._mark("speech_end")
         if isinstance(self.stt, FakeStreamingSTT) and self.remove_silence:
             self._vad_remove_silence()
 
-        utts, stt_context = self._get_tx(stt_context)
+        # Transcribe in the default language while transformers run, they
+        # may request a different language, in which case STT runs again
+        speculative = None
+        if self.speculative_stt and self.transformers.plugins and \
+                isinstance(self.stt, FakeStreamingSTT) and \
+                self.stt.stream is not None:
+            speculative = SpeculativeTranscription(self.stt, self.stt.lang)
+            speculative.start()
+
+        # Command has ended, call transformers pipeline before STT
+        # stt_audio_bytes is immutable, so the view can not be modified
+        chunk, stt_context = self.transformers.transform(
+            chunk, utterance=memoryview(self.stt_audio_bytes))
+        self._mark("transformers")
+
+        utts, stt_context = self._get_tx(stt_context, speculative)
         LOG.info(f"Raw transcription: {utts}")
         if utts:
             LOG.debug(f"transformers metadata: {stt_context}")
@@ -800,9 +1113,16 @@ class DinkumVoiceLoop(VoiceLoop):
             # emit record_end
             self.record_end_callback()
 
+        # Mark the hand off before serializing, so the trace attached to the
+        # utterance includes the emit span
+        if self._trace is not None:
+            self._mark("emit")
+            stt_context["trace"] = self._trace.as_dict()
+
         # Callback to handle STT text
         if self.text_callback is not None:
             self.text_callback(utts, stt_context)
+        self._finish_trace()
 
         # Back to detecting wake word
         if self.listen_mode == ListeningMode.CONTINUOUS or \
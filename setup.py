@@ -94,7 +94,10 @@ setup(
     ],
     entry_points={
         'console_scripts': [
-            'ovos-dinkum-listener=ovos_dinkum_listener.__main__:main'
+            'ovos-dinkum-listener=ovos_dinkum_listener.__main__:main',
+            'ovos-listener-export-audio='
+            'ovos_dinkum_listener.audio_writer:export_main',
+            'ovos-listener-replay=ovos_dinkum_listener.replay:replay_main'
         ]
     }
 )
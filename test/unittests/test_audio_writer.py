@@ -0,0 +1,138 @@
+import json
+import unittest
+import wave
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from threading import Event
+from unittest.mock import patch
+
+
+class TestAudioWriter(unittest.TestCase):
+    def test_write(self):
+        from ovos_dinkum_listener.audio_writer import AudioWriter, SaveJob
+        config = {"listener": {"audio_writer": {"fsync": "batch"}}}
+        writer = AudioWriter(config)
+        self.assertEqual(writer.fsync, "batch")
+        with TemporaryDirectory() as tmp:
+            directory = Path(tmp) / "utterances"
+            job = SaveJob(directory=directory, filename="test",
+                          audio=bytes(3200), meta={"lang": "en-us"})
+            self.assertTrue(writer.submit(job))
+            writer.flush()
+            with wave.open(str(job.audio_path), "rb") as wav:
+                self.assertEqual(wav.getframerate(), 16000)
+                self.assertEqual(wav.getnframes(), 1600)
+            with open(job.meta_path) as f:
+                self.assertEqual(json.load(f), {"lang": "en-us"})
+            size = job.audio_path.stat().st_size + \
+                job.meta_path.stat().st_size
+            self.assertEqual(writer.metrics, {"pending": 0, "written": 1,
+                                              "bytes": size, "dropped": 0})
+            writer.shutdown()
+            self.assertFalse(writer.running)
+
+    def test_deferred_filename(self):
+        from threading import get_ident
+        from ovos_dinkum_listener.audio_writer import AudioWriter, SaveJob
+        writer = AudioWriter({})
+        threads = []
+
+        def filename_fn(meta):
+            threads.append(get_ident())
+            return meta["name"]
+
+        with TemporaryDirectory() as tmp:
+            job = SaveJob(directory=Path(tmp), filename=None, audio=bytes(32),
+                          meta={"name": "test"}, filename_fn=filename_fn)
+            self.assertTrue(writer.submit(job))
+            writer.flush()
+            self.assertEqual(job.filename, "test")
+            self.assertTrue(job.audio_path.is_file())
+            self.assertNotEqual(threads, [get_ident()])
+            self.assertEqual(len(threads), 1)
+
+            # a failing name is logged and the job skipped
+            def fail(meta):
+                raise KeyError("name")
+            writer.submit(SaveJob(directory=Path(tmp), filename=None,
+                                  audio=b'', meta={}, filename_fn=fail))
+            writer.flush()
+            self.assertEqual(writer.written, 1)
+            writer.shutdown()
+
+    def test_flac_export(self):
+        import os
+        from ovos_dinkum_listener.audio_writer import AudioWriter, SaveJob, \
+            export_wav
+        config = {"listener": {"audio_writer": {"format": "flac"}}}
+        writer = AudioWriter(config)
+        audio = os.urandom(3200)
+        with TemporaryDirectory() as tmp:
+            job = SaveJob(directory=Path(tmp) / "src" / "utterances",
+                          filename="test", audio=audio, meta={},
+                          audio_format=writer.audio_format)
+            writer.submit(job)
+            writer.shutdown()
+            self.assertEqual(job.audio_path.suffix, ".flac")
+            with open(job.audio_path, "rb") as f:
+                self.assertEqual(f.read(4), b"fLaC")
+
+            dst = Path(tmp) / "dst"
+            self.assertEqual(export_wav(Path(tmp) / "src", dst), 1)
+            with wave.open(str(dst / "utterances" / "test.wav"), "rb") as wav:
+                self.assertEqual(wav.readframes(1600), audio)
+
+    def test_retention(self):
+        from ovos_dinkum_listener.audio_writer import AudioWriter, SaveJob
+        with TemporaryDirectory() as tmp:
+            config = {"listener": {"audio_writer": {"max_bytes": 10000}}}
+            writer = AudioWriter(config, index_path=Path(tmp) / "index.db")
+            self.assertTrue(writer.retention)
+            jobs = [SaveJob(directory=Path(tmp), filename=str(idx),
+                            audio=bytes(3200), meta={}) for idx in range(4)]
+            for job in jobs:
+                writer.submit(job)
+                writer.flush()
+            # oldest files are removed once the size limit is exceeded
+            self.assertFalse(jobs[0].audio_path.exists())
+            self.assertFalse(jobs[0].meta_path.exists())
+            self.assertTrue(jobs[-1].audio_path.exists())
+            self.assertLessEqual(writer._index.total_bytes, 10000)
+            writer.shutdown()
+
+            # index is persisted, age limit applies to existing files
+            config = {"listener": {"audio_writer": {"max_age_days": 1e-9}}}
+            writer = AudioWriter(config, index_path=Path(tmp) / "index.db")
+            writer.submit(SaveJob(directory=Path(tmp), filename="new",
+                                  audio=bytes(32), meta={}))
+            writer.shutdown()
+            self.assertEqual(list(Path(tmp).glob("*.wav")), [])
+
+    def test_drop_on_full(self):
+        from ovos_dinkum_listener.audio_writer import AudioWriter, SaveJob
+        config = {"listener": {"audio_writer": {"queue_size": 1,
+                                                "batch_size": 1}}}
+        writer = AudioWriter(config)
+        started = Event()
+        release = Event()
+
+        def _blocking(_):
+            started.set()
+            release.wait(5)
+
+        job = SaveJob(directory=Path("/tmp"), filename="test", audio=b'',
+                      meta={})
+        with patch.object(writer, "_write", side_effect=_blocking):
+            self.assertTrue(writer.submit(job))
+            self.assertTrue(started.wait(5))
+            self.assertTrue(writer.submit(job))
+            # writer busy and queue full
+            self.assertFalse(writer.submit(job))
+            self.assertEqual(writer.dropped, 1)
+            release.set()
+            writer.shutdown()
+        self.assertEqual(writer.written, 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,138 @@
+import mmap
+import unittest
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from unittest.mock import patch
+
+
+class TestDataset(unittest.TestCase):
+    def test_write_read(self):
+        from ovos_dinkum_listener.dataset import DatasetReader, DatasetWriter
+        with TemporaryDirectory() as tmp:
+            writer = DatasetWriter(Path(tmp), shard_size=50)
+            self.assertEqual(writer.append(b'\x01' * 64, {"idx": 0}),
+                             "shard-00000.bin#0")
+            writer.append(b'\x02' * 64, {"idx": 1})
+            writer.append(b'\x03' * 8, {"idx": 2}, sample_rate=8000)
+            writer.close()
+
+            reader = DatasetReader(Path(tmp))
+            # shards rotate by size, sealed shards get an offset index
+            self.assertEqual(len(reader.shards()), 3)
+            self.assertTrue((Path(tmp) / "shard-00000.idx").exists())
+            self.assertFalse((Path(tmp) / "shard-00002.idx").exists())
+            self.assertEqual(len(reader), 3)
+            records = list(reader)
+            self.assertEqual([r.meta["idx"] for r in records], [0, 1, 2])
+            self.assertIsInstance(records[0].audio, memoryview)
+            self.assertEqual(bytes(records[1].audio), b'\x02' * 64)
+            self.assertEqual(records[2].sample_rate, 8000)
+
+    def test_unmap_shards(self):
+        from ovos_dinkum_listener.dataset import DatasetReader, DatasetWriter
+        with TemporaryDirectory() as tmp:
+            writer = DatasetWriter(Path(tmp), shard_size=50)
+            for idx in range(3):
+                writer.append(bytes([idx]) * 64, {"idx": idx})
+            writer.close()
+
+            maps = []
+            real_mmap = mmap.mmap
+
+            def _mmap(*args, **kwargs):
+                maps.append(real_mmap(*args, **kwargs))
+                return maps[-1]
+
+            with patch("ovos_dinkum_listener.dataset.mmap.mmap",
+                       side_effect=_mmap):
+                audio = [bytes(record.audio)
+                         for record in DatasetReader(Path(tmp))]
+                self.assertEqual(audio[2], b'\x02' * 64)
+                # shards are unmapped once iteration moved past them
+                self.assertEqual(len(maps), 3)
+                self.assertTrue(maps[0].closed)
+                self.assertTrue(maps[1].closed)
+
+                # referenced records keep their shard mapped
+                records = list(DatasetReader(Path(tmp)))
+                self.assertFalse(maps[3].closed)
+                self.assertEqual(bytes(records[0].audio), b'\x00' * 64)
+
+                # stopping early unmaps the current shard
+                reader = iter(DatasetReader(Path(tmp)))
+                self.assertEqual(next(reader).meta, {"idx": 0})
+                reader.close()
+                self.assertTrue(maps[-1].closed)
+
+    def test_resume_truncated(self):
+        from ovos_dinkum_listener.dataset import DatasetReader, DatasetWriter
+        with TemporaryDirectory() as tmp:
+            writer = DatasetWriter(Path(tmp))
+            writer.append(b'\x01' * 32, {"idx": 0})
+            writer.close()
+            shard = Path(tmp) / "shard-00000.bin"
+            end = shard.stat().st_size
+            # simulate a crash while writing a record
+            with open(shard, "ab") as f:
+                f.write(b"ODR1\xff")
+
+            writer = DatasetWriter(Path(tmp))
+            self.assertEqual(writer.append(b'\x02' * 32, {"idx": 1}),
+                             f"shard-00000.bin#{end}")
+            writer.close()
+            records = list(DatasetReader(Path(tmp)))
+            self.assertEqual([r.meta["idx"] for r in records], [0, 1])
+
+    def test_audio_writer_dataset(self):
+        from ovos_dinkum_listener.audio_writer import AudioWriter, SaveJob
+        from ovos_dinkum_listener.dataset import DatasetReader
+        config = {"listener": {"audio_writer": {"format": "dataset"}}}
+        writer = AudioWriter(config)
+        with TemporaryDirectory() as tmp:
+            job = SaveJob(directory=Path(tmp), filename="test",
+                          audio=bytes(320), meta={"lang": "en-us"},
+                          audio_format=writer.audio_format)
+            self.assertTrue(job.uri.endswith("/dataset#test"))
+            writer.submit(job)
+            writer.shutdown()
+            self.assertEqual(list(Path(tmp).glob("*.wav")), [])
+            records = list(DatasetReader(Path(tmp) / "dataset"))
+            self.assertEqual(records[0].meta, {"lang": "en-us",
+                                               "filename": "test"})
+
+    def test_audio_writer_dataset_retention(self):
+        from ovos_dinkum_listener.audio_writer import AudioWriter, SaveJob
+        from ovos_dinkum_listener.dataset import DatasetReader
+        with TemporaryDirectory() as tmp:
+            config = {"listener": {"audio_writer": {"format": "dataset",
+                                                    "max_bytes": 2000}}}
+            writer = AudioWriter(config, index_path=Path(tmp) / "index.db")
+            # one record per shard
+            writer.shard_size = 1
+            self.assertTrue(writer.retention)
+            for idx in range(4):
+                writer.submit(SaveJob(directory=Path(tmp), filename=str(idx),
+                                      audio=bytes(640), meta={},
+                                      audio_format=writer.audio_format))
+                writer.flush()
+            writer.shutdown()
+
+            # oldest sealed shards are deleted whole, with their index
+            dataset = Path(tmp) / "dataset"
+            shards = [p.name for p in DatasetReader(dataset).shards()]
+            self.assertEqual(shards, ["shard-00002.bin", "shard-00003.bin"])
+            self.assertEqual(sorted(p.name for p in dataset.glob("*.idx")),
+                             ["shard-00002.idx", "shard-00003.idx"])
+            self.assertEqual([r.meta["filename"]
+                              for r in DatasetReader(dataset)], ["2", "3"])
+
+            # headers, metadata and offset indexes count as written bytes,
+            # all four shards hold a record of the same size
+            shard_bytes = sum(p.stat().st_size
+                              for p in dataset.glob("shard-00003.*"))
+            self.assertGreater(shard_bytes, 640)
+            self.assertEqual(writer.bytes_written, 4 * shard_bytes)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,84 @@
+import unittest
+from threading import Event
+from unittest.mock import Mock
+
+from ovos_bus_client.message import Message
+
+
+class TestBusEmitter(unittest.TestCase):
+    def test_emit_order(self):
+        from ovos_dinkum_listener.emitter import BusEmitter
+        bus = Mock()
+        emitter = BusEmitter(bus)
+        for idx in range(5):
+            emitter.emit(Message(f"test.{idx}"))
+        self.assertTrue(emitter.flush(5))
+        self.assertEqual([c[0][0].msg_type for c in bus.emit.call_args_list],
+                         [f"test.{idx}" for idx in range(5)])
+        self.assertEqual(emitter.metrics, {"pending": 0, "sent": 5,
+                                           "dropped": 0})
+        emitter.shutdown()
+
+    def test_stuck_bus(self):
+        from ovos_dinkum_listener.emitter import BusEmitter
+        release = Event()
+        started = Event()
+        bus = Mock()
+        bus.emit.side_effect = lambda _: started.set() or release.wait(5)
+        emitter = BusEmitter(bus, queue_size=2)
+        emitter.emit(Message("test.blocked"))
+        self.assertTrue(started.wait(5))
+
+        # emitting never blocks, non priority messages are dropped first
+        emitter.emit(Message("recognizer_loop:record_begin"))
+        emitter.emit(Message("test.low"))
+        emitter.emit(Message("recognizer_loop:utterance"))
+        self.assertEqual(emitter.dropped, 1)
+        release.set()
+        self.assertTrue(emitter.flush(5))
+        self.assertEqual([c[0][0].msg_type for c in bus.emit.call_args_list],
+                         ["test.blocked", "recognizer_loop:record_begin",
+                          "recognizer_loop:utterance"])
+        emitter.shutdown()
+
+    def test_only_priority_pending(self):
+        from ovos_dinkum_listener.emitter import BusEmitter
+        release = Event()
+        started = Event()
+        bus = Mock()
+        bus.emit.side_effect = lambda _: started.set() or release.wait(5)
+        emitter = BusEmitter(bus, queue_size=2)
+        emitter.emit(Message("test.blocked"))
+        self.assertTrue(started.wait(5))
+        emitter.emit(Message("recognizer_loop:record_begin"))
+        emitter.emit(Message("recognizer_loop:record_end"))
+
+        # a low priority message never evicts a priority one
+        emitter.emit(Message("test.low"))
+        self.assertEqual(emitter.dropped, 1)
+        # the oldest priority message makes room for a new one
+        emitter.emit(Message("recognizer_loop:utterance"))
+        self.assertEqual(emitter.dropped, 2)
+        release.set()
+        self.assertTrue(emitter.flush(5))
+        self.assertEqual([c[0][0].msg_type for c in bus.emit.call_args_list],
+                         ["test.blocked", "recognizer_loop:record_end",
+                          "recognizer_loop:utterance"])
+        emitter.shutdown()
+
+    def test_emit_after_shutdown(self):
+        from ovos_dinkum_listener.emitter import BusEmitter
+        bus = Mock()
+        emitter = BusEmitter(bus)
+        emitter.emit(Message("test.sent"))
+        emitter.shutdown()
+        bus.emit.assert_called_once()
+
+        emitter.emit(Message("test.late"))
+        self.assertIsNone(emitter._thread)
+        self.assertEqual(emitter.metrics["pending"], 0)
+        bus.emit.assert_called_once()
+
+
+if __name__ == '__main__':
+    unittest.main()
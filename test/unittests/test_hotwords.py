@@ -1,4 +1,5 @@
 import unittest
+from unittest.mock import Mock, patch
 
 
 class TestCyclicAudioBuffer(unittest.TestCase):
@@ -20,6 +21,66 @@ class TestHotwordContainer(unittest.TestCase):
     from ovos_dinkum_listener.voice_loop.hotwords import HotwordContainer
     # TODO
 
+    @patch("ovos_dinkum_listener.voice_loop.hotwords.OVOSWakeWordFactory")
+    @patch("ovos_dinkum_listener.voice_loop.hotwords.Configuration")
+    def test_reload_hotword(self, config, factory):
+        from ovos_dinkum_listener.voice_loop.hotwords import HotwordContainer
+        config.return_value = {
+            "listener": {"wake_word": "hey_mycroft"},
+            "hotwords": {"hey_mycroft": {"module": "ww"},
+                         "stop": {"module": "ww", "active": True,
+                                  "stopword": True}}}
+        factory.create_hotword.side_effect = lambda word: Mock(word=word)
+        container = HotwordContainer()
+        self.addCleanup(container.shutdown)
+        container.load_hotword_engines()
+        stop = container._plugins["stop"]["engine"]
+        old = container._plugins["hey_mycroft"]["engine"]
+
+        # only the reloaded engine is replaced, after on_load
+        on_load = Mock()
+        container.reload_hotword("hey_mycroft", on_load=on_load)
+        new = container._plugins["hey_mycroft"]["engine"]
+        on_load.assert_called_once_with("hey_mycroft", new)
+        self.assertIsNot(new, old)
+        old.shutdown.assert_called_once()
+        self.assertIs(container._plugins["stop"]["engine"], stop)
+        self.assertEqual(list(container.listen_words), ["hey_mycroft"])
+
+        # disabled hotwords are unloaded
+        config.return_value["hotwords"]["stop"]["active"] = False
+        container.reload_hotword("stop")
+        self.assertNotIn("stop", container.ww_names)
+        stop.shutdown.assert_called_once()
+
+        # the plugins dict shared by all containers is updated in place
+        self.assertIs(HotwordContainer._plugins, container._plugins)
+        self.assertNotIn("_plugins", vars(container))
+
+    @patch("ovos_dinkum_listener.voice_loop.hotwords.OVOSWakeWordFactory")
+    @patch("ovos_dinkum_listener.voice_loop.hotwords.Configuration")
+    def test_update_metadata(self, config, factory):
+        from ovos_dinkum_listener.voice_loop.hotwords import HotwordContainer
+        config.return_value = {
+            "listener": {"wake_word": "hey_mycroft"},
+            "hotwords": {"hey_mycroft": {"module": "ww"}}}
+        factory.create_hotword.side_effect = lambda word: Mock(word=word)
+        container = HotwordContainer()
+        self.addCleanup(container.shutdown)
+        container.load_hotword_engines()
+        engine = container._plugins["hey_mycroft"]["engine"]
+        self.assertIsNone(container._plugins["hey_mycroft"]["sound"])
+
+        # listen sounds change without creating a new engine
+        config.return_value["confirm_listening"] = True
+        config.return_value["sounds"] = {"start_listening": "/tmp/start.wav"}
+        container.update_metadata()
+        plugin = container._plugins["hey_mycroft"]
+        self.assertEqual(plugin["sound"], "/tmp/start.wav")
+        self.assertIs(plugin["engine"], engine)
+        self.assertEqual(factory.create_hotword.call_count, 1)
+        engine.shutdown.assert_not_called()
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,57 @@
+import subprocess
+import sys
+import unittest
+from os import environ
+
+# seconds, measured at 0.65-0.95s, with headroom for noisy CI runners
+TOTAL_BUDGET = float(environ.get("OVOS_LISTENER_IMPORT_BUDGET", 1.5))
+OWN_BUDGET = float(environ.get("OVOS_LISTENER_OWN_IMPORT_BUDGET", 0.3))
+
+
+# only imported when the feature using them is enabled or first used
+DEFERRED_MODULES = (
+    "speech_recognition",
+    "ovos_dinkum_listener.dataset",
+    "ovos_dinkum_listener.metrics",
+    "ovos_dinkum_listener.profiler",
+    "ovos_dinkum_listener.realtime",
+    "ovos_dinkum_listener.remote_audio",
+    "ovos_dinkum_listener.stt_pool",
+    "ovos_dinkum_listener.telemetry",
+    "ovos_dinkum_listener.tracing"
+)
+
+
+def _import_times(module: str) -> dict:
+    """
+    Import a module in a fresh interpreter with `-X importtime`
+    @return: dict of module name to (self, cumulative) import seconds
+    """
+    p = subprocess.run([sys.executable, "-X", "importtime", "-c",
+                        f"import {module}"],
+                       capture_output=True, text=True, check=True)
+    times = {}
+    for line in p.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        own, cumulative, name = line[len("import time:"):].split("|")
+        times[name.strip()] = (int(own) / 1e6, int(cumulative) / 1e6)
+    return times
+
+
+class TestImportTime(unittest.TestCase):
+    def test_main_import_budget(self):
+        times = _import_times("ovos_dinkum_listener.__main__")
+        total = times["ovos_dinkum_listener.__main__"][1]
+        self.assertLess(total, TOTAL_BUDGET,
+                        f"importing the listener took {total:.3f}s")
+
+        own = sum(t[0] for name, t in times.items()
+                  if name.startswith("ovos_dinkum_listener"))
+        self.assertLess(own, OWN_BUDGET,
+                        f"listener modules took {own:.3f}s to import")
+
+    def test_deferred_imports(self):
+        times = _import_times("ovos_dinkum_listener.__main__")
+        for module in DEFERRED_MODULES:
+            self.assertNotIn(module, times)
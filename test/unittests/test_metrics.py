@@ -0,0 +1,70 @@
+import unittest
+from urllib.error import HTTPError
+from urllib.request import urlopen
+
+from ovos_dinkum_listener.metrics import Counter, Gauge, Histogram, \
+    ListenerMetrics, MetricsExporter, MetricsRegistry
+
+
+class TestMetrics(unittest.TestCase):
+    def test_counter(self):
+        registry = MetricsRegistry()
+        plain = registry.register(Counter("plain_total", "Plain counter"))
+        labeled = registry.register(Counter("labeled_total", "Labeled",
+                                            labelnames=("engine",)))
+        labeled.inc(engine="a")
+        labeled.inc(2, engine='b"c')
+        self.assertEqual(labeled.value(engine="a"), 1)
+        self.assertEqual(registry.render(),
+                         '# HELP plain_total Plain counter\n'
+                         '# TYPE plain_total counter\n'
+                         'plain_total 0.0\n'
+                         '# HELP labeled_total Labeled\n'
+                         '# TYPE labeled_total counter\n'
+                         'labeled_total{engine="a"} 1.0\n'
+                         'labeled_total{engine="b\\"c"} 2.0\n')
+        plain.fn = lambda: 42
+        self.assertIn("plain_total 42.0\n", registry.render())
+        with self.assertRaises(ValueError):
+            registry.register(Gauge("plain_total", "Duplicate"))
+
+    def test_histogram(self):
+        registry = MetricsRegistry()
+        hist = registry.register(Histogram("latency_seconds", "Latency",
+                                           buckets=(0.1, 1.0)))
+        for value in (0.05, 0.5, 0.7, 3.0):
+            hist.observe(value)
+        self.assertEqual(hist.count(), 4)
+        lines = registry.render().splitlines()[2:]
+        self.assertEqual(lines, ['latency_seconds_bucket{le="0.1"} 1.0',
+                                 'latency_seconds_bucket{le="1.0"} 3.0',
+                                 'latency_seconds_bucket{le="+Inf"} 4.0',
+                                 'latency_seconds_sum 4.25',
+                                 'latency_seconds_count 4.0'])
+        with self.assertRaises(TypeError):
+            hist.inc()
+
+    def test_exporter(self):
+        metrics = ListenerMetrics()
+        metrics.observe_chunk(0.002, 0.032)
+        metrics.stt.observe(0.4, engine="FakeSTT", role="primary")
+        exporter = MetricsExporter(metrics, port=0)
+        exporter.start()
+        self.addCleanup(exporter.shutdown)
+        self.assertTrue(exporter.running)
+        self.assertNotEqual(exporter.port, 0)
+
+        url = f"http://127.0.0.1:{exporter.port}"
+        with urlopen(f"{url}/metrics") as response:
+            self.assertTrue(response.headers["Content-Type"].startswith(
+                "text/plain; version=0.0.4"))
+            text = response.read().decode("utf-8")
+        self.assertIn("listener_chunks_total 1.0\n", text)
+        self.assertIn("listener_chunk_duration_seconds 0.032\n", text)
+        self.assertIn('listener_stt_seconds_count{engine="FakeSTT",'
+                      'role="primary"} 1.0\n', text)
+        with self.assertRaises(HTTPError):
+            urlopen(f"{url}/other")
+
+        exporter.shutdown()
+        self.assertFalse(exporter.running)
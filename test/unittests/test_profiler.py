@@ -0,0 +1,71 @@
+import pstats
+import unittest
+from os.path import join
+from tempfile import TemporaryDirectory
+from threading import Event, Thread, get_ident
+
+from ovos_dinkum_listener.profiler import ThreadProfiler
+
+
+def _busy_leaf(stop: Event):
+    while not stop.is_set():
+        sum(range(100))
+
+
+def _busy_root(stop: Event, ident: list):
+    ident.append(get_ident())
+    _busy_leaf(stop)
+
+
+class TestThreadProfiler(unittest.TestCase):
+    def test_profile_thread(self):
+        stop = Event()
+        ident = []
+        thread = Thread(target=_busy_root, args=(stop, ident), daemon=True)
+        thread.start()
+        self.addCleanup(stop.set)
+        while not ident:
+            pass
+
+        done = Event()
+        profiler = ThreadProfiler(ident[0], interval=0.001)
+        profiler.start(0.2, lambda p: done.set())
+        self.assertTrue(done.wait(5))
+        self.assertFalse(profiler.running)
+        self.assertGreater(profiler.total_samples, 10)
+        # only the profiled thread is sampled
+        for stack in profiler.samples:
+            self.assertIn("_busy_root", [func[2] for func in stack])
+
+        with TemporaryDirectory() as tmp:
+            folded = join(tmp, "loop.folded")
+            profiler.write_folded(folded)
+            with open(folded) as f:
+                lines = f.read().splitlines()
+            self.assertTrue(lines)
+            self.assertEqual(sum(int(line.rsplit(" ", 1)[1])
+                                 for line in lines), profiler.total_samples)
+            self.assertIn("_busy_root (test_profiler.py:", lines[0])
+
+            pstats_path = join(tmp, "loop.pstats")
+            profiler.write_pstats(pstats_path)
+            stats = pstats.Stats(pstats_path)
+        leaf = [func for func in stats.stats if func[2] == "_busy_leaf"][0]
+        root = [func for func in stats.stats if func[2] == "_busy_root"][0]
+        # every sample is inside _busy_root, most of them in _busy_leaf
+        self.assertEqual(stats.stats[root][0], profiler.total_samples)
+        self.assertIn(root, stats.stats[leaf][4])
+
+    def test_stop_and_exited_thread(self):
+        done = Event()
+        # idents of exited threads are reused, use one that never exists
+        profiler = ThreadProfiler(-1)
+        profiler.start(10, lambda p: done.set())
+        self.assertTrue(done.wait(5))
+        self.assertEqual(profiler.total_samples, 0)
+
+        profiler = ThreadProfiler(get_ident(), interval=0.01)
+        profiler.start(60)
+        profiler.stop()
+        profiler.join(5)
+        self.assertFalse(profiler.running)
@@ -0,0 +1,40 @@
+import unittest
+
+from ovos_dinkum_listener.realtime import RealtimeMonitor
+
+
+class TestRealtimeMonitor(unittest.TestCase):
+    def _window(self, monitor: RealtimeMonitor, rtf: float):
+        """ process one window of 0.1 second chunks at the given rtf """
+        changes = [monitor.update(0.1 * rtf, 0.1) for _ in range(10)]
+        return [c for c in changes if c is not None]
+
+    def test_degrade_and_recover(self):
+        monitor = RealtimeMonitor(window=1.0, recover_windows=2)
+        self.assertEqual(self._window(monitor, 0.5), [])
+        self.assertAlmostEqual(monitor.realtime_factor, 0.5)
+
+        # one degradation per window above the threshold, in order
+        self.assertEqual(self._window(monitor, 1.5), [("transformers", True)])
+        self.assertEqual(self._window(monitor, 1.2), [("fallback_stt", True)])
+        self.assertEqual(self._window(monitor, 1.1), [("hotwords", True)])
+        self.assertEqual(self._window(monitor, 1.1), [])
+        self.assertTrue(monitor.is_active("fallback_stt"))
+
+        # hysteresis, windows between the thresholds do not restore work
+        self.assertEqual(self._window(monitor, 0.9), [])
+        self.assertEqual(self._window(monitor, 0.5), [])
+        self.assertEqual(self._window(monitor, 0.9), [])
+        self.assertEqual(self._window(monitor, 0.5), [])
+        # restored in reverse order after recover_windows windows
+        self.assertEqual(self._window(monitor, 0.5), [("hotwords", False)])
+        self.assertEqual(self._window(monitor, 0.5), [])
+        self.assertEqual(self._window(monitor, 0.5), [("fallback_stt", False)])
+        self.assertEqual(monitor.active, ["transformers"])
+
+    def test_configured_degradations(self):
+        monitor = RealtimeMonitor(["hotwords", "unknown"], window=1.0)
+        self.assertEqual(monitor.degradations, ["hotwords"])
+        self.assertEqual(self._window(monitor, 2.0), [("hotwords", True)])
+        self.assertEqual(self._window(monitor, 2.0), [])
+        self.assertFalse(monitor.is_active("transformers"))
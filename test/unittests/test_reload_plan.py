@@ -0,0 +1,145 @@
+import unittest
+from copy import deepcopy
+
+from ovos_config import Configuration
+
+from ovos_dinkum_listener.reload_plan import LISTENER_ACTIONS, LOOP_FIELDS, \
+    ReloadAction, loop_settings, plan_reload
+
+A = ReloadAction
+
+# listener key -> (changed value, expected actions, expected hotwords)
+LISTENER_TABLE = {
+    "instant_listen": (False, {A.UPDATE_LOOP}, set()),
+    "speech_begin": (0.5, {A.UPDATE_LOOP}, set()),
+    "silence_end": (1.2, {A.UPDATE_LOOP}, set()),
+    "recording_timeout": (20.0, {A.UPDATE_LOOP}, set()),
+    "recording_timeout_with_silence": (6.0, {A.UPDATE_LOOP}, set()),
+    "recording_mode_max_silence_seconds": (60.0, {A.UPDATE_LOOP}, set()),
+    "utterance_chunks_to_rewind": (4, {A.RESTART_LOOP}, set()),
+    "wakeword_chunks_to_save": (30, {A.RESTART_LOOP}, set()),
+    "remove_silence": (False, {A.UPDATE_LOOP}, set()),
+    "min_stt_confidence": (0.8, {A.UPDATE_LOOP}, set()),
+    "max_transcripts": (3, {A.UPDATE_LOOP}, set()),
+    "stream_fallback_stt": (True, {A.UPDATE_LOOP}, set()),
+    "speculative_stt": (True, {A.UPDATE_LOOP}, set()),
+    "continuous_listen": (True, {A.RESTART_LOOP}, set()),
+    "hybrid_listen": (True, {A.RESTART_LOOP}, set()),
+    "VAD": ({"module": "ovos-vad-plugin-noise"}, {A.REBUILD_VAD}, set()),
+    "microphone": ({"module": "ovos-microphone-plugin-sounddevice"},
+                   {A.REOPEN_MIC}, set()),
+    "wake_word": ("hey mycroft 2", {A.RELOAD_HOTWORD},
+                  {"hey_mycroft", "hey_mycroft_2"}),
+    "stand_up_word": ("get up", {A.RELOAD_HOTWORD}, {"wake_up", "get_up"}),
+    "warmup": (True, set(), set()),
+    "sample_rate": (48000, set(), set()),
+    "sample_width": (4, set(), set()),
+    "save_path": ("/tmp/listener", set(), set()),
+    "save_utterances": (True, set(), set()),
+    "record_wake_words": (True, set(), set()),
+    "utterance_filename": ("{uuid4}", set(), set()),
+    "fake_barge_in": (False, set(), set()),
+    "barge_in_volume": (10, set(), set()),
+    "mute_during_output": (True, set(), set()),
+    "listen_timeout": (60, set(), set()),
+    "wake_word_upload": ({"disable": False}, set(), set()),
+    "retry_mic_init": (False, set(), set()),
+    "phoneme_duration": (100, set(), set()),
+    "multiplier": (2.0, set(), set()),
+    "energy_ratio": (2.0, set(), set()),
+    "parallel_init": (False, {A.RESTART_SERVICE}, set()),
+    "audio_transformers": ({"plugin": {}}, {A.RESTART_SERVICE}, set()),
+    "audio_writer": ({"format": "flac"}, {A.RESTART_SERVICE}, set()),
+    "audio_stream": ({"max_sessions": 4}, {A.RESTART_SERVICE}, set()),
+    "b64_stt": ({"workers": 2}, {A.RESTART_SERVICE}, set()),
+    "emit_queue_size": (128, {A.RESTART_SERVICE}, set()),
+    "telemetry_window": (0.2, {A.RESTART_SERVICE}, set()),
+    "latency_window": (500, {A.RESTART_SERVICE}, set()),
+    "trace_file": ("/tmp/listener.trace", {A.RESTART_SERVICE}, set()),
+    "metrics_exporter": ({"enabled": True}, {A.RESTART_SERVICE}, set()),
+    "realtime_monitor": ({"window": 4.0}, {A.RESTART_SERVICE}, set())
+}
+
+
+class TestReloadPlan(unittest.TestCase):
+    base = {
+        "lang": "en-us",
+        "stt": {"module": "stt_a", "fallback_module": "stt_b",
+                "stt_a": {}, "stt_b": {}},
+        "listener": {"wake_word": "hey_mycroft", "stand_up_word": "wake_up",
+                     "silence_end": 0.7},
+        "hotwords": {"hey_mycroft": {"module": "ww"},
+                     "wake_up": {"module": "ww"}}
+    }
+
+    def test_table_covers_listener_keys(self):
+        keys = set(LISTENER_ACTIONS) | \
+            set(Configuration().get("listener", {}))
+        self.assertEqual(keys - set(LISTENER_TABLE), set())
+
+    def test_listener_keys(self):
+        for key, (value, actions, hotwords) in LISTENER_TABLE.items():
+            with self.subTest(key=key):
+                new = deepcopy(self.base)
+                new["listener"][key] = value
+                plan = plan_reload(self.base, new)
+                self.assertEqual(plan.changed, [f"listener.{key}"])
+                self.assertEqual(plan.actions, actions)
+                self.assertEqual(plan.hotwords, hotwords)
+                if key in LOOP_FIELDS:
+                    name = LOOP_FIELDS[key][0]
+                    self.assertEqual(plan.loop_fields, {name: value})
+                else:
+                    self.assertEqual(plan.loop_fields, {})
+
+    def test_removed_key_restores_default(self):
+        new = deepcopy(self.base)
+        new["listener"].pop("silence_end")
+        plan = plan_reload(self.base, new)
+        self.assertEqual(plan.loop_fields, {"silence_seconds": 0.7})
+
+    def test_no_change(self):
+        self.assertFalse(plan_reload(self.base, deepcopy(self.base)))
+
+    def test_sections(self):
+        table = [
+            (("stt", "stt_a", {"model": "large"}), {A.RELOAD_STT}),
+            (("stt", "module", "stt_c"), {A.RELOAD_STT}),
+            (("stt", "fallback_module", "stt_c"), {A.RELOAD_FALLBACK_STT}),
+            (("stt", "stt_b", {"model": "large"}), {A.RELOAD_FALLBACK_STT}),
+            ((None, "lang", "pt-pt"),
+             {A.RELOAD_STT, A.RELOAD_FALLBACK_STT}),
+            ((None, "VAD", {"module": "vad"}), {A.REBUILD_VAD}),
+            ((None, "microphone", {"module": "mic"}), {A.REOPEN_MIC}),
+        ]
+        for (section, key, value), actions in table:
+            with self.subTest(key=key):
+                new = deepcopy(self.base)
+                (new[section] if section else new)[key] = value
+                self.assertEqual(plan_reload(self.base, new).actions,
+                                 actions)
+
+    def test_hotwords(self):
+        new = deepcopy(self.base)
+        new["hotwords"]["hey mycroft"] = {"module": "other"}
+        new["hotwords"]["wake_up"]["active"] = False
+        plan = plan_reload(self.base, new)
+        self.assertEqual(plan.actions, {A.RELOAD_HOTWORD})
+        self.assertEqual(plan.hotwords, {"wake_up", "hey_mycroft"})
+
+        # listen sounds are updated without reloading engines
+        for section, value in (("confirm_listening", True),
+                               ("sounds", {"start_listening": "snd/a.wav"})):
+            with self.subTest(section=section):
+                new = deepcopy(self.base)
+                new[section] = value
+                plan = plan_reload(self.base, new)
+                self.assertEqual(plan.actions, {A.UPDATE_HOTWORDS})
+                self.assertEqual(plan.hotwords, set())
+
+    def test_loop_settings(self):
+        settings = loop_settings({"silence_end": 2})
+        self.assertEqual(settings["silence_seconds"], 2)
+        self.assertEqual(settings["speech_seconds"], 0.3)
+        self.assertEqual(set(settings),
+                         {name for name, _ in LOOP_FIELDS.values()})
@@ -0,0 +1,185 @@
+import base64
+import time
+import unittest
+from threading import Event
+from unittest.mock import Mock
+
+from ovos_bus_client.message import Message
+from ovos_utils.messagebus import FakeBus
+
+
+class TestBusMicrophone(unittest.TestCase):
+    def test_read_chunk(self):
+        from ovos_dinkum_listener.remote_audio import BusMicrophone
+        mic = BusMicrophone(chunk_size=4, timeout=0.01)
+        drained = Mock()
+        mic.on_drained = drained
+        mic.start()
+        self.assertIsNone(mic.read_chunk())
+
+        mic.feed(b'\x01\x02\x03')
+        self.assertIsNone(mic.read_chunk())
+        mic.feed(b'\x04\x05')
+        self.assertEqual(mic.read_chunk(), b'\x01\x02\x03\x04')
+
+        # Remaining audio is padded, then silence is appended
+        mic.close(padding_seconds=mic.seconds_per_chunk * 2)
+        self.assertEqual(mic.read_chunk(), b'\x05\x00\x00\x00')
+        self.assertEqual(mic.read_chunk(), bytes(4))
+        self.assertEqual(mic.read_chunk(), bytes(4))
+        drained.assert_not_called()
+        self.assertIsNone(mic.read_chunk())
+        drained.assert_called_once()
+
+
+class TestRemoteAudioStreams(unittest.TestCase):
+    def _get_service(self, **config):
+        from ovos_dinkum_listener.remote_audio import RemoteAudioStreams
+        from ovos_dinkum_listener.plugins import FakeStreamingSTT
+        bus = FakeBus()
+        engine = Mock()
+        engine.transcribe.return_value = [("hello world", 1.0)]
+        engine.lang = "en-us"
+        stt = FakeStreamingSTT(engine)
+        vad = Mock()
+        # any non-zero audio is speech
+        vad.is_silence.side_effect = lambda chunk: not any(chunk)
+        service = RemoteAudioStreams(
+            bus, {"listener": {"audio_stream": config}},
+            stt_loader=Mock(return_value=stt),
+            vad_loader=Mock(return_value=vad))
+        service.register_event_handlers()
+        return bus, service, engine
+
+    def test_stream_transcription(self):
+        bus, service, engine = self._get_service(chunk_size=3200)
+        utterance = Event()
+        record_end = Event()
+        responses = []
+        bus.on("recognizer_loop:utterance",
+               lambda m: responses.append(m) or utterance.set())
+        bus.on("recognizer_loop:record_end", lambda m: record_end.set())
+
+        context = {"session": {"session_id": "remote"}}
+        bus.emit(Message("recognizer_loop:audio_stream.start", {}, context))
+        self.assertIn("remote", service.sessions)
+
+        speech = base64.b64encode(b'\x10\x00' * 1600 * 10).decode()
+        silence = base64.b64encode(bytes(3200 * 10)).decode()
+        for audio in (speech, silence):
+            bus.emit(Message("recognizer_loop:audio_stream.chunk",
+                             {"audio": audio}, context))
+
+        self.assertTrue(record_end.wait(5))
+        self.assertTrue(utterance.wait(5))
+        self.assertEqual(responses[0].data["utterances"], ["hello world"])
+        self.assertEqual(responses[0].context["session"]["session_id"],
+                         "remote")
+        engine.transcribe.assert_called_once()
+        service.shutdown()
+
+    def test_stream_lang_and_early_chunks(self):
+        bus, service, engine = self._get_service(chunk_size=3200)
+        loaded = Event()
+        stt_loader = service._stt_loader
+        # audio streamed while engines load must not be lost
+        service._stt_loader = lambda: loaded.wait(5) and stt_loader()
+        utterance = Event()
+        responses = []
+        bus.on("recognizer_loop:utterance",
+               lambda m: responses.append(m) or utterance.set())
+
+        context = {"session": {"session_id": "remote"}}
+        bus.emit(Message("recognizer_loop:audio_stream.start",
+                         {"lang": "pt-PT"}, context))
+        speech = base64.b64encode(b'\x10\x00' * 1600 * 10).decode()
+        bus.emit(Message("recognizer_loop:audio_stream.chunk",
+                         {"audio": speech}, context))
+        bus.emit(Message("recognizer_loop:audio_stream.end", {}, context))
+        loaded.set()
+
+        self.assertTrue(utterance.wait(5))
+        self.assertEqual(responses[0].data["lang"], "pt-PT")
+        self.assertEqual(engine.transcribe.call_args[0][1], "pt-PT")
+        service.shutdown()
+
+    def test_reap_idle_stream(self):
+        bus, service, _ = self._get_service(idle_timeout=30)
+        unknown = Event()
+        replies = []
+        bus.on("recognizer_loop:speech.recognition.unknown",
+               lambda m: replies.append(m) or unknown.set())
+        bus.emit(Message("recognizer_loop:audio_stream.start",
+                         {"session_id": "a"}))
+        service.sessions["a"].last_activity = time.time() - 60
+        service._reap_idle_sessions_once()
+        self.assertTrue(unknown.wait(5))
+        self.assertEqual(replies[0].data["error"], "timeout")
+        self.assertNotIn("a", service.sessions)
+
+        # closed streams are transcribing and are not reaped
+        bus.emit(Message("recognizer_loop:audio_stream.start",
+                         {"session_id": "b"}))
+        session = service.sessions["b"]
+        session.closed = True
+        session.last_activity = time.time() - 60
+        service._reap_idle_sessions_once()
+        self.assertFalse(session.finished.is_set())
+        service.shutdown()
+        self.assertEqual(len(replies), 1)
+
+    def test_stream_busy(self):
+        bus, service, _ = self._get_service(max_sessions=1)
+        replies = []
+        bus.on("recognizer_loop:audio_stream.start.response", replies.append)
+        bus.emit(Message("recognizer_loop:audio_stream.start",
+                         {"session_id": "a"}))
+        bus.emit(Message("recognizer_loop:audio_stream.start",
+                         {"session_id": "b"}))
+        self.assertTrue(replies[0].data["accepted"])
+        self.assertIn("a", service.sessions)
+        self.assertFalse(replies[1].data["accepted"])
+        self.assertEqual(replies[1].data["error"], "busy")
+
+        # Ending a stream without speech reports unknown speech
+        unknown = Event()
+        bus.on("recognizer_loop:speech.recognition.unknown",
+               lambda m: unknown.set())
+        bus.emit(Message("recognizer_loop:audio_stream.end",
+                         {"session_id": "a"}))
+        self.assertTrue(unknown.wait(5))
+        service.shutdown()
+
+    def test_loop_settings(self):
+        from ovos_dinkum_listener.voice_loop import ListeningMode
+        _, service, _ = self._get_service()
+        service.config["listener"].update(
+            {"silence_end": 1.5, "recording_timeout_with_silence": 2.5})
+        session = service._create_session("a", Message("test"))
+        loop = service._create_loop(session)
+        self.assertEqual(loop.silence_seconds, 1.5)
+        self.assertEqual(loop.timeout_seconds_with_silence, 2.5)
+        self.assertEqual(loop.listen_mode, ListeningMode.CONTINUOUS)
+        service.shutdown()
+
+    def test_malformed_chunk(self):
+        bus, service, _ = self._get_service()
+        bus.emit(Message("recognizer_loop:audio_stream.start",
+                         {"session_id": "a"}))
+        session = service.sessions["a"]
+        session.last_activity = 0
+        for data in ({}, {"audio": "not base64!"}, {"audio": 42}):
+            bus.emit(Message("recognizer_loop:audio_stream.chunk",
+                             dict(data, session_id="a")))
+        self.assertEqual(session.mic._buffer, bytearray())
+        self.assertEqual(session.last_activity, 0)
+
+        bus.emit(Message("recognizer_loop:audio_stream.chunk",
+                         {"session_id": "a",
+                          "audio": base64.b64encode(b'\x01\x02').decode()}))
+        self.assertEqual(session.mic._buffer, bytearray(b'\x01\x02'))
+        service.shutdown()
+
+
+if __name__ == '__main__':
+    unittest.main()
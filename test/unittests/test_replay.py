@@ -0,0 +1,166 @@
+import unittest
+import wave
+from array import array
+from os.path import join
+from tempfile import TemporaryDirectory
+from typing import List, Optional, Tuple
+
+from ovos_dinkum_listener.replay import ReplayHarness, VirtualClock, \
+    WavFileMicrophone, read_wav
+from ovos_dinkum_listener.voice_loop import ListeningMode
+from ovos_dinkum_listener.voice_loop.hotwords import HotwordState
+
+WAKE = 3000
+SPEECH = 500
+
+
+def _write_wav(path: str, segments: List[Tuple[int, float]],
+               sample_rate: int = 16000, channels: int = 1):
+    """ write constant value segments of (sample value, seconds) """
+    samples = array("h")
+    for value, seconds in segments:
+        samples.extend([value] * int(seconds * sample_rate) * channels)
+    with wave.open(path, "wb") as wav:
+        wav.setnchannels(channels)
+        wav.setsampwidth(2)
+        wav.setframerate(sample_rate)
+        wav.writeframes(samples.tobytes())
+
+
+class _Hotwords:
+    """ detects the listen word in chunks containing WAKE samples """
+    state = None
+    reload_on_failure = False
+
+    def __init__(self):
+        self._found = None
+
+    def update(self, chunk: bytes):
+        if self.state == HotwordState.LISTEN and \
+                max(array("h", chunk)) >= WAKE:
+            self._found = "hey_mycroft"
+
+    def found(self) -> Optional[str]:
+        found, self._found = self._found, None
+        return found
+
+    def get_ww(self, ww: str) -> dict:
+        return {"key_phrase": ww.replace("_", " ")}
+
+    def reset(self):
+        self._found = None
+
+
+class _VAD:
+    def is_silence(self, chunk: bytes) -> bool:
+        return max(array("h", chunk)) == 0
+
+
+class _STT:
+    lang = "en-us"
+    stream = None
+
+    def stream_start(self):
+        self.chunks = 0
+
+    def stream_data(self, chunk: bytes):
+        self.chunks += 1
+
+    def transcribe(self, lang=None):
+        return [("hello", 1.0)]
+
+
+class _Transformers:
+    plugins = []
+
+    def feed_audio(self, chunk):
+        pass
+
+    feed_hotword = feed_speech = feed_audio
+
+    def transform(self, chunk, utterance=None):
+        return chunk, {}
+
+
+class TestReplay(unittest.TestCase):
+    def setUp(self):
+        self._tmp = TemporaryDirectory()
+        self.addCleanup(self._tmp.cleanup)
+
+    def _harness(self, **kwargs) -> ReplayHarness:
+        return ReplayHarness(hotwords=_Hotwords(), stt=_STT(), vad=_VAD(),
+                             transformers=_Transformers(), **kwargs)
+
+    def test_read_wav(self):
+        path = join(self._tmp.name, "stereo.wav")
+        _write_wav(path, [(SPEECH, 1.0)], sample_rate=44100, channels=2)
+        audio = read_wav(path)
+        self.assertAlmostEqual(len(audio), 32000, delta=4)
+        self.assertEqual(set(array("h", audio[100:-100])), {SPEECH})
+
+    def test_microphone(self):
+        first = join(self._tmp.name, "first.wav")
+        second = join(self._tmp.name, "second.wav")
+        _write_wav(first, [(SPEECH, 1.0)])
+        _write_wav(second, [(SPEECH, 0.5)])
+        clock = VirtualClock(start=100.0)
+        drained = []
+        mic = WavFileMicrophone(files=[first, second], padding_seconds=0.5,
+                                clock=clock, chunk_size=3200,
+                                on_drained=lambda: drained.append(True))
+        mic.start()
+        self.assertEqual(mic.audio_seconds, 2.5)
+        self.assertEqual(mic.offsets, [(first, 0.0), (second, 1.5)])
+        self.assertEqual(mic.file_at(1.4), first)
+        self.assertEqual(mic.file_at(1.6), second)
+
+        chunks = []
+        while (chunk := mic.read_chunk()) is not None:
+            chunks.append(chunk)
+        self.assertEqual(len(chunks), 25)
+        self.assertEqual(clock.time(), 102.5)
+        self.assertEqual(drained, [True])
+
+    def test_replay(self):
+        path = join(self._tmp.name, "command.wav")
+        _write_wav(path, [(0, 0.5), (WAKE, 0.2), (0, 0.3), (SPEECH, 1.0)])
+        report = self._harness(listen_mode=ListeningMode.WAKEWORD).run(
+            [path, path])
+
+        # padded to whole chunks
+        self.assertAlmostEqual(report.audio_seconds, 6.0,
+                               delta=4096 / 32000)
+        self.assertEqual([d["type"] for d in report.detections],
+                         ["listen", "listen"])
+        self.assertEqual([d["file"] for d in report.transcripts],
+                         [path, path])
+        self.assertEqual(report.transcripts[0]["utterances"],
+                         [["hello", 1.0]])
+        # events are reported in audio time
+        self.assertAlmostEqual(report.detections[0]["time"], 0.6, delta=0.2)
+        self.assertAlmostEqual(report.detections[1]["time"], 3.6, delta=0.2)
+        self.assertEqual([t["to"] for t in report.transitions[:4]],
+                         ["before_cmd", "in_cmd", "after_cmd", "wakeword"])
+        self.assertLess(report.realtime_factor, 1.0)
+        self.assertGreater(report.stage_cpu_seconds["vad"], 0)
+        self.assertIn("hotwords", report.stage_cpu_seconds)
+        self.assertIn("loop", report.stage_cpu_seconds)
+        self.assertEqual(report.latency["total"]["count"], 2)
+        self.assertEqual(report.as_dict()["realtime_factor"],
+                         round(report.realtime_factor, 4))
+
+        # instrumentation is removed after the run
+        harness = self._harness()
+        harness.run([path])
+        self.assertNotIn("is_silence", vars(harness.vad))
+
+    def test_virtual_clock_wakeup_timeout(self):
+        path = join(self._tmp.name, "sleeping.wav")
+        _write_wav(path, [(0, 0.5), (WAKE, 0.2), (0, 12.0)])
+        report = self._harness(listen_mode=ListeningMode.SLEEPING).run([path])
+        # wake up word not heard within 10 seconds of audio
+        self.assertEqual([t["to"] for t in report.transitions],
+                         ["wake_up", "sleeping"])
+        self.assertAlmostEqual(report.transitions[1]["time"] -
+                               report.transitions[0]["time"], 10.0, delta=0.2)
+        self.assertLess(report.wall_seconds, 10.0)
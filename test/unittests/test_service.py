@@ -3,7 +3,7 @@ import unittest
 import platform
 
 from os import environ, makedirs
-from os.path import join, dirname
+from os.path import join, dirname, isfile
 from threading import Event
 from time import sleep
 from unittest.mock import MagicMock, Mock, patch
@@ -168,7 +168,9 @@ class TestDinkumVoiceService(unittest.TestCase):
             'recognizer_loop:sleep', 'recognizer_loop:wake_up',
             'recognizer_loop:record_stop', 'recognizer_loop:state.set',
             'recognizer_loop:state.get', 'intent.service.skills.activated',
-            'ovos.languages.stt', 'opm.stt.query', 'opm.ww.query',
+            'recognizer_loop:transformers.metrics',
+            'recognizer_loop:telemetry.subscribe',
+            'recognizer_loop:telemetry.unsubscribe', 'ovos.languages.stt', 'opm.stt.query', 'opm.ww.query',
             'opm.vad.query'
         ):
             self.assertEqual(len(self.bus.ee.listeners(event)), 1)
@@ -226,10 +228,11 @@ class TestDinkumVoiceService(unittest.TestCase):
 
     def test_record_begin(self):
         handled = Event()
-        handler = Mock(side_effect=handled.set())
+        handler = Mock(side_effect=lambda _: handled.set())
         self.bus.once('recognizer_loop:record_begin', handler)
         self.service._record_begin()
-        handled.wait(5)
+        # emitted from the sender thread
+        self.assertTrue(handled.wait(5))
         handler.assert_called_once()
 
     def test_save_ww(self):
@@ -273,6 +276,7 @@ class TestDinkumVoiceService(unittest.TestCase):
 
                 # Call the method under test
                 self.service._hotword_audio(audio_bytes, ww_context)
+                self.assertTrue(self.service.emitter.flush(5))
 
                 # Assertions
                 mock_random_choice.assert_called_once_with(sound_list)
@@ -297,8 +301,23 @@ class TestDinkumVoiceService(unittest.TestCase):
         pass
 
     def test_save_stt(self):
-        # TODO
-        pass
+        from tempfile import TemporaryDirectory
+        self.service.voice_loop.mic = Mock(sample_rate=16000, sample_width=2,
+                                           sample_channels=1)
+        meta = {"transcriptions": [("hello", 1.0)]}
+        with TemporaryDirectory() as tmp, \
+                patch.object(self.service.audio_writer, "submit") as submit:
+            uri = self.service._save_stt(b'\x00\x00', meta, save_path=tmp)
+            # the voice loop only queues the write, the file name is hashed
+            # by the writer thread
+            submit.assert_called_once()
+            job = submit.call_args[0][0]
+            self.assertIsNone(uri)
+            self.assertIsNone(job.filename)
+            self.assertEqual(str(job.directory), tmp)
+            self.assertEqual(job.meta, meta)
+            from ovos_plugin_manager.utils.tts_cache import hash_sentence
+            self.assertTrue(job.resolve().startswith(hash_sentence("hello")))
 
     def test_upload_stt(self):
         # TODO
@@ -316,6 +335,79 @@ class TestDinkumVoiceService(unittest.TestCase):
         # TODO
         pass
 
+    def test_run_parallel(self):
+        from threading import Barrier
+        barrier = Barrier(2, timeout=5)
+        # both phases must run at the same time to pass the barrier
+        results = self.service._run_parallel({"a": lambda: (barrier.wait(), 1),
+                                              "b": lambda: (barrier.wait(), 2)})
+        self.assertEqual(results["a"][1], 1)
+        self.assertEqual(results["b"][1], 2)
+        self.assertIn("a", self.service.startup_times)
+        self.assertIn("b", self.service.startup_times)
+
+        with self.assertRaises(ValueError):
+            self.service._run_parallel({"ok": lambda: None,
+                                        "fail": Mock(side_effect=ValueError)})
+
+    def test_query_volume(self):
+        self.service._default_vol = 70
+        self.service._query_volume()
+        # the response is handled when it arrives, nothing blocks
+        self.bus.emit(Message("mycroft.volume.get.response",
+                              {"percent": 0.4}))
+        self.assertEqual(self.service._default_vol, 40)
+
+    def test_warmup(self):
+        real_stt = self.service.stt
+        real_vad = self.service.vad
+        real_hotwords = self.service.hotwords
+        self.service.stt = Mock()
+        self.service.vad = Mock()
+        engine = Mock()
+        self.service.hotwords = Mock(ww_names=["hey_test"], plugins=[engine])
+
+        self.service._warmup()
+        self.service.stt.transcribe.assert_called_once()
+        audio = self.service.stt.transcribe.call_args[0][0]
+        self.assertEqual(len(audio.frame_data), 32000)
+        self.service.vad.is_silence.assert_called_once()
+        self.service.vad.reset.assert_called_once()
+        engine.update.assert_called_once()
+        engine.reset.assert_called_once()
+        for name in ("stt", "vad", "hotword.hey_test"):
+            self.assertIsInstance(self.service.warmup_times[name], float)
+
+        # Plugin errors do not prevent startup
+        self.service.stt.transcribe.side_effect = RuntimeError
+        self.service._warmup(vad=False, hotwords=False)
+        self.assertEqual(self.service.vad.is_silence.call_count, 1)
+
+        self.service.stt = real_stt
+        self.service.vad = real_vad
+        self.service.hotwords = real_hotwords
+
+    @patch("ovos_dinkum_listener.service.bytes2audiodata")
+    def test_handle_b64_audio_error(self, bytes2audiodata):
+        bytes2audiodata.side_effect = ValueError("unsupported audio format")
+        real_submit = self.service.offline_stt.submit
+        self.service.offline_stt.submit = lambda job: job(Mock()) or True
+        replies = []
+        self.bus.on("recognizer_loop:b64_audio.response", replies.append)
+        unknown = []
+        self.bus.on("recognizer_loop:speech.recognition.unknown",
+                    unknown.append)
+
+        self.service._handle_b64_audio(
+            Message("recognizer_loop:b64_audio", {"audio": "", "lang": "en-us"}))
+        self.assertEqual(replies[0].data["error"], "unsupported audio format")
+        self.assertEqual(len(unknown), 1)
+
+        self.bus.remove_all_listeners("recognizer_loop:b64_audio.response")
+        self.bus.remove_all_listeners(
+            "recognizer_loop:speech.recognition.unknown")
+        self.service.offline_stt.submit = real_submit
+
     def test_handle_mute(self):
         self.service.voice_loop.is_muted = False
         self.service._handle_mute(None)
@@ -327,6 +419,7 @@ class TestDinkumVoiceService(unittest.TestCase):
         self.assertFalse(self.service.voice_loop.is_muted)
 
     def test_handle_listen(self):
+        from ovos_dinkum_listener.settings import update_settings
         from ovos_dinkum_listener.voice_loop import ListeningState
         orig_reset = self.service.voice_loop.reset_speech_timer
         self.service.voice_loop.stt.stream_start = Mock()
@@ -345,7 +438,9 @@ class TestDinkumVoiceService(unittest.TestCase):
 
         self.service.voice_loop.state = ListeningState.DETECT_WAKEWORD
         self.service.config["confirm_listening"] = False
-        
+        update_settings(self.service.config)
+        self.addCleanup(update_settings)
+
         self.service._handle_listen(Message(""))
         self.assertEqual(self.service.config["confirm_listening"], False)
         self.service.voice_loop.reset_speech_timer.assert_called_once()
@@ -382,6 +477,48 @@ class TestDinkumVoiceService(unittest.TestCase):
         # TODO
         pass
 
+    def test_handle_profile_start(self):
+        from tempfile import TemporaryDirectory
+        from threading import get_ident
+        from unittest.mock import PropertyMock
+        from ovos_dinkum_listener.service import OVOSDinkumVoiceService
+        self.addCleanup(setattr, self.service, "voice_loop",
+                        self.service.voice_loop)
+        loop = self.service.voice_loop = Mock()
+        responses = []
+        done = Event()
+
+        def _on_response(message):
+            responses.append(message.data)
+            done.set()
+
+        self.bus.on("ovos.listener.profile.start.response", _on_response)
+        self.addCleanup(self.bus.remove, "ovos.listener.profile.start.response",
+                        _on_response)
+
+        loop.thread_id = None
+        self.service._handle_profile_start(Message("ovos.listener.profile.start"))
+        self.assertEqual(responses.pop(), {"error": "not running"})
+
+        done.clear()
+        loop.thread_id = get_ident()
+        with TemporaryDirectory() as tmp, \
+                patch.object(OVOSDinkumVoiceService, "default_save_path",
+                             new_callable=PropertyMock, return_value=tmp):
+            self.service._handle_profile_start(
+                Message("ovos.listener.profile.start",
+                        {"duration": 0.1, "interval": 0.01}))
+            self.service._handle_profile_start(
+                Message("ovos.listener.profile.start"))
+            self.assertEqual(responses.pop(), {"error": "busy"})
+            done.clear()
+            self.assertTrue(done.wait(5))
+            data = responses.pop()
+            self.assertTrue(data["folded"].startswith(join(tmp, "profiles")))
+            self.assertTrue(isfile(data["folded"]))
+            self.assertTrue(isfile(data["pstats"]))
+            self.assertGreater(data["samples"], 0)
+
     def test_handle_stop_recording(self):
         # TODO
         pass
@@ -427,12 +564,9 @@ class TestDinkumVoiceService(unittest.TestCase):
         import ovos_dinkum_listener.service
         mock_create_stt = Mock()
         mock_create_fallback = Mock()
-        mock_shutdown_hotwords = Mock()
-        mock_create_hotwords = Mock()
-        real_shutdown_hotwords = self.service.hotwords.shutdown
-        self.service.hotwords.shutdown = mock_shutdown_hotwords
-        real_create_hotwords = self.service.hotwords.load_hotword_engines
-        self.service.hotwords.load_hotword_engines = mock_create_hotwords
+        mock_reload_hotword = Mock()
+        real_reload_hotword = self.service.hotwords.reload_hotword
+        self.service.hotwords.reload_hotword = mock_reload_hotword
 
         ovos_dinkum_listener.service.load_stt_module = mock_create_stt
         ovos_dinkum_listener.service.load_fallback_stt = mock_create_fallback
@@ -458,11 +592,19 @@ class TestDinkumVoiceService(unittest.TestCase):
         self.assertTrue(fallback_shutdown.is_set())
         mock_create_fallback.assert_called_once()
 
-        # Reload Hotwords
+        # Reload only the changed hotword
         self.service.config["hotwords"]["test"] = {"module": "test"}
         self.service.reload_configuration()
-        mock_shutdown_hotwords.assert_called_once()
-        mock_create_hotwords.assert_called_once()
+        mock_reload_hotword.assert_called_once_with("test", on_load=None)
+
+        # Timing changes are applied in place
+        self.service.config["listener"]["silence_end"] = 1.5
+        self.service.config["listener"]["min_stt_confidence"] = 0.9
+        self.service.reload_configuration()
+        self.assertEqual(self.service.voice_loop.silence_seconds, 1.5)
+        self.assertEqual(self.service.voice_loop.min_stt_confidence, 0.9)
+        self.assertFalse(vad_stop.is_set())
+        self.assertFalse(mic_stop.is_set())
 
         # Reload Listener
         from ovos_plugin_manager.templates.vad import VADEngine
@@ -481,28 +623,153 @@ class TestDinkumVoiceService(unittest.TestCase):
         self.service.mic.start.assert_called_once()
 
         # Reload no relevant change
-        config_hash = self.service._config_hash()
+        snapshot = self.service._config_snapshot()
         self.service.config['new_section'] = {'test': True}
-        self.assertEqual(config_hash, self.service._applied_config_hash)
+        self.assertEqual(snapshot, self.service._applied_config)
         self.service.reload_configuration()
         self.assertTrue(self.service.config['new_section']['test'])
-        self.assertEqual(config_hash, self.service._config_hash())
+        self.assertEqual(snapshot, self.service._config_snapshot())
 
         # Reload no change
-        config_hash = self.service._config_hash()
-        self.assertEqual(config_hash, self.service._applied_config_hash)
+        snapshot = self.service._config_snapshot()
+        self.assertEqual(snapshot, self.service._applied_config)
         self.service.reload_configuration()
-        self.assertEqual(config_hash, self.service._config_hash())
+        self.assertEqual(snapshot, self.service._config_snapshot())
         self.service.reload_configuration()
-        self.assertEqual(config_hash, self.service._config_hash())
+        self.assertEqual(snapshot, self.service._config_snapshot())
 
         mock_create_stt.assert_called_once()
         mock_create_fallback.assert_called_once()
-        mock_shutdown_hotwords.assert_called_once()
-        mock_create_hotwords.assert_called_once()
-
-        self.service.hotwords.shutdown = real_shutdown_hotwords
-        self.service.hotwords.load_hotword_engines = real_create_hotwords
+        mock_reload_hotword.assert_called_once()
+
+        self.service.hotwords.reload_hotword = real_reload_hotword
+
+    def test_reload_failure(self):
+        from copy import deepcopy
+        config = self.service.config
+        saved = {key: deepcopy(config.get(key))
+                 for key in ("stt", "VAD", "microphone")}
+        self.addCleanup(lambda: config.update(saved))
+        self.service._applied_config = self.service._config_snapshot()
+        old_stt = self.service.stt
+        old_vad = self.service.vad
+        old_mic = self.service.mic
+        applied = self.service._applied_config
+        new_stt = Mock()
+
+        # a failed reload keeps the components the voice loop is using
+        with patch("ovos_dinkum_listener.service.load_stt_module",
+                   return_value=new_stt), \
+                patch("ovos_dinkum_listener.service.OVOSVADFactory.create",
+                      side_effect=RuntimeError("broken VAD")):
+            self.service.config["stt"] = dict(applied["stt"],
+                                              module="failed_module")
+            self.service.config["VAD"] = {"module": "broken"}
+            self.service.reload_configuration()
+        self.assertIs(self.service.stt, old_stt)
+        self.assertIs(self.service.vad, old_vad)
+        new_stt.shutdown.assert_called_once()
+        self.assertEqual(self.service._applied_config, applied)
+
+        # devices that can't be opened twice are opened after stopping
+        # the current microphone
+        busy_mic = Mock()
+        busy_mic.start.side_effect = OSError("device busy")
+        new_mic = Mock()
+        old_mic.stop.reset_mock()
+        with patch("ovos_dinkum_listener.service.OVOSMicrophoneFactory.create",
+                   side_effect=[busy_mic, new_mic]):
+            self.service.config["stt"] = applied["stt"]
+            self.service.config["VAD"] = applied["VAD"]
+            self.service.config["microphone"] = {"module": "new_mic"}
+            self.service.reload_configuration()
+        busy_mic.stop.assert_called_once()
+        old_mic.stop.assert_called_once()
+        new_mic.start.assert_called_once()
+        self.assertIs(self.service.mic, new_mic)
+        self.assertEqual(self.service._applied_config["microphone"],
+                         {"module": "new_mic"})
+
+        # the current microphone is restarted if the new one can't open
+        new_mic.stop.reset_mock()
+        new_mic.start.reset_mock()
+        with patch("ovos_dinkum_listener.service.OVOSMicrophoneFactory.create",
+                   return_value=busy_mic):
+            self.service.config["microphone"] = {"module": "other_mic"}
+            self.service.reload_configuration()
+        new_mic.stop.assert_called_once()
+        new_mic.start.assert_called_once()
+        self.assertIs(self.service.mic, new_mic)
+
+
+class TestAudioDecoding(unittest.TestCase):
+    @staticmethod
+    def _make_wav(rate, width, channels, frames):
+        import io
+        import wave
+        buffer = io.BytesIO()
+        with wave.open(buffer, "wb") as wav:
+            wav.setframerate(rate)
+            wav.setsampwidth(width)
+            wav.setnchannels(channels)
+            wav.writeframes(bytes(frames * width * channels))
+        return buffer.getvalue()
+
+    def test_wav2audiodata(self):
+        from ovos_dinkum_listener.service import wav2audiodata
+        # Already in the expected format
+        audio = wav2audiodata(self._make_wav(16000, 2, 1, 16000))
+        self.assertEqual(audio.sample_rate, 16000)
+        self.assertEqual(audio.sample_width, 2)
+        self.assertEqual(len(audio.frame_data), 32000)
+
+        # Stereo 44.1kHz is downmixed and resampled
+        audio = wav2audiodata(self._make_wav(44100, 2, 2, 44100))
+        self.assertEqual(audio.sample_rate, 16000)
+        self.assertAlmostEqual(len(audio.frame_data), 32000, delta=4)
+
+        # 8 bit audio is converted to 16 bit
+        audio = wav2audiodata(self._make_wav(16000, 1, 1, 1600))
+        self.assertEqual(audio.sample_width, 2)
+        self.assertEqual(len(audio.frame_data), 3200)
+
+        # Not a WAV file
+        self.assertIsNone(wav2audiodata(b"not audio"))
+
+    @patch("shutil.which")
+    @patch("subprocess.run")
+    def test_bytes2audiodata(self, run, which):
+        from ovos_dinkum_listener.service import bytes2audiodata
+        which.return_value = "/usr/bin/ffmpeg"
+        audio = bytes2audiodata(self._make_wav(16000, 2, 1, 1600))
+        self.assertEqual(len(audio.frame_data), 3200)
+        run.assert_not_called()
+
+        run.return_value = Mock(stdout=bytes(320), returncode=0)
+        audio = bytes2audiodata(b"compressed audio")
+        run.assert_called_once()
+        self.assertEqual(run.call_args.kwargs["input"],
+                         b"compressed audio")
+        self.assertEqual(audio.frame_data, bytes(320))
+        self.assertEqual(audio.sample_rate, 16000)
+
+        # Non-seekable pipe input fails, retried from a file
+        run.reset_mock()
+        run.side_effect = [
+            Mock(stdout=b"", returncode=1),
+            Mock(stdout=bytes(320), returncode=0)]
+        audio = bytes2audiodata(b"m4a audio")
+        self.assertEqual(run.call_count, 2)
+        self.assertNotIn("input", run.call_args.kwargs)
+        self.assertEqual(audio.frame_data, bytes(320))
+
+        # Unsupported formats raise a clear error
+        run.side_effect = None
+        run.return_value = Mock(stdout=b"", returncode=1,
+                                           stderr=b"Invalid data found")
+        with self.assertRaises(ValueError) as ctx:
+            bytes2audiodata(b"garbage")
+        self.assertIn("unsupported audio format", str(ctx.exception))
 
 
 if __name__ == '__main__':
@@ -0,0 +1,43 @@
+import unittest
+from dataclasses import FrozenInstanceError
+
+
+class TestListenerSettings(unittest.TestCase):
+    def test_from_config(self):
+        from ovos_dinkum_listener.settings import ListenerSettings, \
+            DEFAULT_HALLUCINATIONS
+        settings = ListenerSettings.from_config({
+            "lang": "en-US",
+            "secondary_langs": ["pt-PT", "de-de"],
+            "Audio": {"native_sources": ["audio"]},
+            "confirm_listening": True,
+            "sounds": {"start_listening": "snd/start.wav"},
+            "listener": {"mute_during_output": True, "save_path": "/tmp/l"}
+        })
+        self.assertEqual(settings.lang, "en-US")
+        self.assertEqual(settings.valid_langs, ("en", "pt", "de"))
+        self.assertEqual(settings.native_sources, ("audio",))
+        self.assertTrue(settings.confirm_listening)
+        self.assertEqual(settings.start_listening_sound, "snd/start.wav")
+        self.assertIsNone(settings.end_listening_sound)
+        self.assertTrue(settings.mute_during_output)
+        self.assertEqual(settings.save_path, "/tmp/l")
+        self.assertEqual(settings.hallucinations, DEFAULT_HALLUCINATIONS)
+
+        with self.assertRaises(FrozenInstanceError):
+            settings.lang = "pt-pt"
+
+        settings = ListenerSettings.from_config(
+            {"filter_hallucinations": False})
+        self.assertEqual(settings.hallucinations, ())
+        self.assertEqual(settings.lang, "en-us")
+        self.assertTrue(settings.save_path.endswith("/listener"))
+
+    def test_update_settings(self):
+        from ovos_dinkum_listener.settings import get_settings, \
+            update_settings
+        self.addCleanup(update_settings)
+        settings = update_settings({"lang": "pt-pt"})
+        self.assertIs(get_settings(), settings)
+        self.assertEqual(get_settings().lang, "pt-pt")
+        self.assertIsNot(update_settings({"lang": "pt-pt"}), settings)
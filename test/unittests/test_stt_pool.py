@@ -0,0 +1,77 @@
+import unittest
+from threading import Event
+from unittest.mock import Mock
+
+
+class TestOfflineSTTPool(unittest.TestCase):
+    def test_pool_init(self):
+        from ovos_dinkum_listener.stt_pool import OfflineSTTPool
+        pool = OfflineSTTPool()
+        self.assertEqual(pool.num_workers, 1)
+        self.assertFalse(pool.running)
+
+        config = {"listener": {"b64_stt": {"workers": 3, "queue_size": 2}}}
+        pool = OfflineSTTPool(config)
+        self.assertEqual(pool.num_workers, 3)
+        self.assertEqual(pool.queue_size, 2)
+
+    def test_submit(self):
+        from ovos_dinkum_listener.stt_pool import OfflineSTTPool
+        stt = Mock()
+        loader = Mock(return_value=stt)
+        pool = OfflineSTTPool(stt_loader=loader)
+        done = Event()
+        job = Mock(side_effect=lambda _: done.set())
+        self.assertTrue(pool.submit(job))
+        self.assertTrue(pool.running)
+        self.assertTrue(done.wait(5))
+        job.assert_called_once_with(stt)
+        loader.assert_called_once()
+
+        # STT is reloaded after a configuration change
+        done.clear()
+        pool.reload()
+        self.assertTrue(pool.submit(job))
+        self.assertTrue(done.wait(5))
+        self.assertEqual(loader.call_count, 2)
+        stt.shutdown.assert_called_once()
+
+        pool.shutdown()
+        self.assertFalse(pool.running)
+        self.assertEqual(stt.shutdown.call_count, 2)
+
+    def test_backpressure(self):
+        from ovos_dinkum_listener.stt_pool import OfflineSTTPool
+        config = {"listener": {"b64_stt": {"workers": 1, "queue_size": 1}}}
+        pool = OfflineSTTPool(config, stt_loader=Mock())
+        release = Event()
+        started = Event()
+
+        def _blocking(_):
+            started.set()
+            release.wait(5)
+
+        self.assertTrue(pool.submit(_blocking))
+        self.assertTrue(started.wait(5))
+        self.assertTrue(pool.submit(Mock()))
+        # worker busy and queue full
+        self.assertFalse(pool.submit(Mock()))
+        release.set()
+        pool.shutdown()
+
+    def test_transcribe_audio(self):
+        from ovos_dinkum_listener.stt_pool import transcribe_audio
+        from ovos_dinkum_listener.plugins import FakeStreamingSTT
+        from speech_recognition import AudioData
+        audio = AudioData(b'\x00' * 32, 16000, 2)
+
+        engine = Mock()
+        engine.transcribe.return_value = [("test", 1.0)]
+        stt = FakeStreamingSTT(engine)
+        self.assertEqual(transcribe_audio(stt, audio, "en-us"),
+                         [("test", 1.0)])
+        engine.transcribe.assert_called_once_with(audio, "en-us")
+
+
+if __name__ == '__main__':
+    unittest.main()
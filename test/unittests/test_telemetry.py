@@ -0,0 +1,51 @@
+import unittest
+from unittest.mock import Mock
+
+
+class TestAudioTelemetry(unittest.TestCase):
+    def test_subscription(self):
+        from ovos_dinkum_listener.telemetry import AudioTelemetry
+        from ovos_dinkum_listener.voice_loop.voice_loop import ChunkInfo
+        emit = Mock()
+        previous = Mock()
+        loop = Mock(chunk_callback=previous, state="wakeword")
+        loop.mic.seconds_per_chunk = 0.05
+        telemetry = AudioTelemetry(emit, window=0.1)
+        telemetry.bind(loop)
+        # no energy is computed without subscribers
+        self.assertIs(loop.chunk_callback, previous)
+
+        telemetry.subscribe("gui")
+        self.assertTrue(telemetry.active)
+        loop.chunk_callback(ChunkInfo(is_speech=True, energy=10.0))
+        emit.assert_not_called()
+        loop.chunk_callback(ChunkInfo(is_speech=False, energy=30.0))
+        emit.assert_called_once()
+        message = emit.call_args[0][0]
+        self.assertEqual(message.msg_type, "recognizer_loop:telemetry")
+        self.assertEqual(message.data["energy_peak"], 30.0)
+        self.assertEqual(message.data["energy_mean"], 20.0)
+        self.assertEqual(message.data["speech_ratio"], 0.5)
+        self.assertEqual(message.data["state"], "wakeword")
+        # chained callback keeps working
+        self.assertEqual(previous.call_count, 2)
+
+        telemetry.unsubscribe("gui")
+        self.assertFalse(telemetry.active)
+        self.assertIs(loop.chunk_callback, previous)
+
+    def test_expiry(self):
+        from ovos_dinkum_listener.telemetry import AudioTelemetry
+        from ovos_dinkum_listener.voice_loop.voice_loop import ChunkInfo
+        loop = Mock(chunk_callback=None)
+        loop.mic.seconds_per_chunk = 0.1
+        telemetry = AudioTelemetry(Mock(), window=0.1, ttl=-1)
+        telemetry.bind(loop)
+        telemetry.subscribe("gui")
+        self.assertTrue(telemetry.active)
+        loop.chunk_callback(ChunkInfo())
+        self.assertIsNone(loop.chunk_callback)
+
+
+if __name__ == '__main__':
+    unittest.main()
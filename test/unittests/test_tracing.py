@@ -0,0 +1,69 @@
+import json
+import unittest
+from os.path import join
+from tempfile import TemporaryDirectory
+
+from ovos_dinkum_listener.tracing import LatencyTracer, UtteranceTrace, \
+    percentile
+
+
+class TestTracing(unittest.TestCase):
+    def _trace(self, *marks) -> UtteranceTrace:
+        trace = UtteranceTrace()
+        for event, timestamp in marks:
+            trace.mark(event, timestamp)
+        return trace
+
+    def test_spans(self):
+        trace = self._trace(("wakeword", 10.0), ("speech", 10.5),
+                            ("speech_end", 12.0), ("stt", 12.25))
+        self.assertEqual(trace.spans,
+                         [("wakeword->speech", 10.0, 0.5),
+                          ("speech->speech_end", 10.5, 1.5),
+                          ("speech_end->stt", 12.0, 0.25)])
+        self.assertEqual(trace.total, 2.25)
+        self.assertEqual(trace.as_dict()["spans"]["wakeword->speech"], 500.0)
+
+        # marks are ordered by time, not by the order they were recorded
+        trace = self._trace(("stt", 2.0), ("speech", 1.0))
+        self.assertEqual(trace.spans, [("speech->stt", 1.0, 1.0)])
+
+    def test_percentile(self):
+        values = list(range(1, 101))
+        self.assertEqual(percentile(values, 50), 50)
+        self.assertEqual(percentile(values, 95), 95)
+        self.assertEqual(percentile(values, 99), 99)
+        self.assertEqual(percentile([3], 99), 3)
+        self.assertEqual(percentile([], 50), 0.0)
+
+    def test_summary(self):
+        tracer = LatencyTracer(window=10)
+        for i in range(20):
+            tracer.finish(self._trace(("speech_end", 0.0),
+                                      ("stt", (i + 1) / 1000)))
+        # single marks have no spans
+        tracer.finish(self._trace(("speech", 0.0)))
+        self.assertEqual(tracer.traced, 20)
+        summary = tracer.summary()
+        self.assertEqual(set(summary), {"speech_end->stt", "total"})
+        # only the last 10 utterances are kept, 11..20 ms
+        self.assertEqual(summary["speech_end->stt"],
+                         {"count": 10, "p50": 15.0, "p95": 20.0, "p99": 20.0})
+
+    def test_trace_file(self):
+        with TemporaryDirectory() as tmp:
+            path = join(tmp, "traces", "listener.json")
+            tracer = LatencyTracer(trace_file=path)
+            tracer.finish(self._trace(("wakeword", 1.0), ("speech", 1.5)))
+            tracer.close()
+            tracer = LatencyTracer(trace_file=path)
+            tracer.finish(self._trace(("speech", 2.0), ("stt", 2.1)))
+            tracer.close()
+            with open(path) as f:
+                # unterminated JSON array, as accepted by trace viewers
+                events = json.loads(f.read().rstrip(",\n") + "]")
+        self.assertEqual([e["name"] for e in events],
+                         ["utterance", "wakeword->speech",
+                          "utterance", "speech->stt"])
+        self.assertEqual(events[1]["dur"], 500000)
+        self.assertTrue(all(e["ph"] == "X" for e in events))
@@ -1,3 +1,4 @@
+import time
 import unittest
 from unittest.mock import Mock, patch
 from ovos_utils.messagebus import FakeBus
@@ -89,7 +90,298 @@ class TestTransformers(unittest.TestCase):
         service.shutdown()
         MockTransformer.shutdown.assert_called_once()
 
-    # TODO: Test priority load
+    @patch("ovos_plugin_manager.audio_transformers.find_audio_transformer_plugins")
+    def test_audio_transformer_service_priority(self, find_transformers):
+        import ovos_dinkum_listener.transformers
+        ovos_dinkum_listener.transformers.find_audio_transformer_plugins = find_transformers
+        from ovos_dinkum_listener.transformers import AudioTransformersService
+
+        def _make(name, priority):
+            plug = Mock()
+            plug.return_value.name = name
+            plug.return_value.priority = priority
+            return plug
+
+        find_transformers.return_value = {"low": _make("low", 10),
+                                          "high": _make("high", 90),
+                                          "mid": _make("mid", 50)}
+        config = {'listener': {'audio_transformers': {"low": {}, "high": {},
+                                                      "mid": {}}}}
+        service = AudioTransformersService(self.bus, config)
+        self.assertEqual([p.name for p in service.plugins],
+                         ["high", "mid", "low"])
+
+        # Cached order is reused until plugins change
+        cached = service._plugins
+        service.feed_audio(b'00')
+        self.assertIs(service._plugins, cached)
+        for plug in cached:
+            plug.feed_audio_chunk.assert_called_once_with(b'00')
+
+
+    @patch("ovos_plugin_manager.audio_transformers.find_audio_transformer_plugins")
+    def test_utterance_view(self, find_transformers):
+        import ovos_dinkum_listener.transformers
+        ovos_dinkum_listener.transformers.find_audio_transformer_plugins = find_transformers
+        from ovos_dinkum_listener.transformers import AudioTransformersService
+        chunked = Mock(priority=50, utterance_view=False)
+        viewer = Mock(priority=10, utterance_view=True)
+        for plug in (chunked, viewer):
+            plug.feed_speech_utterance.side_effect = lambda audio: audio
+            plug.transform.side_effect = lambda audio: (audio, {})
+        find_transformers.return_value = {
+            "chunked": Mock(return_value=chunked),
+            "viewer": Mock(return_value=viewer)}
+        config = {'listener': {'audio_transformers': {"chunked": {},
+                                                      "viewer": {}}}}
+        service = AudioTransformersService(self.bus, config)
+        self.assertEqual(service.utterance_view, {"viewer"})
+
+        service.feed_speech(b'01')
+        chunked.feed_speech_chunk.assert_called_once_with(b'01')
+        viewer.feed_speech_chunk.assert_not_called()
+
+        audio = b'0123'
+        view = memoryview(audio)
+        service.transform(b'23', utterance=view)
+        chunked.feed_speech_utterance.assert_called_once_with(b'23')
+        viewer.feed_speech_utterance.assert_called_once_with(view)
+        self.assertTrue(view.readonly)
+        self.assertIs(view.obj, audio)
+
+    @patch("ovos_plugin_manager.audio_transformers.find_audio_transformer_plugins")
+    def test_utterance_view_before_legacy(self, find_transformers):
+        import ovos_dinkum_listener.transformers
+        ovos_dinkum_listener.transformers.find_audio_transformer_plugins = find_transformers
+        from ovos_dinkum_listener.transformers import AudioTransformersService
+        # the opt-in plugin runs first and passes the view along
+        viewer = Mock(priority=50, utterance_view=True)
+        legacy = Mock(priority=10, utterance_view=False)
+        for plug in (viewer, legacy):
+            plug.feed_speech_utterance.side_effect = lambda audio: audio
+            plug.transform.side_effect = lambda audio: (audio, {})
+        find_transformers.return_value = {
+            "viewer": Mock(return_value=viewer),
+            "legacy": Mock(return_value=legacy)}
+        config = {'listener': {'audio_transformers': {"viewer": {},
+                                                      "legacy": {}}}}
+        service = AudioTransformersService(self.bus, config)
+
+        view = memoryview(b'0123')
+        chunk, _ = service.transform(b'23', utterance=view)
+        viewer.feed_speech_utterance.assert_called_once_with(view)
+        audio = legacy.feed_speech_utterance.call_args[0][0]
+        self.assertIsInstance(audio, bytes)
+        self.assertEqual(audio, b'0123')
+        self.assertIsInstance(chunk, bytes)
+
+
+class TestTransformerMonitor(unittest.TestCase):
+    def test_quarantine(self):
+        from ovos_dinkum_listener.transformers import TransformerMonitor
+        plugin = Mock()
+        quarantined = Mock()
+        monitor = TransformerMonitor("test", plugin, chunk_budget=0,
+                                     max_overruns=2, quarantine_seconds=0.1,
+                                     on_quarantine=quarantined)
+        monitor.call("feed_audio_chunk", b'0')
+        self.assertTrue(monitor.active)
+        monitor.call("feed_audio_chunk", b'0')
+        quarantined.assert_called_once_with("test")
+        self.assertFalse(monitor.active)
+        self.assertEqual(monitor.metrics["quarantine_count"], 1)
+        self.assertEqual(
+            monitor.metrics["timings"]["feed_audio_chunk"]["calls"], 2)
+        time.sleep(0.15)
+        self.assertTrue(monitor.active)
+
+        # errors count as overruns and are re-raised
+        monitor.chunk_budget = None
+        plugin.feed_audio_chunk.side_effect = RuntimeError
+        for _ in range(2):
+            with self.assertRaises(RuntimeError):
+                monitor.call("feed_audio_chunk", b'0')
+        self.assertFalse(monitor.active)
+
+    @patch("ovos_plugin_manager.audio_transformers.find_audio_transformer_plugins")
+    def test_service_skips_quarantined(self, find_transformers):
+        import ovos_dinkum_listener.transformers
+        ovos_dinkum_listener.transformers.find_audio_transformer_plugins = find_transformers
+        from ovos_dinkum_listener.transformers import AudioTransformersService
+        plugin = Mock(priority=50)
+        plugin.transform.return_value = (b'1', {"handled": True})
+        find_transformers.return_value = {"mock": Mock(return_value=plugin)}
+        config = {'listener': {'audio_transformers': {
+            'mock': {'chunk_budget': 0, 'max_overruns': 1}}}}
+        bus = FakeBus()
+        events = []
+        bus.on("recognizer_loop:transformer.quarantined", events.append)
+        service = AudioTransformersService(bus, config)
+        service.feed_audio(b'00')
+        self.assertEqual(events[0].data["name"], "mock")
+        self.assertTrue(service.metrics["mock"]["quarantined"])
+
+        service.feed_audio(b'00')
+        plugin.feed_audio_chunk.assert_called_once()
+        _, context = service.transform(b'00')
+        self.assertNotIn("handled", context)
+        plugin.transform.assert_not_called()
+
+    @patch("ovos_plugin_manager.audio_transformers.find_audio_transformer_plugins")
+    def test_failing_sync_plugin(self, find_transformers):
+        import ovos_dinkum_listener.transformers
+        ovos_dinkum_listener.transformers.find_audio_transformer_plugins = find_transformers
+        from ovos_dinkum_listener.transformers import AudioTransformersService
+        broken = Mock(priority=90)
+        broken.feed_audio_chunk.side_effect = RuntimeError
+        broken.feed_hotword_chunk.side_effect = RuntimeError
+        working = Mock(priority=10)
+        find_transformers.return_value = {
+            "broken": Mock(return_value=broken),
+            "working": Mock(return_value=working)}
+        config = {'listener': {'audio_transformers': {
+            'broken': {'chunk_budget': None, 'max_overruns': 2},
+            'working': {'chunk_budget': None}}}}
+        bus = FakeBus()
+        events = []
+        bus.on("recognizer_loop:transformer.quarantined", events.append)
+        service = AudioTransformersService(bus, config)
+
+        # errors don't propagate to the voice loop or skip other plugins
+        service.feed_audio(b'00')
+        service.feed_hotword(b'00')
+        self.assertEqual(working.feed_audio_chunk.call_count, 1)
+        self.assertEqual(working.feed_hotword_chunk.call_count, 1)
+        self.assertEqual(events[0].data["name"], "broken")
+        self.assertTrue(service.metrics["broken"]["quarantined"])
+        self.assertFalse(service.metrics["working"]["quarantined"])
+
+        service.feed_audio(b'00')
+        broken.feed_audio_chunk.assert_called_once()
+        self.assertEqual(working.feed_audio_chunk.call_count, 2)
+
+
+class TestTransformerWorker(unittest.TestCase):
+    def test_drop_policy(self):
+        from threading import Event
+        from ovos_dinkum_listener.transformers import TransformerWorker
+        release = Event()
+        started = Event()
+        plugin = Mock()
+
+        def _slow(chunk):
+            started.set()
+            release.wait(5)
+
+        plugin.feed_speech_chunk.side_effect = _slow
+        worker = TransformerWorker("slow", plugin, queue_size=2,
+                                   drop_policy="oldest")
+        worker.start()
+        worker.put("feed_speech_chunk", b'0')
+        self.assertTrue(started.wait(5))
+        for chunk in (b'1', b'2', b'3'):
+            worker.put("feed_speech_chunk", chunk)
+        self.assertEqual(worker.metrics, {"depth": 2, "max_depth": 2,
+                                          "dropped": 1})
+        self.assertFalse(worker.wait_idle(0.1))
+        release.set()
+        self.assertTrue(worker.wait_idle(5))
+        self.assertEqual([c[0][0] for c in
+                          plugin.feed_speech_chunk.call_args_list],
+                         [b'0', b'2', b'3'])
+        worker.stop()
+        self.assertFalse(worker.is_alive())
+
+    def test_drop_newest(self):
+        from ovos_dinkum_listener.transformers import TransformerWorker
+        plugin = Mock()
+        worker = TransformerWorker("test", plugin, queue_size=1,
+                                   drop_policy="newest")
+        # not started, so chunks are only queued
+        worker.put("feed_audio_chunk", b'0')
+        worker.put("feed_audio_chunk", b'1')
+        self.assertEqual(worker.dropped, 1)
+        worker.start()
+        self.assertTrue(worker.wait_idle(5))
+        plugin.feed_audio_chunk.assert_called_once_with(b'0')
+        worker.stop()
+
+    def test_block_stopped(self):
+        from ovos_dinkum_listener.transformers import TransformerWorker
+        worker = TransformerWorker("test", Mock(), queue_size=1,
+                                   drop_policy="block")
+        worker.put("feed_audio_chunk", b'0')
+        worker._running = False
+        # a full queue on a stopped worker must not block or grow
+        worker.put("feed_audio_chunk", b'1')
+        self.assertEqual(worker.depth, 1)
+        self.assertEqual(worker.dropped, 1)
+        self.assertEqual(worker.clear(), 1)
+        self.assertEqual(worker.depth, 0)
+        self.assertEqual(worker.dropped, 2)
+
+    @patch("ovos_plugin_manager.audio_transformers.find_audio_transformer_plugins")
+    def test_transform_timeout(self, find_transformers):
+        import ovos_dinkum_listener.transformers
+        from threading import Event
+        ovos_dinkum_listener.transformers.find_audio_transformer_plugins = find_transformers
+        from ovos_dinkum_listener.transformers import AudioTransformersService
+        release = Event()
+        plugins = {}
+        for name in ("slow", "stuck"):
+            plugin = Mock(priority=50)
+            plugin.transform.return_value = (b'1', {name: True})
+            plugins[name] = plugin
+        plugins["slow"].feed_speech_chunk.side_effect = \
+            lambda _: release.wait(5)
+        plugins["stuck"].feed_speech_chunk.side_effect = \
+            lambda _: release.wait(5)
+        find_transformers.return_value = {
+            n: Mock(return_value=p) for n, p in plugins.items()}
+        config = {'listener': {'audio_transformers': {
+            n: {'async': True, 'join_timeout': 0.2} for n in plugins}}}
+        service = AudioTransformersService(FakeBus(), config)
+        for _ in range(3):
+            service.feed_speech(b'00')
+
+        started = time.monotonic()
+        _, context = service.transform(b'04')
+        # workers share one deadline instead of waiting in turn
+        self.assertLess(time.monotonic() - started, 0.4)
+        # busy plugins are skipped and their pending audio dropped
+        self.assertNotIn("slow", context)
+        self.assertNotIn("stuck", context)
+        for plugin in plugins.values():
+            plugin.transform.assert_not_called()
+        for worker in service.workers.values():
+            self.assertEqual(worker.depth, 0)
+            self.assertEqual(worker.dropped, 2)
+        release.set()
+        service.shutdown()
+
+    @patch("ovos_plugin_manager.audio_transformers.find_audio_transformer_plugins")
+    def test_async_transformer_service(self, find_transformers):
+        import ovos_dinkum_listener.transformers
+        ovos_dinkum_listener.transformers.find_audio_transformer_plugins = find_transformers
+        from ovos_dinkum_listener.transformers import AudioTransformersService
+        plugin = Mock(priority=50)
+        plugin.feed_speech_utterance.return_value = b'0'
+        plugin.transform.return_value = (b'1', {"handled": True})
+        find_transformers.return_value = {"mock": Mock(return_value=plugin)}
+        config = {'listener': {'audio_transformers': {
+            'mock': {'async': True, 'queue_size': 4}}}}
+        service = AudioTransformersService(FakeBus(), config)
+        self.assertEqual(set(service.workers), {"mock"})
+
+        for _ in range(3):
+            service.feed_speech(b'00')
+        audio, context = service.transform(b'04')
+        # queued chunks are processed before transform is called
+        self.assertEqual(plugin.feed_speech_chunk.call_count, 3)
+        self.assertTrue(context["handled"])
+        self.assertEqual(service.queue_metrics["mock"]["dropped"], 0)
+        service.shutdown()
+        plugin.shutdown.assert_called_once()
 
 
 if __name__ == '__main__':
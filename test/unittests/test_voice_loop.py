@@ -1,4 +1,5 @@
 import unittest
+from time import monotonic, sleep
 from unittest.mock import Mock, patch
 
 
@@ -209,6 +210,312 @@ class TestDinkumVoiceLoop(unittest.TestCase):
         self.loop._detect_ww = real_detect_ww
         self.loop.debiased_energy = real_debiased_energy
 
+    def test_cold_fallback_stt(self):
+        from ovos_dinkum_listener.voice_loop.voice_loop import DinkumVoiceLoop
+        from ovos_dinkum_listener.plugins import FakeStreamingSTT
+        engine = Mock()
+        engine.transcribe.return_value = [("fallback", 1.0)]
+        fallback = FakeStreamingSTT(engine)
+        fallback.stream_start = Mock()
+        fallback.stream_data = Mock()
+        stt = Mock()
+        stt.transcribe.return_value = []
+        mic = Mock(sample_rate=16000, sample_width=2, seconds_per_chunk=0.1)
+        loop = DinkumVoiceLoop(mic=mic, hotwords=Mock(), stt=stt,
+                               fallback_stt=fallback, vad=Mock(),
+                               transformers=Mock())
+
+        # Fallback is not streamed to while recording
+        loop.start_fallback_stream()
+        fallback.stream_start.assert_not_called()
+        loop.stt_chunks.append(b'\x00\x01' * 8)
+        loop.vad.is_silence.return_value = True
+        loop._in_cmd(b'\x00\x01' * 8)
+        fallback.stream_data.assert_not_called()
+        stt.stream_data.assert_called()
+
+        # Recorded utterance is replayed when primary STT fails
+        loop.stt_audio_bytes = b'\x00\x01' * 16
+        utts, _ = loop._get_tx({})
+        self.assertEqual(utts, [("fallback", 1.0)])
+        audio = engine.transcribe.call_args[0][0]
+        self.assertEqual(audio.get_raw_data(), loop.stt_audio_bytes)
+
+        # Opt back into live streaming
+        loop.stream_fallback_stt = True
+        loop.start_fallback_stream()
+        fallback.stream_start.assert_called_once()
+        loop._in_cmd(b'\x00\x01' * 8)
+        fallback.stream_data.assert_called()
+
+        # Fallback removed by a config reload mid-utterance
+        loop.fallback_stt = None
+        loop._in_cmd(b'\x00\x01' * 8)
+
+    def _run_loop(self, mic):
+        from threading import Thread
+        from ovos_dinkum_listener.voice_loop.voice_loop import DinkumVoiceLoop
+        loop = DinkumVoiceLoop(mic=mic, hotwords=Mock(), stt=Mock(),
+                               fallback_stt=None, vad=Mock(),
+                               transformers=Mock())
+        loop._detect_ww = Mock(return_value=False)
+        loop._detect_hot = Mock(return_value=False)
+        loop._in_cmd = Mock()
+        loop._is_running = True
+        thread = Thread(target=loop.run, daemon=True)
+        thread.start()
+        self.addCleanup(thread.join, 1)
+        self.addCleanup(loop.stop)
+        return loop
+
+    @staticmethod
+    def _timed_mic(reads: list):
+        def _read_chunk():
+            sleep(0.01)
+            reads.append(monotonic())
+            return bytes(320)
+
+        return Mock(read_chunk=Mock(side_effect=_read_chunk),
+                    chunk_size=320, sample_width=2, seconds_per_chunk=0.01)
+
+    def test_swap_components(self):
+        from ovos_dinkum_listener.voice_loop import ListeningState
+        old_vad = self.loop.vad
+        new_vad = Mock()
+
+        # Loop not running, swapped immediately
+        swap = self.loop.swap_components(vad=new_vad)
+        self.assertTrue(swap.done)
+        self.assertEqual(self.loop.vad, new_vad)
+        self.assertEqual(swap.replaced, {"vad": old_vad})
+        self.loop.swap_components(vad=old_vad)
+
+        # Running loop waits for the utterance to end
+        loop = self._run_loop(self._timed_mic([]))
+        sleep(0.05)
+        loop.state = ListeningState.IN_COMMAND
+        sleep(0.05)
+        vad = loop.vad
+        swap = loop.swap_components(vad=new_vad)
+        self.assertFalse(swap.wait(0.1))
+        self.assertEqual(loop.vad, vad)
+
+        loop.state = ListeningState.DETECT_WAKEWORD
+        self.assertTrue(swap.wait(1))
+        self.assertEqual(loop.vad, new_vad)
+        self.assertEqual(swap.replaced, {"vad": vad})
+
+        # Pending swaps are applied when the loop stops
+        loop.state = ListeningState.IN_COMMAND
+        sleep(0.05)
+        swap = loop.swap_components(vad=vad)
+        loop.stop()
+        self.assertTrue(swap.wait(1))
+        self.assertEqual(loop.vad, vad)
+
+    def test_swap_deaf_time(self):
+        old_reads, new_reads = [], []
+        old_mic = self._timed_mic(old_reads)
+        new_mic = self._timed_mic(new_reads)
+        loop = self._run_loop(old_mic)
+        sleep(0.05)
+
+        # the old mic keeps being read while the new one is loaded
+        start = monotonic()
+        sleep(0.3)
+        loop_reads = len(old_reads)
+        swap = loop.swap_components(mic=new_mic)
+        self.assertTrue(swap.wait(1))
+        sleep(0.05)
+        loop.stop()
+
+        reads = sorted(old_reads + new_reads)
+        reads = [t for t in reads if t >= start]
+        deaf_time = max(b - a for a, b in zip(reads, reads[1:]))
+        print(f"reload deaf time: {deaf_time * 1000:.1f}ms")
+        self.assertGreater(loop_reads, 10)
+        self.assertTrue(new_reads)
+        self.assertLess(deaf_time, 0.1)
+
+    def test_speculative_stt(self):
+        from ovos_dinkum_listener.voice_loop.voice_loop import DinkumVoiceLoop
+        from ovos_dinkum_listener.plugins import FakeStreamingSTT
+        from ovos_dinkum_listener.settings import update_settings
+        update_settings({"lang": "en-us", "secondary_langs": ["pt-pt"]})
+        self.addCleanup(update_settings)
+        engine = Mock()
+        engine.transcribe.side_effect = lambda audio, lang: [(lang, 1.0)]
+        stt = FakeStreamingSTT(engine, {"lang": "en-us"})
+        transformers = Mock(plugins=[Mock()])
+        transformers.transform.return_value = (b'', {})
+        loop = DinkumVoiceLoop(mic=Mock(), hotwords=Mock(), stt=stt,
+                               fallback_stt=None, vad=Mock(),
+                               transformers=transformers)
+        # opt-in
+        self.assertFalse(loop.speculative_stt)
+        loop.speculative_stt = True
+        loop.text_callback = Mock()
+        self.addCleanup(stt.stream_stop)
+
+        # Detected language matches the default, STT runs once
+        stt.stream_start()
+        stt.stream.update(b'\x00\x01' * 16)
+        loop._after_cmd(b'')
+        loop.text_callback.assert_called_once()
+        utts = loop.text_callback.call_args[0][0]
+        self.assertEqual([(u.lower(), c) for u, c in utts], [("en-us", 1.0)])
+        self.assertEqual(engine.transcribe.call_count, 1)
+        self.assertEqual(loop.speculative_stt_hits, 1)
+
+        # Different language detected, STT runs again on the same audio
+        transformers.transform.return_value = (b'', {"stt_lang": "pt-pt"})
+        stt.stream_start()
+        stt.stream.update(b'\x00\x01' * 16)
+        loop._after_cmd(b'')
+        utts = loop.text_callback.call_args[0][0]
+        self.assertEqual([(u.lower(), c) for u, c in utts], [("pt-pt", 1.0)])
+        self.assertEqual(engine.transcribe.call_count, 3)
+        self.assertEqual(engine.transcribe.call_args[0][0].get_raw_data(),
+                         b'\x00\x01' * 16)
+        self.assertEqual(loop.speculative_stt_misses, 1)
+
+    def test_latency_trace(self):
+        from ovos_dinkum_listener.voice_loop.voice_loop import \
+            DinkumVoiceLoop, ListeningState
+        from ovos_dinkum_listener.tracing import LatencyTracer
+        mic = Mock(seconds_per_chunk=0.1, sample_rate=16000, sample_width=2)
+        stt = Mock()
+        stt.transcribe.return_value = []
+        fallback_stt = Mock()
+        fallback_stt.transcribe.return_value = [("hello", 1.0)]
+        transformers = Mock()
+        transformers.transform.side_effect = lambda chunk, utterance: (b'', {})
+        vad = Mock()
+        loop = DinkumVoiceLoop(mic=mic, hotwords=Mock(), stt=stt,
+                               fallback_stt=fallback_stt, vad=vad,
+                               transformers=transformers,
+                               speech_seconds=0.2, silence_seconds=0.2,
+                               tracer=LatencyTracer())
+        loop.text_callback = Mock()
+
+        loop.reset_speech_timer()
+        loop._mark("wakeword")
+        vad.is_silence.return_value = False
+        loop._before_cmd(b'\x00' * 4)
+        loop._before_cmd(b'\x00' * 4)
+        self.assertEqual(loop.state, ListeningState.IN_COMMAND)
+        vad.is_silence.return_value = True
+        loop._in_cmd(b'\x00' * 4)
+        loop._in_cmd(b'\x00' * 4)
+        self.assertEqual(loop.state, ListeningState.AFTER_COMMAND)
+        loop._after_cmd(b'')
+
+        context = loop.text_callback.call_args[0][1]
+        self.assertEqual(list(context["trace"]["marks"]),
+                         ["wakeword", "speech", "speech_end", "transformers",
+                          "stt", "fallback_stt", "emit"])
+        self.assertEqual(list(context["trace"]["spans"]),
+                         ["wakeword->speech", "speech->speech_end",
+                          "speech_end->transformers", "transformers->stt",
+                          "stt->fallback_stt", "fallback_stt->emit"])
+        # the trace is finished once the transcription was emitted
+        self.assertIsNone(loop._trace)
+        self.assertEqual(loop.tracer.traced, 1)
+        summary = loop.tracer.summary()
+        self.assertIn("fallback_stt->emit", summary)
+        self.assertEqual(summary["total"]["count"], 1)
+
+        # tracing is disabled without a tracer
+        loop.tracer = None
+        loop._after_cmd(b'')
+        self.assertNotIn("trace", loop.text_callback.call_args[0][1])
+
+    def test_metrics(self):
+        from ovos_dinkum_listener.voice_loop.voice_loop import DinkumVoiceLoop
+        from ovos_dinkum_listener.metrics import ListenerMetrics
+        stt = Mock()
+        stt.transcribe.return_value = []
+        fallback_stt = Mock()
+        fallback_stt.transcribe.return_value = [("hello", 1.0)]
+        vad = Mock()
+        vad.is_silence.return_value = False
+        metrics = ListenerMetrics()
+        loop = DinkumVoiceLoop(mic=Mock(sample_rate=16000, sample_width=2),
+                               hotwords=Mock(), stt=stt,
+                               fallback_stt=fallback_stt, vad=vad,
+                               transformers=Mock(), metrics=metrics)
+        self.assertTrue(loop._vad_speech(b'\x00' * 4))
+        self.assertEqual(metrics.vad.count(), 1)
+
+        utts, _ = loop._get_tx({})
+        self.assertEqual(utts, [("hello", 1.0)])
+        self.assertEqual(metrics.stt.count(engine="Mock", role="primary"), 1)
+        self.assertEqual(metrics.stt.count(engine="Mock", role="fallback"), 1)
+
+    def test_realtime_degradation(self):
+        from ovos_dinkum_listener.voice_loop.voice_loop import DinkumVoiceLoop
+        from ovos_dinkum_listener.realtime import RealtimeMonitor
+        stt = Mock()
+        stt.transcribe.return_value = []
+        fallback_stt = Mock()
+        fallback_stt.transcribe.return_value = [("hello", 1.0)]
+        hotwords = Mock()
+        transformers = Mock(skip_feed=False)
+        callback = Mock()
+        loop = DinkumVoiceLoop(mic=Mock(seconds_per_chunk=0.5,
+                                        sample_rate=16000, sample_width=2),
+                               hotwords=hotwords, stt=stt,
+                               fallback_stt=fallback_stt, vad=Mock(),
+                               transformers=transformers,
+                               realtime=RealtimeMonitor(window=1.0),
+                               degradation_callback=callback)
+
+        # behind real time for three windows
+        for _ in range(6):
+            loop._observe_chunk(0.75)
+        self.assertTrue(transformers.skip_feed)
+        self.assertEqual([c[0] for c in callback.call_args_list],
+                         [("transformers", True, 1.5),
+                          ("fallback_stt", True, 1.5),
+                          ("hotwords", True, 1.5)])
+        self.assertFalse(loop._detect_hot(b'\x00' * 4))
+        hotwords.update.assert_not_called()
+        utts, _ = loop._get_tx({})
+        self.assertEqual(utts, [])
+        fallback_stt.transcribe.assert_not_called()
+
+        # recovers once processing is fast again
+        for _ in range(2 * 5 * 3):
+            loop._observe_chunk(0.1)
+        self.assertFalse(transformers.skip_feed)
+        self.assertEqual(callback.call_args[0], ("transformers", False, 0.2))
+        self.assertEqual(loop._get_tx({})[0], [("hello", 1.0)])
+
+    def test_realtime_ignores_transcription(self):
+        from ovos_dinkum_listener.voice_loop.voice_loop import \
+            ListeningState
+        from ovos_dinkum_listener.realtime import RealtimeMonitor
+        reads = []
+        loop = self._run_loop(self._timed_mic(reads))
+        loop.realtime = RealtimeMonitor(window=0.05)
+        loop.degradation_callback = Mock()
+
+        def _slow_stt(*args, **kwargs):
+            sleep(0.3)
+            return [("hello", 1.0)]
+
+        loop.stt.transcribe.side_effect = _slow_stt
+        loop.transformers.transform.return_value = (b'', {})
+        loop.state = ListeningState.AFTER_COMMAND
+        sleep(0.6)
+        loop.stop()
+
+        loop.stt.transcribe.assert_called_once()
+        self.assertGreater(len(reads), 10)
+        self.assertLess(loop.realtime.realtime_factor, 1.0)
+        self.assertEqual(loop.realtime.active, [])
+        loop.degradation_callback.assert_not_called()
+
 
 if __name__ == '__main__':
     unittest.main()